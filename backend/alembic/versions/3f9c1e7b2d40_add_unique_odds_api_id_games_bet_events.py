@@ -0,0 +1,79 @@
+"""add_unique_odds_api_id_games_bet_events
+
+Revision ID: 3f9c1e7b2d40
+Revises: ee7d04ed9d57
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '3f9c1e7b2d40'
+down_revision = 'ee7d04ed9d57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Collapse duplicates left by the old check-then-insert ingestion before
+    # the constraints are added; references are moved onto the oldest row.
+    op.execute("""
+        WITH keep AS (
+            SELECT id, MIN(id) OVER (PARTITION BY odds_api_id) AS keep_id
+            FROM games
+            WHERE odds_api_id IS NOT NULL
+        )
+        UPDATE bet_events be
+        SET game_id = keep.keep_id
+        FROM keep
+        WHERE be.game_id = keep.id AND keep.id <> keep.keep_id
+    """)
+    op.execute("""
+        DELETE FROM games g
+        USING games k
+        WHERE g.odds_api_id = k.odds_api_id AND g.id > k.id
+    """)
+
+    op.execute("""
+        CREATE TEMP TABLE bet_event_dupes ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY odds_api_id) AS keep_id
+            FROM bet_events
+            WHERE odds_api_id IS NOT NULL
+        ) t
+        WHERE id <> keep_id
+    """)
+    op.execute("""
+        UPDATE bet_events_on_coupons boc
+        SET bet_event_id = d.keep_id
+        FROM bet_event_dupes d
+        WHERE boc.bet_event_id = d.id
+    """)
+    op.execute("""
+        DELETE FROM bet_recommendations br
+        USING bet_event_dupes d, bet_recommendations kept
+        WHERE br.bet_event_id = d.id
+          AND kept.bet_event_id = d.keep_id
+          AND kept.tipster_id = br.tipster_id
+          AND kept.tipster_tier_id IS NOT DISTINCT FROM br.tipster_tier_id
+    """)
+    op.execute("""
+        UPDATE bet_recommendations br
+        SET bet_event_id = d.keep_id
+        FROM bet_event_dupes d
+        WHERE br.bet_event_id = d.id
+    """)
+    op.execute("""
+        DELETE FROM bet_events be
+        USING bet_event_dupes d
+        WHERE be.id = d.id
+    """)
+
+    op.create_unique_constraint('uq_games_odds_api_id', 'games', ['odds_api_id'])
+    op.create_unique_constraint('uq_bet_events_odds_api_id', 'bet_events', ['odds_api_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_bet_events_odds_api_id', 'bet_events', type_='unique')
+    op.drop_constraint('uq_games_odds_api_id', 'games', type_='unique')
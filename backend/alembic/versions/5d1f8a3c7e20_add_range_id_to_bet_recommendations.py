@@ -0,0 +1,47 @@
+"""add_range_id_to_bet_recommendations
+
+Revision ID: 5d1f8a3c7e20
+Revises: c4a7e2f91b3d
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '5d1f8a3c7e20'
+down_revision = 'c4a7e2f91b3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('bet_recommendations', sa.Column('range_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_bet_recommendations_range_id',
+        'bet_recommendations',
+        'tipster_ranges',
+        ['range_id'],
+        ['id'],
+        ondelete='SET NULL',
+    )
+    op.create_index(op.f('ix_bet_recommendations_range_id'), 'bet_recommendations', ['range_id'], unique=False)
+
+    op.execute("""
+        UPDATE bet_recommendations br
+        SET range_id = (
+            SELECT tr.id
+            FROM tipster_ranges tr
+            WHERE tr.range_start <= be.odds AND be.odds <= tr.range_end
+            ORDER BY tr.range_start, tr.range_end
+            LIMIT 1
+        )
+        FROM bet_events be
+        WHERE be.id = br.bet_event_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bet_recommendations_range_id'), table_name='bet_recommendations')
+    op.drop_constraint('fk_bet_recommendations_range_id', 'bet_recommendations', type_='foreignkey')
+    op.drop_column('bet_recommendations', 'range_id')
@@ -0,0 +1,37 @@
+"""add_odds_hash_and_odds_history
+
+Revision ID: 8b2e4d61c0a9
+Revises: 3f9c1e7b2d40
+Create Date: 2026-10-17 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '8b2e4d61c0a9'
+down_revision = '3f9c1e7b2d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('games', sa.Column('odds_hash', sa.String(length=64), nullable=True))
+    op.create_table(
+        'bet_event_odds_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bet_event_id', sa.Integer(), nullable=False),
+        sa.Column('odds', sa.Float(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['bet_event_id'], ['bet_events.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_bet_event_odds_history_id'), 'bet_event_odds_history', ['id'], unique=False)
+    op.create_index('ix_bet_event_odds_history_event_time', 'bet_event_odds_history', ['bet_event_id', 'recorded_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bet_event_odds_history_event_time', table_name='bet_event_odds_history')
+    op.drop_index(op.f('ix_bet_event_odds_history_id'), table_name='bet_event_odds_history')
+    op.drop_table('bet_event_odds_history')
+    op.drop_column('games', 'odds_hash')
@@ -0,0 +1,35 @@
+"""add_philip_snat_team_snapshots
+
+Revision ID: a4c9e2f7b318
+Revises: d3e8a1f6b924
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'a4c9e2f7b318'
+down_revision = 'd3e8a1f6b924'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('philip_snat_team_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('league', sa.String(length=100), nullable=False),
+    sa.Column('team', sa.String(length=100), nullable=False),
+    sa.Column('snapshot_date', sa.Date(), nullable=False),
+    sa.Column('features', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('league', 'team', 'snapshot_date', name='uq_philip_snat_team_snapshot')
+    )
+    op.create_index(op.f('ix_philip_snat_team_snapshots_id'), 'philip_snat_team_snapshots', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_philip_snat_team_snapshots_id'), table_name='philip_snat_team_snapshots')
+    op.drop_table('philip_snat_team_snapshots')
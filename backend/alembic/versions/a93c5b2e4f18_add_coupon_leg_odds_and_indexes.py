@@ -0,0 +1,35 @@
+"""add_coupon_leg_odds_and_indexes
+
+Revision ID: a93c5b2e4f18
+Revises: 5d1f8a3c7e20
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'a93c5b2e4f18'
+down_revision = '5d1f8a3c7e20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('bet_events_on_coupons', sa.Column('odds', sa.Float(), nullable=True))
+    op.create_index(op.f('ix_bet_events_on_coupons_coupon_id'), 'bet_events_on_coupons', ['coupon_id'], unique=False)
+    op.create_index(op.f('ix_bet_events_on_coupons_bet_event_id'), 'bet_events_on_coupons', ['bet_event_id'], unique=False)
+
+    op.execute("""
+        UPDATE bet_events_on_coupons boc
+        SET odds = be.odds
+        FROM bet_events be
+        WHERE be.id = boc.bet_event_id
+    """)
+    op.execute("UPDATE coupons SET result = 'PENDING' WHERE result IS NULL")
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bet_events_on_coupons_bet_event_id'), table_name='bet_events_on_coupons')
+    op.drop_index(op.f('ix_bet_events_on_coupons_coupon_id'), table_name='bet_events_on_coupons')
+    op.drop_column('bet_events_on_coupons', 'odds')
@@ -0,0 +1,25 @@
+"""add_version_to_philip_snat_ai_models
+
+Revision ID: b6d2f0a8c3e1
+Revises: e7b14c9a2d05
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'b6d2f0a8c3e1'
+down_revision = 'e7b14c9a2d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('philip_snat_ai_models', sa.Column('version', sa.String(length=64), nullable=True))
+    op.add_column('philip_snat_ai_models', sa.Column('artifact_path', sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('philip_snat_ai_models', 'artifact_path')
+    op.drop_column('philip_snat_ai_models', 'version')
@@ -0,0 +1,48 @@
+"""tipster_stats_float_returns
+
+Revision ID: c4a7e2f91b3d
+Revises: 8b2e4d61c0a9
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c4a7e2f91b3d'
+down_revision = '8b2e4d61c0a9'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('tipster_main_stats', 'total_return'),
+    ('tipster_main_stats', 'sum_odds'),
+    ('tipster_tier_stats', 'total_return'),
+    ('tipster_tier_stats', 'sum_odds'),
+    ('tipster_main_range_stats', 'total_return'),
+    ('tipster_tiers_range_stats', 'total_return'),
+]
+
+
+def upgrade() -> None:
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.Integer(),
+            type_=sa.Float(),
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.Float(),
+            type_=sa.Integer(),
+            existing_nullable=False,
+            postgresql_using=f'round({column})::integer',
+        )
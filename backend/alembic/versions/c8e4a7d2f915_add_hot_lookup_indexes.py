@@ -0,0 +1,47 @@
+"""add_hot_lookup_indexes
+
+Revision ID: c8e4a7d2f915
+Revises: a4c9e2f7b318
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c8e4a7d2f915'
+down_revision = 'a4c9e2f7b318'
+branch_labels = None
+depends_on = None
+
+
+UNSETTLED = "result IS NULL OR result IN ('TO_RESOLVE', 'UNKNOWN')"
+
+
+def upgrade() -> None:
+    # Upcoming games, alone or filtered by sport and/or league
+    op.create_index(op.f('ix_games_datetime'), 'games', ['datetime'], unique=False)
+    op.create_index('ix_games_sport_league_datetime', 'games', ['sport_id', 'league_id', 'datetime'], unique=False)
+    op.create_index('ix_games_league_datetime', 'games', ['league_id', 'datetime'], unique=False)
+
+    op.create_index(op.f('ix_bet_events_game_id'), 'bet_events', ['game_id'], unique=False)
+    # Events the settlement worker still watches
+    op.create_index('ix_bet_events_unsettled_game_id', 'bet_events', ['game_id'], unique=False, postgresql_where=sa.text(UNSETTLED))
+
+    op.create_index(op.f('ix_leagues_odds_api_id'), 'leagues', ['odds_api_id'], unique=False)
+    op.create_index('ix_leagues_download_sport_id', 'leagues', ['sport_id'], unique=False, postgresql_where=sa.text('download'))
+
+    op.create_index(op.f('ix_bet_recommendations_bet_event_id'), 'bet_recommendations', ['bet_event_id'], unique=False)
+    op.create_index(op.f('ix_tipsters_user_id'), 'tipsters', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tipsters_user_id'), table_name='tipsters')
+    op.drop_index(op.f('ix_bet_recommendations_bet_event_id'), table_name='bet_recommendations')
+    op.drop_index('ix_leagues_download_sport_id', table_name='leagues')
+    op.drop_index(op.f('ix_leagues_odds_api_id'), table_name='leagues')
+    op.drop_index('ix_bet_events_unsettled_game_id', table_name='bet_events')
+    op.drop_index(op.f('ix_bet_events_game_id'), table_name='bet_events')
+    op.drop_index('ix_games_league_datetime', table_name='games')
+    op.drop_index('ix_games_sport_league_datetime', table_name='games')
+    op.drop_index(op.f('ix_games_datetime'), table_name='games')
@@ -0,0 +1,34 @@
+"""add_prediction_state_to_nhl_khl_games
+
+Revision ID: d3e8a1f6b924
+Revises: b6d2f0a8c3e1
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd3e8a1f6b924'
+down_revision = 'b6d2f0a8c3e1'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('philip_snat_nhl_games', 'philip_snat_khl_games')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('prediction_home_goals', sa.JSON(), nullable=True))
+        op.add_column(table, sa.Column('prediction_away_goals', sa.JSON(), nullable=True))
+        op.add_column(table, sa.Column('prediction_hash', sa.String(length=40), nullable=True))
+        op.add_column(table, sa.Column('prediction_model_version', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_column(table, 'prediction_model_version')
+        op.drop_column(table, 'prediction_hash')
+        op.drop_column(table, 'prediction_away_goals')
+        op.drop_column(table, 'prediction_home_goals')
@@ -0,0 +1,60 @@
+"""add_tipster_directory
+
+Revision ID: e3b7f1a9c264
+Revises: c8e4a7d2f915
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'e3b7f1a9c264'
+down_revision = 'c8e4a7d2f915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tipster_directory',
+        sa.Column('tipster_id', sa.Integer(), nullable=False),
+        sa.Column('appreciation', sa.Integer(), nullable=False),
+        sa.Column('followers_count', sa.Integer(), nullable=False),
+        sa.Column('recommendations_count', sa.Integer(), nullable=False),
+        sa.Column('tags', sa.Text(), nullable=False),
+        sa.Column(
+            'tags_search',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', tags)", persisted=True),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(['tipster_id'], ['tipsters.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tipster_id'),
+    )
+    op.create_index('ix_tipster_directory_followers', 'tipster_directory', ['followers_count', 'tipster_id'], unique=False)
+    op.create_index('ix_tipster_directory_recommendations', 'tipster_directory', ['recommendations_count', 'tipster_id'], unique=False)
+    op.create_index('ix_tipster_directory_appreciation', 'tipster_directory', ['appreciation', 'tipster_id'], unique=False)
+    op.create_index('ix_tipster_directory_tags_search', 'tipster_directory', ['tags_search'], unique=False, postgresql_using='gin')
+
+    op.execute(
+        """
+        INSERT INTO tipster_directory (tipster_id, appreciation, followers_count, recommendations_count, tags)
+        SELECT
+            t.id,
+            t.appreciation,
+            (SELECT count(*) FROM user_tipster_follows f WHERE f.tipster_id = t.id),
+            (SELECT count(*) FROM bet_recommendations r WHERE r.tipster_id = t.id),
+            concat_ws(E'\\n', t.tag_1, t.tag_2, t.tag_3)
+        FROM tipsters t
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tipster_directory_tags_search', table_name='tipster_directory', postgresql_using='gin')
+    op.drop_index('ix_tipster_directory_appreciation', table_name='tipster_directory')
+    op.drop_index('ix_tipster_directory_recommendations', table_name='tipster_directory')
+    op.drop_index('ix_tipster_directory_followers', table_name='tipster_directory')
+    op.drop_table('tipster_directory')
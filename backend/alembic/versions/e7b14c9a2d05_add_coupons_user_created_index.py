@@ -0,0 +1,23 @@
+"""add_coupons_user_created_index
+
+Revision ID: e7b14c9a2d05
+Revises: a93c5b2e4f18
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e7b14c9a2d05'
+down_revision = 'a93c5b2e4f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_coupons_user_created_id', 'coupons', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_coupons_user_created_id', table_name='coupons')
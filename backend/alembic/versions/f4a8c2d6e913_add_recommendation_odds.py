@@ -0,0 +1,30 @@
+"""add_recommendation_odds
+
+Revision ID: f4a8c2d6e913
+Revises: e3b7f1a9c264
+Create Date: 2026-10-17 23:55:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f4a8c2d6e913'
+down_revision = 'e3b7f1a9c264'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('bet_recommendations', sa.Column('odds', sa.Float(), nullable=True))
+
+    op.execute("""
+        UPDATE bet_recommendations br
+        SET odds = be.odds
+        FROM bet_events be
+        WHERE be.id = br.bet_event_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('bet_recommendations', 'odds')
@@ -15,20 +15,26 @@ from typing import List, Optional
 from pydantic import BaseModel
 import csv
 import io
+import logging
 import re
+import threading
 from pathlib import Path
 from datetime import datetime
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.response_cache import response_cache
 from app.models.user import User
 from app.schemas.user import UserResponse
 from app.models.philip_snat_sport import PhilipSnatSport
 from app.models.philip_snat_nhl_game import PhilipSnatNhlGame
 from app.models.philip_snat_khl_game import PhilipSnatKhlGame
 from app.schemas.philip_snat import PhilipSnatSportResponse
+from philip_snat_models.model_server import MODEL_CLASSES, ModelClient
 
 PREDICTIONS_DIR = Path("philip_snat_models/predictions")
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 UPLOADS_DIR = Path("uploads")
@@ -275,6 +281,49 @@ async def delete_prediction_file(
     return {"success": True, "message": "File deleted successfully"}
 
 
+@router.get("/admin/cache-stats")
+def get_cache_stats(current_user: User = Depends(require_admin)):
+    return response_cache.stats()
+
+
+def _run_prediction(client: ModelClient, league: str):
+    try:
+        seconds = client.run(league, "predict")
+        logger.info(f"Philip Snat {league} prediction finished in {seconds:.1f}s")
+    except (OSError, RuntimeError):
+        logger.exception(f"Philip Snat {league} prediction failed")
+
+
+@router.post(
+    "/admin/philip-snat/{league}/predict", status_code=status.HTTP_202_ACCEPTED
+)
+def run_philip_snat_prediction(
+    league: str, current_user: User = Depends(require_admin)
+):
+    league = league.upper()
+    if league not in MODEL_CLASSES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="League not found"
+        )
+
+    client = ModelClient()
+    if not client.available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model server is not running",
+        )
+    # A stage can run for up to the client timeout, so it is not tied to a
+    # request worker; the outcome is logged
+    threading.Thread(
+        target=_run_prediction,
+        args=(client, league),
+        name=f"philip-snat-predict-{league.lower()}",
+        daemon=True,
+    ).start()
+
+    return {"success": True, "league": league, "status": "started"}
+
+
 @router.delete("/admin/uploads/{filename}")
 async def delete_file(filename: str, current_user: User = Depends(require_admin)):
     if ".." in filename or "/" in filename or "\\" in filename:
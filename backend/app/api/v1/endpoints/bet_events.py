@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+import base64
+import csv
+import io
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, tuple_
 from datetime import datetime
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
+from app.core.bet_event_pool import get_bet_event_pool
 from app.core.security import get_current_user, get_current_user_optional
 from app.models.bet_event import BetEvent
 from app.models.game import Game
@@ -12,6 +17,124 @@ from typing import List, Optional
 
 router = APIRouter()
 
+EXPORT_BATCH_SIZE = 1000
+CSV_HEADER = [
+    "ID",
+    "Odds",
+    "Event",
+    "Game ID",
+    "DateTime",
+    "Sport ID",
+    "League ID",
+    "Home Team",
+    "Away Team",
+]
+
+
+def upcoming_bet_events_query(
+    db: Session, sport_id: Optional[int] = None, league_id: Optional[int] = None
+):
+    query = db.query(BetEvent).options(
+        joinedload(BetEvent.game).joinedload(Game.sport),
+        joinedload(BetEvent.game).joinedload(Game.league),
+    )
+
+    # Always join Game table and filter out past events
+    query = query.join(Game).filter(Game.datetime > datetime.now())
+
+    if sport_id is not None:
+        query = query.filter(Game.sport_id == sport_id)
+
+    if league_id is not None:
+        query = query.filter(Game.league_id == league_id)
+
+    return query
+
+
+def encode_cursor(bet_event: BetEvent) -> str:
+    raw = f"{bet_event.game.datetime.isoformat()}|{bet_event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        game_datetime, bet_event_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(game_datetime), int(bet_event_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def paginate_bet_events(query, response: Response, limit: Optional[int], cursor: Optional[str]):
+    if cursor:
+        query = query.filter(
+            tuple_(Game.datetime, BetEvent.id) > tuple_(*decode_cursor(cursor))
+        )
+    query = query.order_by(Game.datetime.asc(), BetEvent.id.asc())
+    if limit is None:
+        return query.all()
+
+    bet_events = query.limit(limit + 1).all()
+    if len(bet_events) > limit:
+        bet_events = bet_events[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(bet_events[-1])
+    return bet_events
+
+
+def stream_bet_events(sport_id: Optional[int], league_id: Optional[int], render):
+    """
+    Yield chunks rendered from upcoming bet events read through a server-side
+    cursor, EXPORT_BATCH_SIZE rows at a time. The generator owns its session
+    since it outlives the request handler.
+    """
+    db = SessionLocal()
+    try:
+        query = (
+            upcoming_bet_events_query(db, sport_id, league_id)
+            .order_by(Game.datetime.asc(), BetEvent.id.asc())
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+        batch = []
+        for bet_event in query:
+            batch.append(bet_event)
+            if len(batch) == EXPORT_BATCH_SIZE:
+                yield render(batch)
+                batch = []
+        if batch:
+            yield render(batch)
+    finally:
+        db.close()
+
+
+def render_csv(bet_events) -> str:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for event in bet_events:
+        writer.writerow(
+            [
+                event.id,
+                event.odds,
+                event.event,
+                event.game_id,
+                event.game.datetime,
+                event.game.sport_id,
+                event.game.league_id,
+                event.game.home_team,
+                event.game.away_team,
+            ]
+        )
+    return output.getvalue()
+
+
+def render_ndjson(bet_events) -> str:
+    return "".join(
+        BetEventResponse.model_validate(event).model_dump_json() + "\n"
+        for event in bet_events
+    )
+
 
 @router.get("/test")
 def test_endpoint():
@@ -20,46 +143,28 @@ def test_endpoint():
 
 
 @router.get("/", response_model=List[BetEventResponse])
-def get_bet_events(db: Session = Depends(get_db)):
-    """Get all bet events with game, sport and league data"""
-    current_time = datetime.now()
-    bet_events = (
-        db.query(BetEvent)
-        .options(
-            joinedload(BetEvent.game).joinedload(Game.sport),
-            joinedload(BetEvent.game).joinedload(Game.league),
-        )
-        .join(Game)
-        .filter(Game.datetime > current_time)
-        .all()
-    )
-    return bet_events
+def get_bet_events(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Get upcoming bet events with game, sport and league data, optionally a page at a time"""
+    return paginate_bet_events(upcoming_bet_events_query(db), response, limit, cursor)
 
 
 @router.get("/filter", response_model=List[BetEventResponse])
 def get_bet_events_by_filters(
+    response: Response,
     sport_id: Optional[int] = None,
     league_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
     """Get bet events filtered by sport_id and/or league_id with game, sport and league data"""
-    current_time = datetime.now()
-    query = db.query(BetEvent).options(
-        joinedload(BetEvent.game).joinedload(Game.sport),
-        joinedload(BetEvent.game).joinedload(Game.league),
-    )
-
-    # Always join Game table and filter out past events
-    query = query.join(Game).filter(Game.datetime > current_time)
-
-    if sport_id is not None:
-        query = query.filter(Game.sport_id == sport_id)
-
-    if league_id is not None:
-        query = query.filter(Game.league_id == league_id)
-
-    bet_events = query.all()
-    return bet_events
+    query = upcoming_bet_events_query(db, sport_id, league_id)
+    return paginate_bet_events(query, response, limit, cursor)
 
 
 @router.get("/random", response_model=List[BetEventResponse])
@@ -115,14 +220,7 @@ def get_random_bet_events(
 
 
     # Build base query with joins and time filter
-    query = (
-        db.query(BetEvent)
-        .options(
-            joinedload(BetEvent.game).joinedload(Game.sport),
-            joinedload(BetEvent.game).joinedload(Game.league),
-        )
-        .join(Game)
-    )
+    query = db.query(BetEvent).join(Game)
 
     # Apply date filters
     if from_datetime and to_datetime:
@@ -154,6 +252,7 @@ def get_random_bet_events(
         query = query.filter(BetEvent.odds <= max_odds)
 
     # Exclude specific event IDs if provided
+    exclude_list = []
     if exclude_ids:
         try:
             exclude_list = [
@@ -163,10 +262,43 @@ def get_random_bet_events(
                 query = query.filter(~BetEvent.id.in_(exclude_list))
         except ValueError:
             # If parsing fails, ignore the exclude_ids parameter
-            pass
+            exclude_list = []
+
+    # Sample ids from the in-memory pool of upcoming events, or let the
+    # database shuffle ids only for windows reaching into the past
+    pool = get_bet_event_pool(db)
+    if pool.covers(from_datetime, to_datetime):
+        sampled_ids = pool.sample(
+            limit,
+            sport_id=sport_id,
+            league_id=league_id,
+            min_odds=min_odds,
+            max_odds=max_odds,
+            from_datetime=from_datetime,
+            to_datetime=to_datetime,
+            exclude_ids=set(exclude_list),
+        )
+    else:
+        sampled_ids = [
+            bet_event_id
+            for (bet_event_id,) in query.with_entities(BetEvent.id)
+            .order_by(func.random())
+            .limit(limit)
+        ]
+    if not sampled_ids:
+        return []
 
-    # Get random events using database-level randomization
-    bet_events = query.order_by(func.random()).limit(limit).all()
+    # Load the sampled events, re-checking the filters against current data
+    bet_events = (
+        query.options(
+            joinedload(BetEvent.game).joinedload(Game.sport),
+            joinedload(BetEvent.game).joinedload(Game.league),
+        )
+        .filter(BetEvent.id.in_(sampled_ids))
+        .all()
+    )
+    position = {bet_event_id: i for i, bet_event_id in enumerate(sampled_ids)}
+    bet_events.sort(key=lambda bet_event: position[bet_event.id])
 
     return bet_events
 
@@ -227,70 +359,32 @@ def create_bet_event(
 def export_bet_events_csv(
     sport_id: Optional[int] = None,
     league_id: Optional[int] = None,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Export bet events to CSV - requires authentication"""
-    import csv
-    import io
-    from fastapi.responses import StreamingResponse
-
-    current_time = datetime.now()
-    query = db.query(BetEvent).options(
-        joinedload(BetEvent.game).joinedload(Game.sport),
-        joinedload(BetEvent.game).joinedload(Game.league),
-    )
-
-    # Always join Game table and filter out past events
-    query = query.join(Game).filter(Game.datetime > current_time)
-
-    if sport_id is not None:
-        query = query.filter(Game.sport_id == sport_id)
-
-    if league_id is not None:
-        query = query.filter(Game.league_id == league_id)
+    header = io.StringIO()
+    csv.writer(header).writerow(CSV_HEADER)
 
-    bet_events = query.all()
+    def chunks():
+        yield header.getvalue()
+        yield from stream_bet_events(sport_id, league_id, render_csv)
 
-    # Create CSV content
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Write header
-    writer.writerow(
-        [
-            "ID",
-            "Odds",
-            "Event",
-            "Game ID",
-            "DateTime",
-            "Sport ID",
-            "League ID",
-            "Home Team",
-            "Away Team",
-        ]
+    return StreamingResponse(
+        chunks(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=bet_events.csv"},
     )
 
-    # Write data
-    for event in bet_events:
-        writer.writerow(
-            [
-                event.id,
-                event.odds,
-                event.event,
-                event.game_id,
-                event.game.datetime,
-                event.game.sport_id,
-                event.game.league_id,
-                event.game.home_team,
-                event.game.away_team,
-            ]
-        )
-
-    output.seek(0)
 
+@router.get("/export/ndjson")
+def export_bet_events_ndjson(
+    sport_id: Optional[int] = None,
+    league_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """Export bet events as newline-delimited JSON - requires authentication"""
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode("utf-8")),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=bet_events.csv"},
+        stream_bet_events(sport_id, league_id, render_ndjson),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=bet_events.ndjson"},
     )
@@ -1,18 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+import base64
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
-from app.models.coupon import Coupon
+from app.models.coupon import Coupon, CouponResult
 from app.models.bet_event import BetEvent
 from app.models.bet_event_on_coupon import BetEventOnCoupon
 from app.models.game import Game
-from app.schemas.coupon import CouponCreate, CouponResponse
-from typing import List
+from app.schemas.coupon import CouponCreate, CouponResponse, CouponSummaryResponse
+from typing import List, Optional
 
 router = APIRouter()
 
 
+def coupon_legs_loader():
+    return (
+        selectinload(Coupon.bet_events)
+        .selectinload(BetEventOnCoupon.bet_event)
+        .joinedload(BetEvent.game)
+        .options(joinedload(Game.sport), joinedload(Game.league))
+    )
+
+
 @router.post("/", response_model=CouponResponse, status_code=status.HTTP_201_CREATED)
 def create_coupon(
     coupon_data: CouponCreate,
@@ -31,7 +43,10 @@ def create_coupon(
         )
 
     bet_events = (
-        db.query(BetEvent).filter(BetEvent.id.in_(coupon_data.bet_event_ids)).all()
+        db.query(BetEvent)
+        .options(joinedload(BetEvent.game))
+        .filter(BetEvent.id.in_(coupon_data.bet_event_ids))
+        .all()
     )
 
     if len(bet_events) != len(coupon_data.bet_event_ids):
@@ -45,9 +60,8 @@ def create_coupon(
         game_dates = []
         for be in bet_events:
             total_odds *= be.odds if be.odds else 1.0
-            game = db.query(Game).filter(Game.id == be.game_id).first()
-            if game and game.datetime:
-                game_dates.append(game.datetime)
+            if be.game and be.game.datetime:
+                game_dates.append(be.game.datetime)
 
         game_dates.sort()
 
@@ -56,28 +70,31 @@ def create_coupon(
             name=coupon_data.name.strip(),
             odds=round(total_odds, 2),
             events=len(bet_events),
+            result=CouponResult.PENDING,
             first_event_date=game_dates[0] if game_dates else None,
             last_event_date=game_dates[-1] if game_dates else None,
         )
         db.add(coupon)
         db.flush()
 
+        odds_by_id = {be.id: be.odds for be in bet_events}
         for bet_event_id in coupon_data.bet_event_ids:
             bet_event_on_coupon = BetEventOnCoupon(
-                coupon_id=coupon.id, bet_event_id=bet_event_id, is_recommendation=False
+                coupon_id=coupon.id,
+                bet_event_id=bet_event_id,
+                is_recommendation=False,
+                odds=odds_by_id.get(bet_event_id),
             )
             db.add(bet_event_on_coupon)
 
         db.commit()
-        db.refresh(coupon)
 
-        coupon.bet_events = (
-            db.query(BetEventOnCoupon)
-            .filter(BetEventOnCoupon.coupon_id == coupon.id)
-            .all()
+        return (
+            db.query(Coupon)
+            .options(coupon_legs_loader())
+            .filter(Coupon.id == coupon.id)
+            .first()
         )
-
-        return coupon
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -86,37 +103,77 @@ def create_coupon(
         )
 
 
+def encode_cursor(coupon: Coupon) -> str:
+    raw = f"{coupon.created_at.isoformat()}|{coupon.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, coupon_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at), int(coupon_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def paginate_coupons(query, response: Response, limit: Optional[int], cursor: Optional[str]):
+    if cursor:
+        query = query.filter(
+            tuple_(Coupon.created_at, Coupon.id) < tuple_(*decode_cursor(cursor))
+        )
+    query = query.order_by(Coupon.created_at.desc(), Coupon.id.desc())
+    if limit is None:
+        return query.all()
+
+    coupons = query.limit(limit + 1).all()
+    if len(coupons) > limit:
+        coupons = coupons[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(coupons[-1])
+    return coupons
+
+
 @router.get("/", response_model=List[CouponResponse])
 def get_my_coupons(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
-    coupons = (
+    query = (
         db.query(Coupon)
+        .options(coupon_legs_loader())
         .filter(Coupon.user_id == current_user.id)
-        .order_by(Coupon.created_at.desc())
-        .all()
     )
+    return paginate_coupons(query, response, limit, cursor)
 
-    for coupon in coupons:
-        bet_events_on_coupon = (
-            db.query(BetEventOnCoupon)
-            .filter(BetEventOnCoupon.coupon_id == coupon.id)
-            .all()
-        )
 
-        for bet_event_on_coupon in bet_events_on_coupon:
-            bet_event = (
-                db.query(BetEvent)
-                .options(
-                    joinedload(BetEvent.game).joinedload(Game.sport),
-                    joinedload(BetEvent.game).joinedload(Game.league),
-                )
-                .filter(BetEvent.id == bet_event_on_coupon.bet_event_id)
-                .first()
+@router.get("/summary", response_model=List[CouponSummaryResponse])
+def get_my_coupons_summary(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    query = (
+        db.query(Coupon)
+        .options(
+            load_only(
+                Coupon.id,
+                Coupon.name,
+                Coupon.created_at,
+                Coupon.odds,
+                Coupon.events,
+                Coupon.result,
+                Coupon.first_event_date,
+                Coupon.last_event_date,
             )
-            if bet_event:
-                bet_event_on_coupon.bet_event = bet_event
-
-        coupon.bet_events = bet_events_on_coupon
-
-    return coupons
+        )
+        .filter(Coupon.user_id == current_user.id)
+    )
+    return paginate_coupons(query, response, limit, cursor)
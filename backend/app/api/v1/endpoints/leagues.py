@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
+from app.core.response_cache import REFERENCE, response_cache
 from app.models.league import League
 from app.schemas.league import LeagueResponse
 
@@ -9,6 +10,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[LeagueResponse])
+@response_cache.cached(REFERENCE, ttl=300, model=List[LeagueResponse])
 def get_leagues(sport_id: Optional[int] = None, db: Session = Depends(get_db)):
     """Get leagues with download=True from the database, optionally filtered by sport_id"""
     query = db.query(League).filter(League.download == True)
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from typing import List
 from app.core.database import get_db
+from app.core.response_cache import REFERENCE, response_cache
 from app.models.sport import Sport
 from app.models.league import League
 from app.schemas.sport import SportResponse
@@ -11,6 +12,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[SportResponse])
+@response_cache.cached(REFERENCE, ttl=300, model=List[SportResponse])
 def get_sports(db: Session = Depends(get_db)):
     """Get sports that have at least one league with download=True"""
     sports = (
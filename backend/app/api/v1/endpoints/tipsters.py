@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import base64
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, case
+from sqlalchemy import func, case, tuple_
 from typing import List, Optional
 from datetime import datetime, timedelta, timezone
 from app.core.database import get_db
@@ -12,6 +13,7 @@ from app.models.game import Game
 from app.models.user import User
 from app.models.user_tipster_follow import UserTipsterFollow
 from app.models.tipster_main_stats import TipsterMainStats
+from app.models.tipster_directory import TipsterDirectory
 from app.schemas.tipster import (
     TipsterCreate,
     TipsterUpdate,
@@ -27,11 +29,19 @@ from app.schemas.tipster import (
     TopPickResponse,
 )
 from app.core.security import get_current_user
+from app.core.odds_ranges import get_range_index
+from app.core.response_cache import TIPSTERS, notify_invalidation, response_cache
+from app.core.tipster_directory import (
+    adjust_directory_counts,
+    tag_search_query,
+    upsert_directory_entry,
+)
 
 router = APIRouter()
 
 
 @router.get("/leaderboard", response_model=List[TopExpertResponse])
+@response_cache.cached(TIPSTERS, ttl=300, model=List[TopExpertResponse])
 def get_top_experts(limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
     roi_expr = case(
         (TipsterMainStats.sum_stake > 0,
@@ -78,6 +88,7 @@ def get_top_experts(limit: int = Query(10, ge=1, le=50), db: Session = Depends(g
 
 
 @router.get("/top-picks", response_model=List[TopPickResponse])
+@response_cache.cached(TIPSTERS, ttl=60, model=List[TopPickResponse])
 def get_top_picks(limit: int = Query(10, ge=1, le=50), days: int = Query(3, ge=1, le=30), db: Session = Depends(get_db)):
     from app.models.game import Game as GameModel
     cutoff = datetime.now() - timedelta(days=days)
@@ -121,141 +132,119 @@ def get_top_picks(limit: int = Query(10, ge=1, le=50), days: int = Query(3, ge=1
     ]
 
 
-@router.get("/", response_model=List[TipsterPublicResponse])
-def get_all_tipsters(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    following_only: bool = Query(False),
-    tag_search: Optional[str] = Query(None),
-    sort_by: Optional[str] = Query("followers", regex="^(followers|appreciation|recommendations)$"),
-):
-    followers_subq = (
-        db.query(
-            UserTipsterFollow.tipster_id,
-            func.count(UserTipsterFollow.id).label("followers_count"),
-        )
-        .group_by(UserTipsterFollow.tipster_id)
-        .subquery()
-    )
-
-    recommendations_subq = (
-        db.query(
-            BetRecommendation.tipster_id,
-            func.count(BetRecommendation.id).label("recommendations_count"),
-        )
-        .group_by(BetRecommendation.tipster_id)
-        .subquery()
-    )
-
-    query = (
+def directory_query(db: Session):
+    return (
         db.query(
             Tipster.id,
             User.full_name,
             User.country,
-            Tipster.appreciation,
+            TipsterDirectory.appreciation,
             Tipster.description,
             Tipster.is_verified,
             Tipster.tag_1,
             Tipster.tag_2,
             Tipster.tag_3,
-            func.coalesce(followers_subq.c.followers_count, 0).label("followers_count"),
-            func.coalesce(recommendations_subq.c.recommendations_count, 0).label(
-                "recommendations_count"
-            ),
+            TipsterDirectory.followers_count,
+            TipsterDirectory.recommendations_count,
         )
+        .select_from(TipsterDirectory)
+        .join(Tipster, Tipster.id == TipsterDirectory.tipster_id)
         .join(User, User.id == Tipster.user_id)
-        .outerjoin(followers_subq, followers_subq.c.tipster_id == Tipster.id)
-        .outerjoin(
-            recommendations_subq, recommendations_subq.c.tipster_id == Tipster.id
+    )
+
+
+DIRECTORY_SORT_COLUMNS = {
+    "followers": TipsterDirectory.followers_count,
+    "appreciation": TipsterDirectory.appreciation,
+    "recommendations": TipsterDirectory.recommendations_count,
+}
+
+
+def encode_cursor(sort_value: int, tipster_id: int) -> str:
+    raw = f"{sort_value}|{tipster_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        sort_value, tipster_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
         )
+        return int(sort_value), int(tipster_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def to_public_response(row) -> TipsterPublicResponse:
+    return TipsterPublicResponse(
+        id=row.id,
+        full_name=row.full_name,
+        country=row.country,
+        appreciation=row.appreciation,
+        description=row.description,
+        is_verified=row.is_verified,
+        tag_1=row.tag_1,
+        tag_2=row.tag_2,
+        tag_3=row.tag_3,
+        followers_count=row.followers_count,
+        recommendations_count=row.recommendations_count,
     )
 
+
+@router.get("/", response_model=List[TipsterPublicResponse])
+def get_all_tipsters(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    following_only: bool = Query(False),
+    tag_search: Optional[str] = Query(None),
+    sort_by: Optional[str] = Query("followers", regex="^(followers|appreciation|recommendations)$"),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    query = directory_query(db)
+
     if following_only:
         query = query.join(
             UserTipsterFollow,
-            (UserTipsterFollow.tipster_id == Tipster.id) &
+            (UserTipsterFollow.tipster_id == TipsterDirectory.tipster_id) &
             (UserTipsterFollow.user_id == current_user.id)
         )
 
     if tag_search:
-        search_pattern = f"%{tag_search}%"
-        query = query.filter(
-            or_(
-                Tipster.tag_1.ilike(search_pattern),
-                Tipster.tag_2.ilike(search_pattern),
-                Tipster.tag_3.ilike(search_pattern),
+        search = tag_search_query(tag_search)
+        if search:
+            query = query.filter(
+                TipsterDirectory.tags_search.op("@@")(func.to_tsquery("simple", search))
             )
-        )
 
-    if sort_by == "followers":
-        query = query.order_by(func.coalesce(followers_subq.c.followers_count, 0).desc())
-    elif sort_by == "appreciation":
-        query = query.order_by(Tipster.appreciation.desc())
-    elif sort_by == "recommendations":
-        query = query.order_by(func.coalesce(recommendations_subq.c.recommendations_count, 0).desc())
+    sort_column = DIRECTORY_SORT_COLUMNS[sort_by]
+    if cursor:
+        query = query.filter(
+            tuple_(sort_column, TipsterDirectory.tipster_id) < tuple_(*decode_cursor(cursor))
+        )
+    query = query.order_by(sort_column.desc(), TipsterDirectory.tipster_id.desc())
 
-    results = query.all()
+    if limit is None:
+        return [to_public_response(row) for row in query.all()]
 
-    return [
-        TipsterPublicResponse(
-            id=row.id,
-            full_name=row.full_name,
-            country=row.country,
-            appreciation=row.appreciation,
-            description=row.description,
-            is_verified=row.is_verified,
-            tag_1=row.tag_1,
-            tag_2=row.tag_2,
-            tag_3=row.tag_3,
-            followers_count=row.followers_count,
-            recommendations_count=row.recommendations_count,
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            getattr(last, sort_column.key), last.id
         )
-        for row in results
-    ]
+    return [to_public_response(row) for row in rows]
 
 
 @router.get("/{tipster_id}", response_model=TipsterPublicResponse)
 def get_tipster_by_id(tipster_id: int, db: Session = Depends(get_db)):
-    followers_subq = (
-        db.query(
-            UserTipsterFollow.tipster_id,
-            func.count(UserTipsterFollow.id).label("followers_count"),
-        )
-        .group_by(UserTipsterFollow.tipster_id)
-        .subquery()
-    )
-
-    recommendations_subq = (
-        db.query(
-            BetRecommendation.tipster_id,
-            func.count(BetRecommendation.id).label("recommendations_count"),
-        )
-        .group_by(BetRecommendation.tipster_id)
-        .subquery()
-    )
-
     result = (
-        db.query(
-            Tipster.id,
-            User.full_name,
-            User.country,
-            Tipster.appreciation,
-            Tipster.description,
-            Tipster.is_verified,
-            Tipster.tag_1,
-            Tipster.tag_2,
-            Tipster.tag_3,
-            func.coalesce(followers_subq.c.followers_count, 0).label("followers_count"),
-            func.coalesce(recommendations_subq.c.recommendations_count, 0).label(
-                "recommendations_count"
-            ),
-        )
-        .join(User, User.id == Tipster.user_id)
-        .outerjoin(followers_subq, followers_subq.c.tipster_id == Tipster.id)
-        .outerjoin(
-            recommendations_subq, recommendations_subq.c.tipster_id == Tipster.id
-        )
-        .filter(Tipster.id == tipster_id)
+        directory_query(db)
+        .filter(TipsterDirectory.tipster_id == tipster_id)
         .first()
     )
 
@@ -265,19 +254,7 @@ def get_tipster_by_id(tipster_id: int, db: Session = Depends(get_db)):
             detail="Tipster not found"
         )
 
-    return TipsterPublicResponse(
-        id=result.id,
-        full_name=result.full_name,
-        country=result.country,
-        appreciation=result.appreciation,
-        description=result.description,
-        is_verified=result.is_verified,
-        tag_1=result.tag_1,
-        tag_2=result.tag_2,
-        tag_3=result.tag_3,
-        followers_count=result.followers_count,
-        recommendations_count=result.recommendations_count,
-    )
+    return to_public_response(result)
 
 
 @router.get("/{tipster_id}/stats", response_model=TipsterStatsResponse)
@@ -393,6 +370,7 @@ def follow_tipster(
 
     follow = UserTipsterFollow(user_id=current_user.id, tipster_id=tipster_id)
     db.add(follow)
+    adjust_directory_counts(db, tipster_id, followers=1)
     db.commit()
     return {"detail": "Followed"}
 
@@ -417,6 +395,7 @@ def unfollow_tipster(
         )
 
     db.delete(follow)
+    adjust_directory_counts(db, tipster_id, followers=-1)
     db.commit()
     return {"detail": "Unfollowed"}
 
@@ -442,6 +421,8 @@ def create_tipster(
         is_verified=False,
     )
     db.add(tipster)
+    db.flush()
+    upsert_directory_entry(db, tipster)
     db.commit()
     db.refresh(tipster)
     return tipster
@@ -480,6 +461,10 @@ def update_my_tipster(
     if tipster_data.tag_3 is not None:
         tipster.tag_3 = tipster_data.tag_3
 
+    db.flush()
+    upsert_directory_entry(db, tipster)
+    # Tags are shown on the leaderboard
+    notify_invalidation(db, TIPSTERS)
     db.commit()
     db.refresh(tipster)
     return tipster
@@ -629,8 +614,11 @@ def create_recommendation(
         tipster_tier_id=recommendation_data.tipster_tier_id,
         tipster_description=recommendation_data.tipster_description,
         stake=recommendation_data.stake,
+        odds=bet_event.odds,
+        range_id=get_range_index(db).find(bet_event.odds),
     )
     db.add(recommendation)
+    adjust_directory_counts(db, tipster.id, recommendations=1)
     db.commit()
     db.refresh(recommendation)
 
@@ -753,6 +741,7 @@ def delete_recommendation(
         )
 
     db.delete(recommendation)
+    adjust_directory_counts(db, tipster.id, recommendations=-1)
     db.commit()
 
     return {"detail": "Recommendation deleted successfully"}
@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.models.bet_event import BetEvent
+from app.models.game import Game
+
+POOL_TTL_SECONDS = 60
+# Random probes per requested event before falling back to a linear pass
+PROBES_PER_PICK = 8
+
+# (odds, bet_event_id, game datetime), sorted by odds
+Candidate = Tuple[float, int, datetime]
+
+
+class BetEventPool:
+    """
+    Upcoming bet events, bucketed by (sport_id, league_id) with None as a
+    wildcard and sorted by odds, so a random sample costs O(limit) instead of
+    sorting every candidate with ORDER BY random().
+    """
+
+    def __init__(self, rows, built_at: datetime):
+        self.built_at = built_at
+        self.loaded_at = time.monotonic()
+        buckets: Dict[Tuple[Optional[int], Optional[int]], List[Candidate]] = defaultdict(list)
+        for bet_event_id, odds, game_datetime, sport_id, league_id in rows:
+            candidate = (odds, bet_event_id, game_datetime)
+            for key in ((None, None), (sport_id, None), (None, league_id), (sport_id, league_id)):
+                buckets[key].append(candidate)
+        self.buckets = {key: sorted(bucket) for key, bucket in buckets.items()}
+        self.odds = {key: [c[0] for c in bucket] for key, bucket in self.buckets.items()}
+
+    @classmethod
+    def load(cls, db) -> "BetEventPool":
+        built_at = datetime.now()
+        rows = (
+            db.query(BetEvent.id, BetEvent.odds, Game.datetime, Game.sport_id, Game.league_id)
+            .join(Game)
+            .filter(Game.datetime > built_at)
+            .all()
+        )
+        return cls(rows, built_at)
+
+    def __len__(self) -> int:
+        return len(self.buckets.get((None, None), []))
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self.loaded_at > POOL_TTL_SECONDS
+
+    def covers(self, from_datetime: Optional[datetime], to_datetime: Optional[datetime]) -> bool:
+        # Only upcoming games are pooled, so windows reaching back past the
+        # build time (or open-ended into the past) need the database
+        if from_datetime is None:
+            return to_datetime is None
+        return from_datetime >= self.built_at
+
+    def sample(
+        self,
+        limit: int,
+        sport_id: Optional[int] = None,
+        league_id: Optional[int] = None,
+        min_odds: Optional[float] = None,
+        max_odds: Optional[float] = None,
+        from_datetime: Optional[datetime] = None,
+        to_datetime: Optional[datetime] = None,
+        exclude_ids: Optional[Set[int]] = None,
+    ) -> List[int]:
+        key = (sport_id, league_id)
+        bucket = self.buckets.get(key, [])
+        odds = self.odds.get(key, [])
+        lo = 0 if min_odds is None else bisect_left(odds, min_odds)
+        hi = len(odds) if max_odds is None else bisect_right(odds, max_odds)
+        if limit <= 0 or lo >= hi:
+            return []
+
+        start = from_datetime or datetime.now()
+        exclude_ids = exclude_ids or set()
+
+        def accepted(i: int) -> bool:
+            _, bet_event_id, game_datetime = bucket[i]
+            return (
+                (game_datetime >= start if from_datetime else game_datetime > start)
+                and (to_datetime is None or game_datetime <= to_datetime)
+                and bet_event_id not in exclude_ids
+            )
+
+        picked: List[int] = []
+        seen: Set[int] = set()
+        for _ in range(limit * PROBES_PER_PICK):
+            if len(picked) == limit or len(seen) == hi - lo:
+                return picked
+            i = random.randrange(lo, hi)
+            if i in seen:
+                continue
+            seen.add(i)
+            if accepted(i):
+                picked.append(bucket[i][1])
+
+        # Filters rejected most probes, so pick from what is left directly
+        rest = [i for i in range(lo, hi) if i not in seen and accepted(i)]
+        picked.extend(bucket[i][1] for i in random.sample(rest, min(limit - len(picked), len(rest))))
+        return picked
+
+
+_pool: Optional[BetEventPool] = None
+_lock = threading.Lock()
+
+
+def get_bet_event_pool(db) -> BetEventPool:
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = BetEventPool.load(db)
+    elif _pool.is_stale() and _lock.acquire(blocking=False):
+        # One request rebuilds; the others keep sampling the previous pool
+        try:
+            _pool = BetEventPool.load(db)
+        finally:
+            _lock.release()
+    return _pool
+
+
+def invalidate_bet_event_pool():
+    global _pool
+    with _lock:
+        _pool = None
@@ -40,6 +40,10 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     COOKIE_DOMAIN: str = ""
 
+    # Response cache: empty for the in-process LRU, or a redis:// URL
+    RESPONSE_CACHE_URL: str = ""
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+
     # External API Configuration
     ODDS_API_BASE_URL: str = "https://api.the-odds-api.com/v4"
     ODDS_API_KEY: str
@@ -0,0 +1,65 @@
+import threading
+import time
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+from app.models.tipster_ranges import TipsterRange
+
+# Ranges are edited directly in the database, so running processes pick up
+# changes by reloading
+RANGE_INDEX_TTL_SECONDS = 300
+
+
+class OddsRangeIndex:
+    def __init__(self, ranges: List[Tuple[int, float, float]]):
+        ranges = sorted(ranges, key=lambda r: (r[1], r[2]))
+        self.ids = [range_id for range_id, _, _ in ranges]
+        self.starts = [range_start for _, range_start, _ in ranges]
+        self.ends = [range_end for _, _, range_end in ranges]
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, db) -> "OddsRangeIndex":
+        return cls(
+            db.query(
+                TipsterRange.id, TipsterRange.range_start, TipsterRange.range_end
+            ).all()
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self.loaded_at > RANGE_INDEX_TTL_SECONDS
+
+    def find(self, odds) -> Optional[int]:
+        if odds is None:
+            return None
+        odds = float(odds)
+        i = bisect_right(self.starts, odds) - 1
+        # Bounds are inclusive, so odds sitting on a shared boundary belong to
+        # the lower range, matching range_start ordering in SQL lookups.
+        if i > 0 and self.ends[i - 1] >= odds:
+            return self.ids[i - 1]
+        if i >= 0 and self.ends[i] >= odds:
+            return self.ids[i]
+        return None
+
+
+_index: Optional[OddsRangeIndex] = None
+_lock = threading.Lock()
+
+
+def get_range_index(db) -> OddsRangeIndex:
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = OddsRangeIndex.load(db)
+    elif _index.is_stale() and _lock.acquire(blocking=False):
+        # One caller reloads; the others keep using the previous index
+        try:
+            _index = OddsRangeIndex.load(db)
+        finally:
+            _lock.release()
+    return _index
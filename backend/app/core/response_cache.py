@@ -0,0 +1,235 @@
+import functools
+import logging
+import select
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Namespaces invalidated together
+REFERENCE = "reference"  # sports and leagues
+TIPSTERS = "tipsters"  # leaderboard and top picks
+BET_EVENTS = "bet_events"  # upcoming bet event pool
+
+# Postgres channel carrying invalidations from ingestion and settlement
+INVALIDATION_CHANNEL = "response_cache"
+LISTEN_POLL_SECONDS = 5
+LISTEN_RETRY_SECONDS = 10
+
+# Namespace -> other in-process caches dropped when it is invalidated
+_callbacks: Dict[str, List[Callable[[], None]]] = defaultdict(list)
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry expiry."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, namespace: str) -> int:
+        return self._generations[namespace]
+
+    def bump(self, namespace: str):
+        with self._lock:
+            self._generations[namespace] += 1
+            prefix = f"{namespace}:"
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+class RedisBackend:
+    """
+    Shared cache on any client with redis-py's get/set(ex=)/incr, so a local
+    stand-in such as fakeredis can replace the server. Entries of a namespace
+    are dropped at once by bumping its generation, which is part of the key.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "parlay:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_URL points at Redis but the redis package is not installed")
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: int):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def generation(self, namespace: str) -> int:
+        return int(self.client.get(f"{self.prefix}generation:{namespace}") or 0)
+
+    def bump(self, namespace: str):
+        self.client.incr(f"{self.prefix}generation:{namespace}")
+
+
+def build_backend(url: str):
+    if not url or url.startswith("memory://"):
+        return MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend.from_url(url)
+    raise ValueError(f"Unsupported RESPONSE_CACHE_URL: {url}")
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._stats_lock = threading.Lock()
+
+    def use_backend(self, backend):
+        self.backend = backend
+
+    def _count(self, route: str, outcome: str):
+        with self._stats_lock:
+            self._stats[route][outcome] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            routes = {
+                route: {
+                    **counts,
+                    "hit_rate": round(counts["hits"] / max(counts["hits"] + counts["misses"], 1), 4),
+                }
+                for route, counts in self._stats.items()
+            }
+        return {"backend": self.backend.name, "routes": routes}
+
+    def cached(self, namespace: str, ttl: int, model):
+        """
+        Cache a GET endpoint's JSON body for ttl seconds, keyed by its query
+        and path parameters. model is the route's response_model, used to
+        serialize the result once on a miss.
+        """
+        adapter = TypeAdapter(model)
+
+        def decorator(endpoint):
+            route = endpoint.__name__
+
+            @functools.wraps(endpoint)
+            def wrapper(*args, **kwargs):
+                params = sorted(
+                    (name, value)
+                    for name, value in kwargs.items()
+                    if not isinstance(value, Session)
+                )
+                try:
+                    generation = self.backend.generation(namespace)
+                    key = f"{namespace}:{generation}:{route}:{params!r}"
+                    body = self.backend.get(key)
+                except Exception as e:
+                    logger.warning(f"Response cache unavailable: {str(e)}")
+                    key, body = None, None
+
+                if body is not None:
+                    self._count(route, "hits")
+                    return Response(body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+                self._count(route, "misses")
+                body = adapter.dump_json(adapter.validate_python(endpoint(*args, **kwargs))).decode()
+                if key is not None:
+                    try:
+                        self.backend.set(key, body, ttl)
+                    except Exception as e:
+                        logger.warning(f"Response cache unavailable: {str(e)}")
+                return Response(body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            self.backend.bump(namespace)
+
+
+response_cache = ResponseCache(build_backend(settings.RESPONSE_CACHE_URL))
+
+
+def notify_invalidation(db, *namespaces: str):
+    """
+    Queue invalidation of namespaces in every API process. The notification
+    is part of db's transaction and is delivered when it commits.
+    """
+    for namespace in namespaces:
+        db.execute(func.pg_notify(INVALIDATION_CHANNEL, namespace).select())
+
+
+def on_invalidation(namespace: str, callback: Callable[[], None]):
+    _callbacks[namespace].append(callback)
+
+
+def _listen(engine, stop: threading.Event):
+    while not stop.is_set():
+        connection = None
+        try:
+            connection = engine.raw_connection()
+            connection.driver_connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute(f"LISTEN {INVALIDATION_CHANNEL}")
+            pg = connection.driver_connection
+            while not stop.is_set():
+                if select.select([pg], [], [], LISTEN_POLL_SECONDS) == ([], [], []):
+                    continue
+                pg.poll()
+                namespaces = {notify.payload for notify in pg.notifies}
+                pg.notifies.clear()
+                response_cache.invalidate(*namespaces)
+                for namespace in namespaces:
+                    for callback in _callbacks[namespace]:
+                        callback()
+                logger.info(f"Response cache invalidated: {', '.join(sorted(namespaces))}")
+        except Exception as e:
+            logger.warning(f"Response cache listener error, retrying: {str(e)}")
+            stop.wait(LISTEN_RETRY_SECONDS)
+        finally:
+            if connection is not None:
+                connection.invalidate()
+
+
+def start_invalidation_listener(engine) -> threading.Event:
+    stop = threading.Event()
+    threading.Thread(target=_listen, args=(engine, stop), name="response-cache-listener", daemon=True).start()
+    return stop
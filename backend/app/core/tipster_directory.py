@@ -0,0 +1,101 @@
+import re
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.bet_recommendation import BetRecommendation
+from app.models.tipster import Tipster
+from app.models.tipster_directory import TipsterDirectory
+from app.models.user_tipster_follow import UserTipsterFollow
+
+TAG_SEPARATOR = "\n"
+_SEARCH_TERM = re.compile(r"\w+")
+
+
+def directory_tags(tipster: Tipster) -> str:
+    return TAG_SEPARATOR.join(tag for tag in (tipster.tag_1, tipster.tag_2, tipster.tag_3) if tag)
+
+
+def tag_search_query(search: str) -> Optional[str]:
+    """
+    Prefix tsquery matching every word of search, or None when it has no
+    words. User input never reaches to_tsquery unescaped.
+    """
+    terms = _SEARCH_TERM.findall(search.lower())
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def upsert_directory_entry(db, tipster: Tipster):
+    """Sync the tipster's own columns; counts are left as they are."""
+    values = {
+        "tipster_id": tipster.id,
+        "appreciation": tipster.appreciation,
+        "tags": directory_tags(tipster),
+    }
+    stmt = insert(TipsterDirectory).values(**values, followers_count=0, recommendations_count=0)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[TipsterDirectory.tipster_id],
+            set_={"appreciation": stmt.excluded.appreciation, "tags": stmt.excluded.tags},
+        )
+    )
+
+
+def adjust_directory_counts(db, tipster_id: int, followers: int = 0, recommendations: int = 0):
+    # Relative update so concurrent follows of the same tipster do not race
+    db.query(TipsterDirectory).filter(TipsterDirectory.tipster_id == tipster_id).update(
+        {
+            TipsterDirectory.followers_count: TipsterDirectory.followers_count + followers,
+            TipsterDirectory.recommendations_count: TipsterDirectory.recommendations_count + recommendations,
+        },
+        synchronize_session=False,
+    )
+
+
+def refresh_tipster_directory(db) -> int:
+    """
+    Recompute every directory row from tipsters, follows and recommendations.
+    Used after bulk writes that bypass the endpoints, e.g. cascading deletes
+    of old games or seed scripts.
+    """
+    followers = (
+        select(func.count(UserTipsterFollow.id))
+        .where(UserTipsterFollow.tipster_id == Tipster.id)
+        .scalar_subquery()
+    )
+    recommendations = (
+        select(func.count(BetRecommendation.id))
+        .where(BetRecommendation.tipster_id == Tipster.id)
+        .scalar_subquery()
+    )
+    source = select(
+        Tipster.id,
+        Tipster.appreciation,
+        followers,
+        recommendations,
+        func.concat_ws(TAG_SEPARATOR, Tipster.tag_1, Tipster.tag_2, Tipster.tag_3),
+    )
+    stmt = insert(TipsterDirectory).from_select(
+        ["tipster_id", "appreciation", "followers_count", "recommendations_count", "tags"],
+        source,
+    )
+    result = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[TipsterDirectory.tipster_id],
+            set_={
+                name: getattr(stmt.excluded, name)
+                for name in ("appreciation", "followers_count", "recommendations_count", "tags")
+            },
+            # Leave rows that are already correct untouched
+            where=(
+                TipsterDirectory.appreciation.is_distinct_from(stmt.excluded.appreciation)
+                | TipsterDirectory.followers_count.is_distinct_from(stmt.excluded.followers_count)
+                | TipsterDirectory.recommendations_count.is_distinct_from(stmt.excluded.recommendations_count)
+                | TipsterDirectory.tags.is_distinct_from(stmt.excluded.tags)
+            ),
+        )
+    )
+    return result.rowcount
@@ -2,6 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.database import engine
+from app.core.bet_event_pool import invalidate_bet_event_pool
+from app.core.response_cache import (
+    BET_EVENTS,
+    on_invalidation,
+    start_invalidation_listener,
+)
 from app.models import (
     User,
     BetEvent,
@@ -33,11 +40,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
+    expose_headers=["X-Next-Cursor", "X-Cache"],
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.on_event("startup")
+def listen_for_cache_invalidation():
+    on_invalidation(BET_EVENTS, invalidate_bet_event_pool)
+    start_invalidation_listener(engine)
+
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Parlay App API"}
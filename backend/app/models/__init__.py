@@ -1,4 +1,5 @@
 from app.models.bet_event import BetEvent
+from app.models.bet_event_odds_history import BetEventOddsHistory
 from app.models.sport import Sport
 from app.models.league import League
 from app.models.user import User
@@ -10,6 +11,7 @@ from app.models.tipster_main_stats import TipsterMainStats
 from app.models.tipster_tier_stats import TipsterTierStats
 from app.models.tipster_main_range_stats import TipsterMainRangeStats
 from app.models.tipster_tiers_range_stats import TipsterTiersRangeStats
+from app.models.tipster_directory import TipsterDirectory
 from app.models.game import Game
 from app.models.subscription_plan import SubscriptionPlan
 from app.models.user_subscription import UserSubscription
@@ -25,9 +27,11 @@ from app.models.philip_snat_shl_game import PhilipSnatShlGame
 from app.models.philip_snat_nl_game import PhilipSnatNlGame
 from app.models.philip_snat_league import PhilipSnatLeague
 from app.models.philip_snat_ai_model import PhilipSnatAiModel
+from app.models.philip_snat_team_snapshot import PhilipSnatTeamSnapshot
 
 __all__ = [
     "BetEvent",
+    "BetEventOddsHistory",
     "Sport",
     "League",
     "User",
@@ -39,6 +43,7 @@ __all__ = [
     "TipsterTierStats",
     "TipsterMainRangeStats",
     "TipsterTiersRangeStats",
+    "TipsterDirectory",
     "Game",
     "SubscriptionPlan",
     "UserSubscription",
@@ -54,4 +59,5 @@ __all__ = [
     "PhilipSnatNlGame",
     "PhilipSnatLeague",
     "PhilipSnatAiModel",
+    "PhilipSnatTeamSnapshot",
 ]
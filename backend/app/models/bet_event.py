@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey, Enum, Boolean
+from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey, Enum, Boolean, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import enum
@@ -14,11 +14,19 @@ class BetResult(enum.Enum):
 
 class BetEvent(Base):
     __tablename__ = "bet_events"
+    __table_args__ = (
+        UniqueConstraint("odds_api_id", name="uq_bet_events_odds_api_id"),
+        Index(
+            "ix_bet_events_unsettled_game_id",
+            "game_id",
+            postgresql_where=text("result IS NULL OR result IN ('TO_RESOLVE', 'UNKNOWN')"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
     odds = Column(Float, nullable=False)
-    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), nullable=False, index=True)
     event = Column(String, nullable=False)
     result = Column(Enum(BetResult), nullable=True)
     odds_api_id = Column(String, nullable=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class BetEventOddsHistory(Base):
+    __tablename__ = "bet_event_odds_history"
+    __table_args__ = (
+        Index("ix_bet_event_odds_history_event_time", "bet_event_id", "recorded_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    bet_event_id = Column(
+        Integer, ForeignKey("bet_events.id", ondelete="CASCADE"), nullable=False
+    )
+    odds = Column(Float, nullable=False)
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
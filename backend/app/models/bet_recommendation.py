@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, String, Numeric, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, String, Numeric, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -11,11 +11,14 @@ class BetRecommendation(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    bet_event_id = Column(Integer, ForeignKey("bet_events.id", ondelete="CASCADE"), nullable=False)
+    bet_event_id = Column(Integer, ForeignKey("bet_events.id", ondelete="CASCADE"), nullable=False, index=True)
     tipster_id = Column(Integer, ForeignKey("tipsters.id"), nullable=False)
     tipster_tier_id = Column(Integer, ForeignKey("tipster_tiers.id"), nullable=True)
     tipster_description = Column(String(1000), nullable=True)
     stake = Column(Numeric(10, 2), nullable=True)
+    # Price at the time of the pick; bet_events.odds is repriced by ingestion
+    odds = Column(Float, nullable=True)
+    range_id = Column(Integer, ForeignKey("tipster_ranges.id", ondelete="SET NULL"), nullable=True, index=True)
 
     # Relationships
     tipster_tier = relationship("TipsterTier", back_populates="bet_recommendations")
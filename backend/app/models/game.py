@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey, Enum, Boolean
+from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey, Enum, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import enum
@@ -16,10 +16,15 @@ class GameWinner(enum.Enum):
 
 class Game(Base):
     __tablename__ = "games"
+    __table_args__ = (
+        UniqueConstraint("odds_api_id", name="uq_games_odds_api_id"),
+        Index("ix_games_sport_league_datetime", "sport_id", "league_id", "datetime"),
+        Index("ix_games_league_datetime", "league_id", "datetime"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
-    datetime = Column(DateTime, nullable=False)
+    datetime = Column(DateTime, nullable=False, index=True)
     sport_id = Column(Integer, ForeignKey("sports.id"), nullable=False)
     league_id = Column(Integer, ForeignKey("leagues.id"), nullable=False)
     home_team = Column(String, nullable=False)
@@ -31,6 +36,7 @@ class Game(Base):
     away_team_score = Column(Integer, nullable=True)
     overtime = Column(Boolean, nullable=True)
     shootout = Column(Boolean, nullable=True)
+    odds_hash = Column(String(64), nullable=True)
 
     # Relationships
     sport = relationship("Sport", back_populates="games")
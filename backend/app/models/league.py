@@ -1,14 +1,17 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 
 class League(Base):
     __tablename__ = "leagues"
+    __table_args__ = (
+        Index("ix_leagues_download_sport_id", "sport_id", postgresql_where=text("download")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sport_id = Column(Integer, ForeignKey("sports.id"), nullable=False)
-    odds_api_id = Column(String, nullable=False)
+    odds_api_id = Column(String, nullable=False, index=True)
     name = Column(String, nullable=False)
     country_code = Column(String, nullable=False)
     download = Column(Boolean, nullable=False, default=False)
@@ -15,5 +15,7 @@ class PhilipSnatAiModel(Base):
     )
     name = Column(String(100), nullable=False)
     last_update = Column(DateTime(timezone=True), nullable=True)
+    version = Column(String(64), nullable=True)
+    artifact_path = Column(String(500), nullable=True)
 
     league = relationship("PhilipSnatLeague", backref="ai_models")
@@ -61,3 +61,7 @@ class PhilipSnatKhlGame(Base):
     hom_score_no_ot = Column(Float, nullable=True)
     prediction_winner = Column(Float, nullable=True)
     prediction_goals = Column(JSON, nullable=True)
+    prediction_home_goals = Column(JSON, nullable=True)
+    prediction_away_goals = Column(JSON, nullable=True)
+    prediction_hash = Column(String(40), nullable=True)
+    prediction_model_version = Column(String(64), nullable=True)
@@ -0,0 +1,32 @@
+from sqlalchemy import (
+    JSON,
+    Column,
+    Date,
+    DateTime,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
+from app.core.database import Base
+
+
+class PhilipSnatTeamSnapshot(Base):
+    __tablename__ = "philip_snat_team_snapshots"
+    __table_args__ = (
+        UniqueConstraint(
+            "league", "team", "snapshot_date", name="uq_philip_snat_team_snapshot"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    league = Column(String(100), nullable=False)
+    team = Column(String(100), nullable=False)
+    snapshot_date = Column(Date, nullable=False)
+    features = Column(JSON, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -8,7 +8,7 @@ class Tipster(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     appreciation = Column(Integer, nullable=False)
     description = Column(Text, nullable=True)
     is_verified = Column(Boolean, default=False, nullable=False)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, ForeignKey, Text, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from app.core.database import Base
+
+
+class TipsterDirectory(Base):
+    """
+    Denormalized listing row per tipster. Counts are adjusted by the follow
+    and recommendation endpoints and recomputed by refresh_tipster_directory.
+    """
+
+    __tablename__ = "tipster_directory"
+    __table_args__ = (
+        Index("ix_tipster_directory_followers", "followers_count", "tipster_id"),
+        Index("ix_tipster_directory_recommendations", "recommendations_count", "tipster_id"),
+        Index("ix_tipster_directory_appreciation", "appreciation", "tipster_id"),
+        Index("ix_tipster_directory_tags_search", "tags_search", postgresql_using="gin"),
+    )
+
+    tipster_id = Column(Integer, ForeignKey("tipsters.id", ondelete="CASCADE"), primary_key=True)
+    appreciation = Column(Integer, nullable=False, default=0)
+    followers_count = Column(Integer, nullable=False, default=0)
+    recommendations_count = Column(Integer, nullable=False, default=0)
+    # tag_1..tag_3, newline separated
+    tags = Column(Text, nullable=False, default="")
+    tags_search = Column(TSVECTOR, Computed("to_tsvector('simple', tags)", persisted=True))
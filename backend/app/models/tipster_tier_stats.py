@@ -21,9 +21,9 @@ class TipsterTierStats(Base):
         index=True,
     )
     total_picks = Column(Integer, nullable=False, default=0)
-    total_return = Column(Integer, nullable=False, default=0)
+    total_return = Column(Float, nullable=False, default=0.0)
     total_picks_won = Column(Integer, nullable=False, default=0)
-    sum_odds = Column(Integer, nullable=False, default=0)
+    sum_odds = Column(Float, nullable=False, default=0.0)
     sum_stake = Column(Float, nullable=False, default=0.0)
     picks_with_description = Column(Integer, nullable=False, default=0)
 
@@ -22,6 +22,20 @@ class BetEventOnCouponResponse(BaseModel):
         from_attributes = True
 
 
+class CouponSummaryResponse(BaseModel):
+    id: int
+    name: str
+    created_at: datetime
+    odds: Optional[float] = None
+    events: Optional[int] = None
+    result: Optional[CouponResult] = None
+    first_event_date: Optional[datetime] = None
+    last_event_date: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class CouponResponse(BaseModel):
     id: int
     user_id: int
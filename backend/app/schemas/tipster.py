@@ -190,6 +190,7 @@ class BetRecommendationResponse(BaseModel):
     tipster_tier_id: Optional[int] = None
     tipster_description: Optional[str] = None
     stake: Optional[Decimal] = None
+    range_id: Optional[int] = None
     bet_event: Optional[BetEventResponse] = None
     tipster_tier: Optional[TipsterTierBasic] = None
 
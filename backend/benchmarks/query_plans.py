@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for the hot API and ingestion lookups.
+
+Seeds a synthetic dataset (a few years of finished games plus two weeks of
+upcoming ones, their bet events, tipsters, recommendations and the tipster
+directory) into the configured Postgres, runs EXPLAIN ANALYZE for each
+endpoint's query and fails when a plan falls back to a sequential scan on a
+table that query is expected to reach through an index. Everything runs in
+one transaction that is rolled back, so the database is left as it was:
+
+    python3 benchmarks/query_plans.py [--games 50000] [--events-per-game 8]
+        [--random-page-cost 1.1]
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.api.v1.endpoints.bet_events import upcoming_bet_events_query
+from app.api.v1.endpoints.tipsters import DIRECTORY_SORT_COLUMNS, directory_query
+from app.core.database import SessionLocal
+from app.core.tipster_directory import refresh_tipster_directory, tag_search_query
+from app.models.bet_event import BetEvent, BetResult
+from app.models.bet_event_on_coupon import BetEventOnCoupon
+from app.models.bet_recommendation import BetRecommendation
+from app.models.game import Game
+from app.models.league import League
+from app.models.tipster import Tipster
+from app.models.tipster_directory import TipsterDirectory
+
+logger = logging.getLogger(__name__)
+
+BENCH_PREFIX = "bench-"
+DEFAULT_GAMES = 50000
+DEFAULT_EVENTS_PER_GAME = 8
+SPORTS = 8
+LEAGUES = 2000
+USERS = 20000
+TIPSTERS = 2000
+RECOMMENDATIONS = 50000
+HISTORY_DAYS = 3 * 365
+UPCOMING_DAYS = 14
+# Matches the db service in docker-compose.yml (SSD-backed storage)
+RANDOM_PAGE_COST = 1.1
+# Page size requested by the paginated listing cases
+PAGE_LIMIT = 50
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    name: str
+    # Tables that must be reached through an index
+    indexed_tables: Tuple[str, ...]
+    build: Callable
+
+
+SEEDED_TABLES = (
+    "sports",
+    "leagues",
+    "games",
+    "bet_events",
+    "users",
+    "tipsters",
+    "bet_recommendations",
+)
+
+
+def _advance_sequences(db) -> None:
+    # Rows imported with explicit ids can leave a sequence behind its table
+    for table in SEEDED_TABLES:
+        sequence = db.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}
+        ).scalar()
+        db.execute(
+            text(
+                f"SELECT setval('{sequence}', max(id)) FROM {table} "
+                f"HAVING max(id) >= (SELECT last_value FROM {sequence})"
+            )
+        )
+
+
+def seed(db, games: int, events_per_game: int) -> None:
+    _advance_sequences(db)
+    params = {
+        "prefix": BENCH_PREFIX,
+        "sports": SPORTS,
+        "leagues": LEAGUES,
+        "games": games,
+        "events": events_per_game,
+        "users": USERS,
+        "tipsters": TIPSTERS,
+        "recommendations": RECOMMENDATIONS,
+        "history": HISTORY_DAYS,
+        "upcoming": UPCOMING_DAYS,
+    }
+    statements = [
+        "SELECT setseed(0.42)",
+        """
+        INSERT INTO sports (name, odds_api_id)
+        SELECT 'Sport ' || i, :prefix || 's-' || i FROM generate_series(1, :sports) i
+        """,
+        """
+        INSERT INTO leagues (sport_id, odds_api_id, name, country_code, download)
+        SELECT s.id, :prefix || 'l-' || i, 'League ' || i, 'XX', i % 10 = 0
+        FROM generate_series(1, :leagues) i
+        JOIN (
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS n
+            FROM sports WHERE odds_api_id LIKE :prefix || 's-%'
+        ) s ON s.n = i % :sports
+        """,
+        # Games are skewed towards the first leagues, like real coverage, and
+        # stored in kickoff order as ingestion inserts them
+        """
+        INSERT INTO games (datetime, sport_id, league_id, home_team, away_team, odds_api_id)
+        SELECT
+            now()::timestamp
+                - make_interval(days => :history)
+                + random() * make_interval(days => :history + :upcoming),
+            l.sport_id, l.id, 'Home ' || g.i, 'Away ' || g.i, :prefix || 'g-' || g.i
+        FROM (
+            SELECT i, floor(:leagues * power(random(), 2))::int AS n
+            FROM generate_series(1, :games) i
+        ) g
+        JOIN (
+            SELECT id, sport_id, row_number() OVER (ORDER BY id) - 1 AS n
+            FROM leagues WHERE odds_api_id LIKE :prefix || 'l-%'
+        ) l ON l.n = g.n
+        ORDER BY 1
+        """,
+        """
+        INSERT INTO bet_events (odds, game_id, event, result, odds_api_id)
+        SELECT
+            round((1.05 + random() * 5)::numeric, 2),
+            g.id,
+            'Market ' || e,
+            CASE
+                WHEN g.datetime > now() THEN NULL
+                WHEN random() < 0.5 THEN 'WIN'::betresult
+                ELSE 'LOOSE'::betresult
+            END,
+            g.odds_api_id || '-' || e
+        FROM games g, generate_series(1, :events) e
+        WHERE g.odds_api_id LIKE :prefix || 'g-%'
+        """,
+        """
+        INSERT INTO users (email, hashed_password, full_name, is_active, is_admin)
+        SELECT :prefix || i || '@example.com', 'x', 'User ' || i, true, false
+        FROM generate_series(1, :users) i
+        """,
+        """
+        INSERT INTO tipsters (user_id, appreciation, is_verified, tag_1, tag_2)
+        SELECT id, 0, false, 'Tag' || id % 500, 'Style' || id % 7 FROM users
+        WHERE email LIKE :prefix || '%' ORDER BY id LIMIT :tipsters
+        """,
+        """
+        INSERT INTO bet_recommendations (bet_event_id, tipster_id)
+        SELECT DISTINCT ON (be.id, t.id) be.id, t.id
+        FROM (
+            SELECT id, row_number() OVER (ORDER BY random()) AS n
+            FROM bet_events WHERE odds_api_id LIKE :prefix || '%'
+        ) be
+        JOIN (
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS n
+            FROM tipsters WHERE user_id IN (
+                SELECT id FROM users WHERE email LIKE :prefix || '%'
+            )
+        ) t ON t.n = be.n % :tipsters
+        WHERE be.n <= :recommendations
+        """,
+        f"ANALYZE {', '.join(SEEDED_TABLES)}",
+    ]
+    for statement in statements:
+        db.execute(text(statement), params)
+    refresh_tipster_directory(db)
+    db.execute(text(f"ANALYZE {TipsterDirectory.__tablename__}"))
+
+
+def sample(db) -> Dict:
+    game = (
+        db.query(Game)
+        .filter(Game.odds_api_id.like(f"{BENCH_PREFIX}g-%"))
+        .filter(Game.datetime > datetime.datetime.now())
+        .order_by(Game.id)
+        .first()
+    )
+    tipster = (
+        db.query(Tipster)
+        .join(BetRecommendation, BetRecommendation.tipster_id == Tipster.id)
+        .filter(
+            BetRecommendation.bet_event_id.in_(
+                db.query(BetEvent.id).filter(
+                    BetEvent.odds_api_id.like(f"{BENCH_PREFIX}%")
+                )
+            )
+        )
+        .order_by(Tipster.id)
+        .first()
+    )
+    event_api_ids = [
+        api_id
+        for (api_id,) in db.query(BetEvent.odds_api_id)
+        .filter(BetEvent.game_id == game.id)
+        .limit(5)
+    ]
+    event_ids = [
+        event_id
+        for (event_id,) in db.query(BetRecommendation.bet_event_id)
+        .filter(BetRecommendation.tipster_id == tipster.id)
+        .limit(50)
+    ]
+    return {
+        "now": datetime.datetime.now(),
+        "game": game,
+        "tipster": tipster,
+        "event_api_ids": event_api_ids,
+        "event_ids": event_ids,
+    }
+
+
+def _with_game(query):
+    return query.options(
+        joinedload(BetEvent.game).joinedload(Game.sport),
+        joinedload(BetEvent.game).joinedload(Game.league),
+    )
+
+
+def _upcoming_events_page(db, sport_id=None, league_id=None):
+    # First page as paginate_bet_events requests it
+    return (
+        upcoming_bet_events_query(db, sport_id, league_id)
+        .order_by(Game.datetime.asc(), BetEvent.id.asc())
+        .limit(PAGE_LIMIT + 1)
+    )
+
+
+def _settlement_watch(db, s):
+    referenced_event_ids = (
+        db.query(BetEventOnCoupon.bet_event_id)
+        .union(db.query(BetRecommendation.bet_event_id))
+        .subquery()
+    )
+    return (
+        db.query(Game.odds_api_id)
+        .join(BetEvent)
+        .filter(Game.datetime < s["now"] + datetime.timedelta(minutes=180))
+        .filter(Game.odds_api_id.isnot(None))
+        .filter(BetEvent.id.in_(referenced_event_ids))
+        .filter(
+            or_(
+                BetEvent.result.in_([BetResult.TO_RESOLVE, BetResult.UNKNOWN]),
+                BetEvent.result.is_(None),
+            )
+        )
+        .distinct()
+    )
+
+
+def _tipster_directory_page(db, sort_by="followers", tag_search=None):
+    # Same filter and ordering as GET /tipsters
+    query = directory_query(db)
+    if tag_search:
+        query = query.filter(
+            TipsterDirectory.tags_search.op("@@")(
+                func.to_tsquery("simple", tag_search_query(tag_search))
+            )
+        )
+    sort_column = DIRECTORY_SORT_COLUMNS[sort_by]
+    return query.order_by(
+        sort_column.desc(), TipsterDirectory.tipster_id.desc()
+    ).limit(PAGE_LIMIT + 1)
+
+
+def _tipster_recommendations(db, s):
+    return (
+        db.query(BetRecommendation)
+        .join(BetRecommendation.bet_event)
+        .join(BetEvent.game)
+        .filter(BetRecommendation.tipster_id == s["tipster"].id)
+        .order_by(Game.datetime.asc())
+    )
+
+
+PLAN_CASES: List[PlanCase] = [
+    PlanCase(
+        "GET /bet-events?limit",
+        ("games", "bet_events"),
+        lambda db, s: _upcoming_events_page(db),
+    ),
+    PlanCase(
+        "GET /bet-events/filter?sport_id&league_id&limit",
+        ("games", "bet_events"),
+        lambda db, s: _upcoming_events_page(
+            db, sport_id=s["game"].sport_id, league_id=s["game"].league_id
+        ),
+    ),
+    PlanCase(
+        "GET /bet-events/filter?league_id&limit",
+        ("games", "bet_events"),
+        lambda db, s: _upcoming_events_page(db, league_id=s["game"].league_id),
+    ),
+    PlanCase(
+        "GET /bet-events/filter?sport_id&limit",
+        ("games", "bet_events"),
+        lambda db, s: _upcoming_events_page(db, sport_id=s["game"].sport_id),
+    ),
+    PlanCase(
+        # Windows reaching into the past are sampled in the database; upcoming
+        # ones come from the in-memory pool
+        "GET /bet-events/random?league_id&from_date&to_date",
+        ("games", "bet_events"),
+        lambda db, s: db.query(BetEvent.id)
+        .join(Game)
+        .filter(
+            Game.datetime >= s["now"] - datetime.timedelta(days=7),
+            Game.datetime <= s["now"] + datetime.timedelta(days=7),
+        )
+        .filter(Game.league_id == s["game"].league_id)
+        .order_by(func.random())
+        .limit(10),
+    ),
+    PlanCase(
+        "GET /bet-events/by-game/{id}",
+        ("bet_events",),
+        lambda db, s: _with_game(db.query(BetEvent)).filter(
+            BetEvent.game_id == s["game"].id
+        ),
+    ),
+    PlanCase(
+        "GET /games/search?sport_id&league_id",
+        ("games",),
+        lambda db, s: db.query(Game)
+        .options(joinedload(Game.sport), joinedload(Game.league))
+        .filter(Game.datetime > s["now"])
+        .filter(Game.sport_id == s["game"].sport_id)
+        .filter(Game.league_id == s["game"].league_id)
+        .order_by(Game.datetime.asc())
+        .limit(20),
+    ),
+    PlanCase(
+        "GET /tipsters/{id}/recommendations",
+        ("bet_recommendations", "bet_events", "games"),
+        _tipster_recommendations,
+    ),
+    PlanCase(
+        "GET /tipsters?sort_by=followers&limit",
+        ("tipster_directory",),
+        lambda db, s: _tipster_directory_page(db),
+    ),
+    PlanCase(
+        "GET /tipsters?tag_search&limit",
+        ("tipster_directory",),
+        lambda db, s: _tipster_directory_page(db, tag_search="tag317"),
+    ),
+    PlanCase(
+        "tipster by user (tipster endpoints)",
+        ("tipsters",),
+        lambda db, s: db.query(Tipster).filter(Tipster.user_id == s["tipster"].user_id),
+    ),
+    PlanCase(
+        "ingestion: league by odds_api_id",
+        ("leagues",),
+        lambda db, s: db.query(League).filter(
+            League.odds_api_id == f"{BENCH_PREFIX}l-1"
+        ),
+    ),
+    PlanCase(
+        "settlement: events by odds_api_id",
+        ("bet_events",),
+        lambda db, s: db.query(BetEvent).filter(
+            BetEvent.odds_api_id.in_(s["event_api_ids"])
+        ),
+    ),
+    PlanCase(
+        "settlement: watched events",
+        ("games", "bet_events"),
+        _settlement_watch,
+    ),
+    PlanCase(
+        "tipster stats: recommendations by event",
+        ("bet_recommendations",),
+        lambda db, s: db.query(BetRecommendation).filter(
+            BetRecommendation.bet_event_id.in_(s["event_ids"])
+        ),
+    ),
+]
+
+
+class ExplainAnalyze(Executable, ClauseElement):
+    # Compiled in place of the statement, so bound parameters reach the
+    # driver the same way they do when the endpoint runs the query
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(ExplainAnalyze)
+def _compile_explain_analyze(element, compiler, **kw):
+    return "EXPLAIN (ANALYZE, FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def explain(db, query) -> Dict:
+    return db.execute(ExplainAnalyze(query.statement)).scalar()[0]
+
+
+def _nodes(plan: Dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def seq_scans(plan: Dict, tables: Tuple[str, ...]) -> List[str]:
+    return [
+        node["Relation Name"]
+        for node in _nodes(plan["Plan"])
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in tables
+    ]
+
+
+def indexes_used(plan: Dict) -> List[str]:
+    return sorted(
+        {node["Index Name"] for node in _nodes(plan["Plan"]) if "Index Name" in node}
+    )
+
+
+def run(
+    games: int = DEFAULT_GAMES,
+    events_per_game: int = DEFAULT_EVENTS_PER_GAME,
+    random_page_cost: float = RANDOM_PAGE_COST,
+) -> int:
+    db = SessionLocal()
+    try:
+        db.execute(text(f"SET LOCAL random_page_cost = {float(random_page_cost)}"))
+        started_at = time.perf_counter()
+        seed(db, games, events_per_game)
+        logger.info(
+            f"Seeded {games} games x {events_per_game} bet events "
+            f"in {time.perf_counter() - started_at:.1f}s"
+        )
+        samples = sample(db)
+
+        regressions = 0
+        for case in PLAN_CASES:
+            plan = explain(db, case.build(db, samples))
+            scanned = seq_scans(plan, case.indexed_tables)
+            status = "FAIL" if scanned else "ok"
+            regressions += bool(scanned)
+            logger.info(
+                f"[{status:>4}] {case.name}: {plan['Execution Time']:.2f}ms, "
+                f"indexes {', '.join(indexes_used(plan)) or '-'}"
+                + (f", seq scan on {', '.join(scanned)}" if scanned else "")
+            )
+
+        if regressions:
+            logger.error(f"{regressions} query plans regressed to a sequential scan")
+        return regressions
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES)
+    parser.add_argument("--events-per-game", type=int, default=DEFAULT_EVENTS_PER_GAME)
+    parser.add_argument("--random-page-cost", type=float, default=RANDOM_PAGE_COST)
+    args = parser.parse_args()
+    sys.exit(1 if run(args.games, args.events_per_game, args.random_page_cost) else 0)
@@ -3,6 +3,8 @@ import random
 from decimal import Decimal
 from sqlalchemy import or_
 from app.core.database import SessionLocal
+from app.core.odds_ranges import get_range_index
+from app.core.tipster_directory import refresh_tipster_directory
 from app.models.tipster import Tipster
 from app.models.tipster_tier import TipsterTier
 from app.models.bet_event import BetEvent, BetResult
@@ -46,6 +48,8 @@ def create_recommendations(start_id: int, end_id: int, min_recs: int = 3, max_re
 
         print(f"Found {len(unresolved_events)} unresolved bet events.")
 
+        range_index = get_range_index(db)
+
         tipsters = (
             db.query(Tipster)
             .filter(Tipster.id >= start_id, Tipster.id <= end_id)
@@ -112,6 +116,8 @@ def create_recommendations(start_id: int, end_id: int, min_recs: int = 3, max_re
                     tipster_tier_id=tier_id,
                     tipster_description=description,
                     stake=stake,
+                    odds=event.odds,
+                    range_id=range_index.find(event.odds),
                 )
                 db.add(rec)
                 created += 1
@@ -120,6 +126,7 @@ def create_recommendations(start_id: int, end_id: int, min_recs: int = 3, max_re
             db.flush()
             print(f"  Tipster {tipster.id}: created {created} recommendations.")
 
+        refresh_tipster_directory(db)
         db.commit()
         print(f"\n✅ Done! Created {total_created} recommendations, skipped {total_skipped} duplicates.")
 
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
 from app.core.security import get_password_hash
+from app.core.tipster_directory import refresh_tipster_directory
 from app.models.user import User
 from app.models.tipster import Tipster
 
@@ -344,6 +345,8 @@ def create_test_users(count: int = 100, expert_percentage: float = 0.0):
                     if experts_created % 5 == 0:
                         print(f"Created {experts_created} experts...")
 
+                db.flush()
+                refresh_tipster_directory(db)
                 db.commit()
                 print(f"✅ Successfully created {experts_created} experts!")
 
@@ -1,3 +1,4 @@
 from ingestion_api.request_handler import RequestHandler, req
+from ingestion_api.async_request_handler import AsyncRequestHandler, async_req
 
-__all__ = ["RequestHandler", "req"]
+__all__ = ["RequestHandler", "req", "AsyncRequestHandler", "async_req"]
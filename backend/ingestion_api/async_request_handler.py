@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ingestion_api.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    def __init__(self, rate_per_second: float):
+        self.rate_per_second = rate_per_second
+        self._next_slot: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, host: str):
+        if self.rate_per_second <= 0:
+            return
+        interval = 1.0 / self.rate_per_second
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncRequestHandler:
+    def __init__(
+        self,
+        max_retries: int = 3,
+        timeout: float = 30.0,
+        backoff_factor: float = 1.0,
+        max_concurrency: int = config.HTTP_MAX_CONCURRENCY,
+        per_host_rate: float = config.HTTP_PER_HOST_RATE,
+        http2: bool = config.HTTP2,
+    ):
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_factor = backoff_factor
+        self.max_concurrency = max_concurrency
+        self.per_host_rate = per_host_rate
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._rate_limiter: Optional[HostRateLimiter] = None
+
+    async def __aenter__(self):
+        self._ensure_client()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # httpx clients and asyncio primitives are bound to the loop that
+        # created them, so each asyncio.run() gets its own pool.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._rate_limiter = HostRateLimiter(self.per_host_rate)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    def _log_error(
+        self, attempt: int, url: str, error: Exception, context: Optional[str] = None
+    ):
+        error_msg = f"Request failed (attempt {attempt}/{self.max_retries})"
+        if context:
+            error_msg += f" - {context}"
+        error_msg += f" - URL: {url}"
+        error_msg += f" - Error: {type(error).__name__}: {str(error)}"
+
+        if attempt < self.max_retries:
+            logger.warning(error_msg)
+        else:
+            logger.error(error_msg)
+
+    def _should_retry(self, error: Exception) -> bool:
+        if isinstance(error, httpx.HTTPStatusError):
+            status_code = error.response.status_code
+            return status_code >= 500 or status_code == 429
+        elif isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+            return True
+        elif isinstance(error, httpx.HTTPError):
+            return True
+        return False
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        client = self._ensure_client()
+        host = urlsplit(url).netloc
+        last_exception = None
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                logger.debug(
+                    f"Making request (attempt {attempt}/{self.max_retries}): {url}"
+                )
+
+                async with self._semaphore:
+                    await self._rate_limiter.acquire(host)
+                    response = await client.get(
+                        url, params=params, headers=headers, **kwargs
+                    )
+                response.raise_for_status()
+
+                if attempt > 1:
+                    logger.info(f"Request succeeded on attempt {attempt}: {url}")
+
+                return response
+
+            except httpx.HTTPStatusError as e:
+                last_exception = e
+                if not self._should_retry(e):
+                    self._log_error(attempt, url, e, "HTTP error - not retrying")
+                    raise
+                self._log_error(attempt, url, e, "HTTP error")
+
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_exception = e
+                self._log_error(attempt, url, e, "Connection/Timeout error")
+
+            except httpx.HTTPError as e:
+                last_exception = e
+                self._log_error(attempt, url, e, "Request error")
+
+            except Exception as e:
+                last_exception = e
+                self._log_error(attempt, url, e, "Unexpected error")
+                raise
+
+            if attempt < self.max_retries:
+                wait_time = self.backoff_factor * (2 ** (attempt - 1))
+                logger.info(f"Retrying in {wait_time:.2f} seconds...")
+                await asyncio.sleep(wait_time)
+
+        logger.error(f"All {self.max_retries} attempts failed for URL: {url}")
+        raise last_exception
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> Any:
+        response = await self.get(url, params=params, headers=headers, **kwargs)
+        try:
+            return response.json()
+        except ValueError as e:
+            logger.error(f"Failed to parse JSON response from {url}: {str(e)}")
+            raise
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        read_timeout: Optional[float] = None,
+    ) -> AsyncIterator[httpx.Response]:
+        client = self._ensure_client()
+        async with client.stream(
+            "GET",
+            url,
+            params=params,
+            headers=headers,
+            timeout=httpx.Timeout(self.timeout, read=read_timeout),
+        ) as response:
+            response.raise_for_status()
+            yield response
+
+
+async_req = AsyncRequestHandler()
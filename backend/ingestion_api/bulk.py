@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import literal_column, or_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.bet_event import BetEvent
+from app.models.bet_event_odds_history import BetEventOddsHistory
+from app.models.game import Game
+from app.models.league import League
+
+logger = logging.getLogger(__name__)
+
+BET_EVENTS_CHUNK_SIZE = 1000
+GAMES_CHUNK_SIZE = 1000
+
+
+@dataclass
+class BatchStats:
+    games_added: int = 0
+    games_updated: int = 0
+    games_unchanged: int = 0
+    bet_events_added: int = 0
+    bet_events_repriced: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def add_timing(self, stage: str, started_at: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + (
+            time.perf_counter() - started_at
+        )
+
+    def merge(self, other: "BatchStats"):
+        for f in fields(self):
+            if f.name != "timings":
+                setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+        for stage, seconds in other.timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def log(self, label: str):
+        timings = ", ".join(f"{k}={v:.2f}s" for k, v in self.timings.items())
+        logger.info(
+            f"{label}: games added={self.games_added}, games updated={self.games_updated}, "
+            f"games unchanged={self.games_unchanged}, bet events added={self.bet_events_added}, "
+            f"bet events repriced={self.bet_events_repriced} ({timings})"
+        )
+
+
+def _chunks(rows: List[dict], size: int) -> Iterable[List[dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+def odds_payload_hash(bet_events) -> str:
+    payload = "\n".join(
+        sorted(f"{be.odds_api_id}:{be.odds!r}" for be in bet_events if be.odds_api_id)
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_league_map(db) -> Dict[str, int]:
+    return {
+        odds_api_id: league_id
+        for league_id, odds_api_id in db.query(League.id, League.odds_api_id).all()
+        if odds_api_id
+    }
+
+
+def upsert_games(
+    db, sport_id: int, api_games, league_map: Dict[str, int]
+) -> Tuple[Dict[str, Tuple[int, Optional[str]]], int, int]:
+    rows_by_api_id = {}
+    for api_game in api_games:
+        league_id = league_map.get(str(api_game.league_id))
+        if not league_id:
+            logger.warning(f"Skipping game - league {api_game.league_id} not found")
+            continue
+        rows_by_api_id[api_game.odds_api_id] = {
+            "datetime": api_game.datetime,
+            "sport_id": sport_id,
+            "league_id": league_id,
+            "home_team": api_game.home_team,
+            "away_team": api_game.away_team,
+            "odds_api_id": api_game.odds_api_id,
+        }
+
+    games = {}
+    added = 0
+    updated = 0
+    updated_columns = ("datetime", "sport_id", "league_id", "home_team", "away_team")
+    for chunk in _chunks(list(rows_by_api_id.values()), GAMES_CHUNK_SIZE):
+        stmt = insert(Game).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Game.odds_api_id],
+            set_={name: getattr(stmt.excluded, name) for name in updated_columns},
+            # Leave unchanged games untouched so updated counts real changes
+            where=or_(
+                *(
+                    getattr(Game, name).is_distinct_from(getattr(stmt.excluded, name))
+                    for name in updated_columns
+                )
+            ),
+        ).returning(
+            Game.id,
+            Game.odds_api_id,
+            Game.odds_hash,
+            literal_column("(xmax = 0)").label("inserted"),
+        )
+        for game_id, odds_api_id, odds_hash, inserted in db.execute(stmt):
+            games[odds_api_id] = (game_id, odds_hash)
+            if inserted:
+                added += 1
+            else:
+                updated += 1
+
+        # Unchanged games are skipped by the WHERE and not returned
+        unchanged = [row["odds_api_id"] for row in chunk if row["odds_api_id"] not in games]
+        if unchanged:
+            for game_id, odds_api_id, odds_hash in db.query(
+                Game.id, Game.odds_api_id, Game.odds_hash
+            ).filter(Game.odds_api_id.in_(unchanged)):
+                games[odds_api_id] = (game_id, odds_hash)
+
+    return games, added, updated
+
+
+def set_game_odds_hashes(db, hashes_by_game_id: Dict[int, str]):
+    if not hashes_by_game_id:
+        return
+    db.execute(
+        update(Game),
+        [
+            {"id": game_id, "odds_hash": odds_hash}
+            for game_id, odds_hash in hashes_by_game_id.items()
+        ],
+    )
+
+
+def upsert_bet_events(db, rows: List[dict]) -> Tuple[int, int]:
+    unique_rows = list(
+        {row["odds_api_id"]: row for row in rows if row.get("odds_api_id")}.values()
+    )
+    added = 0
+    repriced = 0
+    for chunk in _chunks(unique_rows, BET_EVENTS_CHUNK_SIZE):
+        stmt = insert(BetEvent).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BetEvent.odds_api_id],
+            set_={"odds": stmt.excluded.odds},
+            where=BetEvent.odds.is_distinct_from(stmt.excluded.odds),
+        ).returning(
+            BetEvent.id,
+            BetEvent.odds,
+            literal_column("(xmax = 0)").label("inserted"),
+        )
+        history = []
+        for bet_event_id, odds, inserted in db.execute(stmt):
+            history.append({"bet_event_id": bet_event_id, "odds": odds})
+            if inserted:
+                added += 1
+            else:
+                repriced += 1
+        if history:
+            db.execute(insert(BetEventOddsHistory).values(history))
+    return added, repriced
@@ -33,6 +33,19 @@ class IngestionApiConfig(BaseSettings):
     DEFAULT_TARGET: str = "SB_PL"
     DEFAULT_INCLUDE_ONLY: str = "fixture,inPlayStats,inPlayStatsMetadata,results"
 
+    HTTP_MAX_CONCURRENCY: int = 50
+    HTTP_PER_HOST_RATE: float = 25.0
+    HTTP2: bool = True
+
+    MARKET_METADATA_TTL_SECONDS: float = 3600.0
+
+    SETTLEMENT_EVENTS_PER_STREAM: int = 100
+    SETTLEMENT_REFRESH_SECONDS: float = 60.0
+    SETTLEMENT_WATCH_AHEAD_MINUTES: float = 30.0
+    SETTLEMENT_RECONNECT_MAX_SECONDS: float = 60.0
+    # A few heartbeat intervals of silence means the connection is half-open
+    SETTLEMENT_STREAM_READ_TIMEOUT_SECONDS: float = 90.0
+
     BETBUILDER_GET_MARKETS_ENDPOINT: str = "getBetbuilderMarketsForMatch"
     EVENTS_ENDPOINT: str = "events"
 
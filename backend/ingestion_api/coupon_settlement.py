@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import logging
+import os
+import sys
+from typing import Iterable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Numeric, case, cast, func, or_, select, tuple_, update
+
+from app.core.database import SessionLocal
+from app.models.bet_event import BetEvent, BetResult
+from app.models.bet_event_on_coupon import BetEventOnCoupon
+from app.models.coupon import Coupon, CouponResult
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_RESULTS = (BetResult.TO_RESOLVE, BetResult.UNKNOWN)
+
+
+def _coupon_legs(coupon_ids):
+    leg_odds = func.coalesce(BetEventOnCoupon.odds, BetEvent.odds, 1.0)
+    return (
+        select(
+            BetEventOnCoupon.coupon_id,
+            func.bool_or(BetEvent.result == BetResult.LOOSE).label("any_lost"),
+            func.bool_or(
+                or_(BetEvent.result.is_(None), BetEvent.result.in_(UNRESOLVED_RESULTS))
+            ).label("any_pending"),
+            func.bool_and(BetEvent.result.is_not_distinct_from(BetResult.VOID)).label(
+                "all_void"
+            ),
+            # Product of the non-void legs' odds, as exp(sum(ln(odds)))
+            func.exp(
+                func.sum(func.ln(leg_odds)).filter(
+                    BetEvent.result.is_distinct_from(BetResult.VOID)
+                )
+            ).label("effective_odds"),
+        )
+        .join(BetEvent, BetEvent.id == BetEventOnCoupon.bet_event_id)
+        .where(BetEventOnCoupon.coupon_id.in_(coupon_ids))
+        .group_by(BetEventOnCoupon.coupon_id)
+        .subquery()
+    )
+
+
+def settle_coupons(db, bet_event_ids: Optional[Iterable[int]] = None) -> int:
+    if bet_event_ids is None:
+        coupon_ids = select(Coupon.id).where(
+            or_(Coupon.result.is_(None), Coupon.result == CouponResult.PENDING)
+        )
+    else:
+        bet_event_ids = list(bet_event_ids)
+        if not bet_event_ids:
+            return 0
+        coupon_ids = select(BetEventOnCoupon.coupon_id).where(
+            BetEventOnCoupon.bet_event_id.in_(bet_event_ids)
+        )
+
+    legs = _coupon_legs(coupon_ids)
+    result = cast(
+        case(
+            (legs.c.any_lost, CouponResult.LOST.value),
+            (legs.c.any_pending, CouponResult.PENDING.value),
+            (legs.c.all_void, CouponResult.VOID.value),
+            else_=CouponResult.WON.value,
+        ),
+        Coupon.__table__.c.result.type,
+    )
+    odds = func.round(func.coalesce(legs.c.effective_odds, 1.0).cast(Numeric), 2)
+
+    stmt = (
+        update(Coupon)
+        .where(Coupon.id == legs.c.coupon_id)
+        .where(
+            tuple_(Coupon.result, Coupon.odds).is_distinct_from(tuple_(result, odds))
+        )
+        .values(result=result, odds=odds)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount
+
+
+if __name__ == "__main__":
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    db = SessionLocal()
+    try:
+        updated_count = settle_coupons(db)
+        db.commit()
+        logger.info(f"Updated {updated_count} coupons")
+    finally:
+        db.close()
@@ -1,21 +1,23 @@
 #!/usr/bin/env python3
 
+import asyncio
 import json
 import logging
 import sys
 import os
-from typing import List
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+import httpx
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.models.bet_event import BetResult, BetEvent
-from app.models.bet_recommendation import BetRecommendation
-from app.models.tipster_ranges import TipsterRange
-from app.models.tipster_main_stats import TipsterMainStats
-from app.models.tipster_tier_stats import TipsterTierStats
-from app.models.tipster_main_range_stats import TipsterMainRangeStats
-from app.models.tipster_tiers_range_stats import TipsterTiersRangeStats
 from ingestion_api.request_handler import req
+from ingestion_api.async_request_handler import async_req
+from ingestion_api.market_cache import MarketMetadata, market_cache
+from ingestion_api.tipster_stats import update_tipster_stats
+from ingestion_api.coupon_settlement import settle_coupons
 from ingestion_api.config import config
 from datetime import datetime, timedelta
 from ingestion_api.helpers import (
@@ -25,7 +27,6 @@ from ingestion_api.helpers import (
     Sport as SportData,
     League,
 )
-from app.core.database import SessionLocal
 
 logger = logging.getLogger(__name__)
 
@@ -62,19 +63,17 @@ def get_league_games(sport_id: int, tournament_ids, days_forward=3) -> List[Game
     return games
 
 
-def get_game_odds_events(game_id: int) -> List[BetEvent]:
-    from requests.exceptions import HTTPError
-
+async def fetch_game_odds_events(game_id: int) -> List[BetEvent]:
     url = config.check_events_url(game_id)
 
     try:
-        data = req.get_json(url)
-    except HTTPError as e:
-        if e.response and e.response.status_code == 404:
+        data = await async_req.get_json(url)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
             logger.warning(f"Game {game_id} not found (404) - skipping bet events")
             return []
         logger.warning(
-            f"HTTP error retrieving bet events for game {game_id}: {e.response.status_code if e.response else 'unknown'} - skipping"
+            f"HTTP error retrieving bet events for game {game_id}: {e.response.status_code} - skipping"
         )
         return []
     except Exception as e:
@@ -83,20 +82,46 @@ def get_game_odds_events(game_id: int) -> List[BetEvent]:
         )
         return []
 
-    if not data:
+    event = _first_event(data)
+    if not event:
         return []
 
+    market_data = await market_cache.aget(event.get("sportId"))
+    logger.info(f"Processing results for game {game_id}")
+    return _parse_bet_events(event, market_data)
+
+
+def get_games_odds_events(game_ids) -> Dict[int, List[BetEvent]]:
+    async def _fetch_all():
+        results = await asyncio.gather(
+            *(fetch_game_odds_events(game_id) for game_id in game_ids),
+            return_exceptions=True,
+        )
+        odds_by_game_id = {}
+        for game_id, result in zip(game_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error fetching odds for game {game_id}: {result}")
+                continue
+            odds_by_game_id[game_id] = result
+        await async_req.aclose()
+        return odds_by_game_id
+
+    game_ids = list(game_ids)
+    return asyncio.run(_fetch_all())
+
+
+def _first_event(data) -> Optional[dict]:
+    if not data:
+        return None
     _data = data.get("data", []) or []
     if not _data:
-        return []
+        return None
+    return _data[0]
 
-    event = _data[0]
-    odds = event.get("odds", []) or []
 
-    market_url = config.sport_prematch_markets_url(sport_id=event.get("sportId"))
-    market_data = req.get_json(market_url)
+def _parse_bet_events(event: dict, market_data: MarketMetadata) -> List[BetEvent]:
+    odds = event.get("odds", []) or []
     betEvents = []
-    logger.info(f"Processing results for game {game_id}")
     for odd in odds:
 
         if filter_out_market_groups(market_data, odd.get("marketId")):
@@ -117,31 +142,23 @@ def get_game_odds_events(game_id: int) -> List[BetEvent]:
     return betEvents
 
 
-def find_market_group_of_bet(market_data: dict, market_id) -> dict:
+def find_market_group_of_bet(market_data: MarketMetadata, market_id) -> dict:
     if not market_data:
         return None
-    for market_group in market_data.get("data", []) or []:
-        markets = market_group.get("markets") or []
-        if market_id in markets:
-            return market_group
-    return None
+    return market_data.group_of(market_id)
 
 
+@lru_cache(maxsize=4096)
 def filter_out_market_names(market_name: str) -> bool:
     if not market_name:
         return False
     return any(name in market_name for name in config.MARKET_NAMES_TO_FILTER_OUT)
 
 
-def filter_out_market_groups(market_data: dict, market_id) -> bool:
-    market_group = find_market_group_of_bet(market_data, market_id)
-    if (
-        market_group
-        and market_group.get("localNames", {}).get("pl-PL", "")
-        in config.MARKET_GROUPS_TO_FILTER_OUT
-    ):
-        return True
-    return False
+def filter_out_market_groups(market_data: MarketMetadata, market_id) -> bool:
+    if not market_data:
+        return False
+    return market_data.is_filtered_out(market_id)
 
 
 def get_tournaments(sport_id: int) -> List[League]:
@@ -185,266 +202,119 @@ def get_sports_from_struct() -> List[SportData]:
     return sports
 
 
-def get_results_from_event_stream(event_id: int, db=None):
+async def fetch_results_message(event_id: int):
+    params = {"events": str(event_id), "includeOnly": config.DEFAULT_INCLUDE_ONLY}
+    async with async_req.stream(
+        config.events_url, params=params, read_timeout=async_req.timeout
+    ) as response:
+        async for line in response.aiter_lines():
+            message = parse_stream_line(line)
+            if message is not None:
+                return message
+    return None
 
-    if db is None:
-        db = SessionLocal()
-        should_close = True
-    else:
-        should_close = False
 
+def get_results_messages(event_ids) -> Dict[int, object]:
+    async def _fetch_all():
+        messages = await asyncio.gather(
+            *(fetch_results_message(event_id) for event_id in event_ids),
+            return_exceptions=True,
+        )
+        await async_req.aclose()
+        results = {}
+        for event_id, message in zip(event_ids, messages):
+            if isinstance(message, Exception):
+                logger.error(f"Error fetching results for event {event_id}: {message}")
+            elif not message:
+                logger.warning(f"No data received from stream for event {event_id}")
+            else:
+                results[event_id] = message
+        return results
+
+    event_ids = list(event_ids)
+    return asyncio.run(_fetch_all())
+
+
+def parse_stream_line(line: str):
+    if line.startswith("data:"):
+        json_str = line[5:].strip()
+    elif line.strip() and not line.startswith(":"):
+        json_str = line
+    else:
+        return None
     try:
-        url = config.events_url
-        params = {"events": str(event_id), "includeOnly": config.DEFAULT_INCLUDE_ONLY}
-
-        response = req.get(url, params=params, stream=True)
-        response.raise_for_status()
-
-        first_message = None
-        for line in response.iter_lines(decode_unicode=True):
-            if line.startswith("data:"):
-                json_str = line[5:].strip()
-                try:
-                    first_message = json.loads(json_str)
-                    break
-                except json.JSONDecodeError:
-                    continue
-            elif line.strip() and not line.startswith(":"):
-                try:
-                    first_message = json.loads(line)
-                    break
-                except json.JSONDecodeError:
-                    continue
-
-        if not first_message:
-            logger.warning(f"No data received from stream for event {event_id}")
-            return None
-
-        data = first_message
-        updated_count = 0
-
-        if isinstance(data, list) and len(data) > 0 and "results" in data[0]:
-            results = data[0]["results"]
-
-            for result in results:
-                market_name = result.get("name", "Unknown")
-                odds_list = result.get("odds", [])
-
-                for odd in odds_list:
-                    uuid = odd.get("uuid")
-                    if not uuid:
-                        continue
-
-                    status = odd.get("status")
-                    price = odd.get("price")
-
-                    bet_result = None
-                    if status == 3 and price == 1:
-                        bet_result = BetResult.WIN
-                    elif status == 4 and price == 0:
-                        bet_result = BetResult.LOOSE
-                    elif status == 0:
-                        bet_result = BetResult.TO_RESOLVE
-                    elif status == 5:
-                        bet_result = BetResult.VOID
-                    else:
-                        bet_result = BetResult.UNKNOWN
-
-                    bet_event = (
-                        db.query(BetEvent).filter(BetEvent.odds_api_id == uuid).first()
-                    )
-
-                    if bet_event:
-                        if bet_event.result != bet_result:
-                            bet_event.result = bet_result
-                            updated_count += 1
-                            logger.debug(
-                                f"Updated bet_event {uuid}: {bet_result.value} (status: {status}, price: {price})"
-                            )
-
-                            update_tipster_stats(bet_event, bet_result, db)
-                        else:
-                            logger.debug(
-                                f"Bet event {uuid} already has result {bet_result.value}, skipping"
-                            )
-
-        db.commit()
-        logger.info(f"Updated {updated_count} bet events for event {event_id}")
-        return data
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        return None
 
-    except Exception as e:
-        db.rollback()
-        logger.error(
-            f"Error processing results for event {event_id}: {str(e)}", exc_info=True
-        )
-        raise
-    finally:
-        if should_close:
-            db.close()
 
+def bet_result_from_odd(odd: dict) -> BetResult:
+    status = odd.get("status")
+    price = odd.get("price")
 
-def update_tipster_stats(bet_event: BetEvent, bet_result: BetResult, db):
-    if bet_result is None or bet_result not in [BetResult.WIN, BetResult.LOOSE]:
-        return
+    if status == 3 and price == 1:
+        return BetResult.WIN
+    elif status == 4 and price == 0:
+        return BetResult.LOOSE
+    elif status == 0:
+        return BetResult.TO_RESOLVE
+    elif status == 5:
+        return BetResult.VOID
+    return BetResult.UNKNOWN
 
-    recommendations = (
-        db.query(BetRecommendation)
-        .filter(BetRecommendation.bet_event_id == bet_event.id)
-        .all()
-    )
 
-    for recommendation in recommendations:
-        rec_tipster_id = recommendation.tipster_id
-        rec_odds = float(recommendation.bet_event.odds)
-        rec_stake = float(recommendation.stake) if recommendation.stake else 1.0
-        rec_tier_id = recommendation.tipster_tier_id
-        rec_has_description = (
-            recommendation.tipster_description is not None
-            and recommendation.tipster_description.strip() != ""
-        )
+def parse_results_message(data) -> Dict[str, BetResult]:
+    results_by_uuid = {}
+    if not isinstance(data, list):
+        return results_by_uuid
 
-        rec_won = bet_result == BetResult.WIN
-        rec_return = rec_stake * rec_odds if rec_won else 0.0
+    for event in data:
+        if not isinstance(event, dict):
+            continue
+        for result in event.get("results") or []:
+            for odd in result.get("odds", []):
+                uuid = odd.get("uuid")
+                if uuid:
+                    results_by_uuid[uuid] = bet_result_from_odd(odd)
 
-        main_stats = (
-            db.query(TipsterMainStats)
-            .filter(TipsterMainStats.tipster_id == rec_tipster_id)
-            .first()
-        )
+    return results_by_uuid
 
-        if not main_stats:
-            main_stats = TipsterMainStats(
-                tipster_id=rec_tipster_id,
-                total_picks=0,
-                total_return=0,
-                total_picks_won=0,
-                sum_odds=0,
-                sum_stake=0.0,
-                picks_with_description=0,
-            )
-            db.add(main_stats)
-
-        main_stats.total_picks += 1
-        main_stats.total_picks_won += 1 if rec_won else 0
-        main_stats.sum_stake += rec_stake
-        main_stats.total_return += rec_return
-        main_stats.sum_odds += rec_odds
-        main_stats.picks_with_description += 1 if rec_has_description else 0
-
-        if rec_tier_id:
-            tier_stats = (
-                db.query(TipsterTierStats)
-                .filter(TipsterTierStats.tipster_tier_id == rec_tier_id)
-                .first()
-            )
 
-            if not tier_stats:
-                tier_stats = TipsterTierStats(
-                    tipster_id=rec_tipster_id,
-                    tipster_tier_id=rec_tier_id,
-                    total_picks=0,
-                    total_return=0,
-                    total_picks_won=0,
-                    sum_odds=0,
-                    sum_stake=0.0,
-                    picks_with_description=0,
-                )
-                db.add(tier_stats)
-
-            tier_stats.total_picks += 1
-            tier_stats.total_picks_won += 1 if rec_won else 0
-            tier_stats.sum_stake += rec_stake
-            tier_stats.total_return += rec_return
-            tier_stats.sum_odds += rec_odds
-            tier_stats.picks_with_description += 1 if rec_has_description else 0
-
-        odds_range = (
-            db.query(TipsterRange)
-            .filter(
-                TipsterRange.range_start <= rec_odds,
-                TipsterRange.range_end >= rec_odds,
-            )
-            .first()
-        )
+def apply_bet_results(db, results_by_uuid: Dict[str, BetResult]) -> int:
+    if not results_by_uuid:
+        return 0
+
+    bet_events = (
+        db.query(BetEvent)
+        .filter(BetEvent.odds_api_id.in_(list(results_by_uuid)))
+        .all()
+    )
 
-        if odds_range:
-            main_range_stats = (
-                db.query(TipsterMainRangeStats)
-                .filter(
-                    TipsterMainRangeStats.tipster_id == rec_tipster_id,
-                    TipsterMainRangeStats.range_id == odds_range.id,
-                )
-                .first()
+    transitions = {}
+    for bet_event in bet_events:
+        bet_result = results_by_uuid[bet_event.odds_api_id]
+        if bet_event.result == bet_result:
+            logger.debug(
+                f"Bet event {bet_event.odds_api_id} already has result {bet_result.value}, skipping"
             )
+            continue
+        transitions[bet_event.id] = (bet_event.result, bet_result)
+        bet_event.result = bet_result
+        logger.debug(f"Updated bet_event {bet_event.odds_api_id}: {bet_result.value}")
 
-            if not main_range_stats:
-                main_range_stats = TipsterMainRangeStats(
-                    tipster_id=rec_tipster_id,
-                    range_id=odds_range.id,
-                    total_picks=0,
-                    total_return=0,
-                    total_picks_won=0,
-                    sum_stake=0.0,
-                )
-                db.add(main_range_stats)
-
-            main_range_stats.total_picks += 1
-            main_range_stats.total_picks_won += 1 if rec_won else 0
-            main_range_stats.sum_stake += rec_stake
-            main_range_stats.total_return += rec_return
-
-            if rec_tier_id:
-                tier_range_stats = (
-                    db.query(TipsterTiersRangeStats)
-                    .filter(
-                        TipsterTiersRangeStats.tipster_tier_id == rec_tier_id,
-                        TipsterTiersRangeStats.range_id == odds_range.id,
-                    )
-                    .first()
-                )
-
-                if not tier_range_stats:
-                    tier_range_stats = TipsterTiersRangeStats(
-                        tipster_id=rec_tipster_id,
-                        tipster_tier_id=rec_tier_id,
-                        range_id=odds_range.id,
-                        total_picks=0,
-                        total_return=0,
-                        total_picks_won=0,
-                        sum_stake=0.0,
-                    )
-                    db.add(tier_range_stats)
-
-                tier_range_stats.total_picks += 1
-                tier_range_stats.total_picks_won += 1 if rec_won else 0
-                tier_range_stats.sum_stake += rec_stake
-                tier_range_stats.total_return += rec_return
-
-        db.commit()
-        logger.info(
-            f"Updated stats for tipster {rec_tipster_id}, recommendation {recommendation.id}"
-        )
+    db.flush()
+    update_tipster_stats(db, transitions)
+    coupons_count = settle_coupons(db, transitions)
+    if coupons_count:
+        logger.info(f"Updated result of {coupons_count} coupons")
+    return len(transitions)
 
 
-def is_game_finished(event_id: int) -> bool:
+async def fetch_game_finished(event_id: int) -> bool:
     try:
         url = config.check_events_url(event_id)
-        data = req.get_json(url)
-
-        if not data or not data.get("data") or len(data["data"]) == 0:
-            return False
-
-        event_data = data["data"][0]
-        offer_state_status = event_data.get("offerStateStatus", {})
-
-        state_1 = offer_state_status.get("1", "").lower()
-        state_2 = offer_state_status.get("2", "").lower()
-
-        is_finished = state_1 == "finished" and state_2 == "finished"
-        logger.debug(
-            f"Game {event_id} finished status: {is_finished} (state_1: {state_1}, state_2: {state_2})"
-        )
-        return is_finished
+        data = await async_req.get_json(url)
+        return _is_finished(event_id, data)
     except Exception as e:
         logger.error(
             f"Error checking if game {event_id} is finished: {str(e)}", exc_info=True
@@ -452,6 +322,37 @@ def is_game_finished(event_id: int) -> bool:
         return False
 
 
+def get_finished_games(event_ids) -> Set[int]:
+    async def _check_all():
+        statuses = await asyncio.gather(
+            *(fetch_game_finished(event_id) for event_id in event_ids)
+        )
+        await async_req.aclose()
+        return {
+            event_id for event_id, finished in zip(event_ids, statuses) if finished
+        }
+
+    event_ids = list(event_ids)
+    return asyncio.run(_check_all())
+
+
+def _is_finished(event_id: int, data) -> bool:
+    if not data or not data.get("data") or len(data["data"]) == 0:
+        return False
+
+    event_data = data["data"][0]
+    offer_state_status = event_data.get("offerStateStatus", {})
+
+    state_1 = offer_state_status.get("1", "").lower()
+    state_2 = offer_state_status.get("2", "").lower()
+
+    is_finished = state_1 == "finished" and state_2 == "finished"
+    logger.debug(
+        f"Game {event_id} finished status: {is_finished} (state_1: {state_1}, state_2: {state_2})"
+    )
+    return is_finished
+
+
 def debug_check_market_groups(game_id: int):
     url = config.check_events_url(game_id)
     data = req.get_json(url)
@@ -468,8 +369,7 @@ def debug_check_market_groups(game_id: int):
     event = _data[0]
     odds = event.get("odds", []) or []
 
-    market_url = config.sport_prematch_markets_url(sport_id=event.get("sportId"))
-    market_data = req.get_json(market_url)
+    market_data = market_cache.get(event.get("sportId"))
 
     entries = []
     for odd in odds:
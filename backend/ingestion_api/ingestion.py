@@ -4,22 +4,35 @@ import datetime
 import logging
 import sys
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
 from sqlalchemy import or_
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from ingestion_api.get_service import (
-    get_results_from_event_stream,
+    apply_bet_results,
+    get_results_messages,
     get_sports_from_struct,
+    parse_results_message,
     get_league_games,
-    get_game_odds_events,
-    is_game_finished,
+    get_games_odds_events,
+    get_finished_games,
     debug_check_market_groups,
 )
+from ingestion_api.bulk import (
+    BatchStats,
+    load_league_map,
+    odds_payload_hash,
+    set_game_odds_hashes,
+    upsert_bet_events,
+    upsert_games,
+)
 from ingestion_api.config import config
+from ingestion_api.market_cache import market_cache
 from ingestion_api.request_handler import req
 from app.core.database import SessionLocal
+from app.core.response_cache import BET_EVENTS, REFERENCE, notify_invalidation
+from app.core.tipster_directory import refresh_tipster_directory
 from app.models.sport import Sport
 from app.models.league import League
 from app.models.game import Game
@@ -61,6 +74,7 @@ def populate_sports_to_database():
                 db.add(new_sport)
                 added_count += 1
 
+        notify_invalidation(db, REFERENCE)
         db.commit()
         logger.info(
             f"Successfully populated sports: {added_count} added, {updated_count} updated"
@@ -147,6 +161,7 @@ def populate_leagues():
                     db.add(new_league)
                     total_added += 1
 
+            notify_invalidation(db, REFERENCE)
             db.commit()
             logger.info(f"Processed {len(tournaments)} tournaments for {sport.name}")
 
@@ -190,142 +205,64 @@ def _create_batches(tournament_ids, batch_size=10):
     return batches
 
 
-def _save_game_to_db(db, api_game, sport, league):
-    existing_game = (
-        db.query(Game).filter(Game.odds_api_id == api_game.odds_api_id).first()
-    )
-
-    if existing_game:
-        existing_game.datetime = api_game.datetime
-        existing_game.sport_id = sport.id
-        existing_game.league_id = league.id
-        existing_game.home_team = api_game.home_team
-        existing_game.away_team = api_game.away_team
-        db_game = existing_game
-        is_new = False
-    else:
-        db_game = Game(
-            datetime=api_game.datetime,
-            sport_id=sport.id,
-            league_id=league.id,
-            home_team=api_game.home_team,
-            away_team=api_game.away_team,
-            odds_api_id=api_game.odds_api_id,
-        )
-        db.add(db_game)
-        is_new = True
-
-    db.flush()
-    return db_game, is_new
-
-
-def _save_bet_events_for_game(db, db_game, api_game_odds_api_id):
-    bet_events_added = 0
-    try:
-        bet_events = get_game_odds_events(int(api_game_odds_api_id))
-        logger.debug(
-            f"Retrieved {len(bet_events)} bet events for game {api_game_odds_api_id}"
-        )
-
-        for bet_event in bet_events:
-            existing_bet_event = (
-                db.query(BetEvent)
-                .filter(BetEvent.odds_api_id == bet_event.odds_api_id)
-                .first()
-            )
-
-            if not existing_bet_event:
-                db_bet_event = BetEvent(
-                    odds=bet_event.odds,
-                    game_id=db_game.id,
-                    event=bet_event.event,
-                    odds_api_id=bet_event.odds_api_id,
-                    category_name=bet_event.category_name,
-                    category_id=bet_event.category_id,
-                )
-                db.add(db_bet_event)
-                bet_events_added += 1
-    except Exception as e:
-        logger.warning(
-            f"Error retrieving bet events for game {api_game_odds_api_id}: {str(e)} - skipping"
-        )
-
-    return bet_events_added
-
-
-def _process_batch(db, sport, sport_odds_api_id, batch):
-    games_added = 0
-    games_updated = 0
-    bet_events_added = 0
+def _process_batch(
+    db, sport, sport_odds_api_id, batch, league_map, incremental=True
+):
+    stats = BatchStats()
 
     try:
+        started_at = time.perf_counter()
         api_games = get_league_games(sport_odds_api_id, batch, days_forward=3)
+        stats.add_timing("fetch_games", started_at)
         logger.debug(f"Retrieved {len(api_games)} games from batch")
 
-        valid_games = []
-        for api_game in api_games:
-            if not api_game.datetime:
+        api_games = [g for g in api_games if g.datetime and g.odds_api_id]
+
+        started_at = time.perf_counter()
+        games, stats.games_added, stats.games_updated = upsert_games(
+            db, sport.id, api_games, league_map
+        )
+        stats.add_timing("upsert_games", started_at)
+
+        started_at = time.perf_counter()
+        odds_by_game = get_games_odds_events([int(i) for i in games])
+        stats.add_timing("fetch_odds", started_at)
+
+        started_at = time.perf_counter()
+        rows = []
+        new_hashes = {}
+        for event_id, bet_events in odds_by_game.items():
+            game_id, previous_hash = games[str(event_id)]
+            odds_hash = odds_payload_hash(bet_events)
+            if incremental and odds_hash == previous_hash:
+                stats.games_unchanged += 1
                 continue
-            league = (
-                db.query(League)
-                .filter(League.odds_api_id == str(api_game.league_id))
-                .first()
+            new_hashes[game_id] = odds_hash
+            rows.extend(
+                {
+                    "odds": bet_event.odds,
+                    "game_id": game_id,
+                    "event": bet_event.event,
+                    "odds_api_id": bet_event.odds_api_id,
+                    "category_name": bet_event.category_name,
+                    "category_id": bet_event.category_id,
+                }
+                for bet_event in bet_events
             )
-            if not league:
-                logger.warning(f"Skipping game - league {api_game.league_id} not found")
-                continue
-            db_game, is_new = _save_game_to_db(db, api_game, sport, league)
-            if is_new:
-                games_added += 1
-            else:
-                games_updated += 1
-            if api_game.odds_api_id:
-                valid_games.append((db_game, api_game.odds_api_id))
-
-        odds_by_game_id = {}
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = {
-                executor.submit(get_game_odds_events, int(odds_api_id)): db_game
-                for db_game, odds_api_id in valid_games
-            }
-            for future in as_completed(futures):
-                db_game = futures[future]
-                try:
-                    odds_by_game_id[db_game.id] = future.result()
-                except Exception as e:
-                    logger.warning(f"Error fetching odds for game {db_game.id}: {e}")
-
-        for db_game, _ in valid_games:
-            bet_events = odds_by_game_id.get(db_game.id, [])
-            for bet_event in bet_events:
-                existing = (
-                    db.query(BetEvent)
-                    .filter(BetEvent.odds_api_id == bet_event.odds_api_id)
-                    .first()
-                )
-                if not existing:
-                    db.add(
-                        BetEvent(
-                            odds=bet_event.odds,
-                            game_id=db_game.id,
-                            event=bet_event.event,
-                            odds_api_id=bet_event.odds_api_id,
-                            category_name=bet_event.category_name,
-                            category_id=bet_event.category_id,
-                        )
-                    )
-                    bet_events_added += 1
-
+        stats.bet_events_added, stats.bet_events_repriced = upsert_bet_events(db, rows)
+        set_game_odds_hashes(db, new_hashes)
         db.commit()
+        stats.add_timing("upsert_bet_events", started_at)
     except Exception as e:
         db.rollback()
         logger.error(f"Error processing batch: {str(e)}", exc_info=True)
         raise
 
-    return games_added, games_updated, bet_events_added
+    stats.log(f"Batch {batch}")
+    return stats
 
 
-def populate_events():
+def populate_events(incremental: bool = True):
     db = SessionLocal()
     try:
         leagues = (
@@ -342,9 +279,9 @@ def populate_events():
             logger.warning("No leagues found for processing")
             return
 
-        games_added = 0
-        games_updated = 0
-        bet_events_added = 0
+        market_cache.invalidate()
+        league_map = load_league_map(db)
+        total = BatchStats()
 
         for sport_odds_api_id, tournament_ids in leagues_by_sport.items():
             sport = (
@@ -364,17 +301,23 @@ def populate_events():
             )
 
             for batch in batches:
-                batch_added, batch_updated, batch_bet_events = _process_batch(
-                    db, sport, sport_odds_api_id, batch
+                total.merge(
+                    _process_batch(
+                        db, sport, sport_odds_api_id, batch, league_map, incremental
+                    )
                 )
-                games_added += batch_added
-                games_updated += batch_updated
-                bet_events_added += batch_bet_events
 
-        logger.info("Summary:")
-        logger.info(f"  Games added: {games_added}")
-        logger.info(f"  Games updated: {games_updated}")
-        logger.info(f"  Bet events added: {bet_events_added}")
+        if (
+            total.games_added
+            or total.games_updated
+            or total.bet_events_added
+            or total.bet_events_repriced
+        ):
+            # API processes rebuild their pool of upcoming bet events
+            notify_invalidation(db, BET_EVENTS)
+            db.commit()
+
+        total.log("Summary")
     except Exception as e:
         logger.error(f"Error fetching leagues: {str(e)}", exc_info=True)
         raise
@@ -410,6 +353,9 @@ def clean_old_games():
             .filter(Game.id.in_(protected_game_ids))
             .delete(synchronize_session="fetch")
         )
+        if deleted_protected:
+            # Recommendations went with the games through ON DELETE CASCADE
+            refresh_tipster_directory(db)
 
         db.commit()
         logger.info(
@@ -428,9 +374,14 @@ def set_results_for_event(event_id: int):
     db = SessionLocal()
     try:
         logger.info(f"Setting results for event {event_id}")
-        results = get_results_from_event_stream(event_id)
-        logger.info(f"Successfully set results for event {event_id}")
+        results_by_uuid = {}
+        for message in get_results_messages([event_id]).values():
+            results_by_uuid.update(parse_results_message(message))
+        updated_count = apply_bet_results(db, results_by_uuid)
+        db.commit()
+        logger.info(f"Settled {updated_count} bet events for event {event_id}")
     except Exception as e:
+        db.rollback()
         logger.error(
             f"Error setting results for event {event_id}: {str(e)}", exc_info=True
         )
@@ -466,40 +417,34 @@ def set_results():
 
         logger.info(f"Found {len(games)} games with unresolved bet events on coupons/recommendations")
 
-        processed_count = 0
-        error_count = 0
-        skipped_count = 0
+        finished_event_ids = get_finished_games(
+            {int(game.odds_api_id) for game in games if game.odds_api_id}
+        )
+        skipped_count = len(games) - len(finished_event_ids)
+        logger.info(f"{len(finished_event_ids)} games finished, {skipped_count} not finished yet")
 
-        for game in games:
-            if not game.odds_api_id:
-                continue
+        messages = get_results_messages(sorted(finished_event_ids))
 
+        results_by_uuid = {}
+        error_count = 0
+        for event_id, message in messages.items():
             try:
-                event_id = int(game.odds_api_id)
-
-                if not is_game_finished(event_id):
-                    logger.debug(
-                        f"Game {game.id} (event_id: {event_id}) is not finished yet, skipping"
-                    )
-                    skipped_count += 1
-                    continue
-
-                logger.info(
-                    f"Processing results for game {game.id} (event_id: {event_id})"
-                )
-                get_results_from_event_stream(event_id, db=db)
-                processed_count += 1
+                results_by_uuid.update(parse_results_message(message))
             except Exception as e:
                 error_count += 1
                 logger.error(
-                    f"Error processing game {game.id} (event_id: {game.odds_api_id}): {str(e)}",
+                    f"Error parsing results for event {event_id}: {str(e)}",
                     exc_info=True,
                 )
-                continue
+        error_count += len(finished_event_ids) - len(messages)
+
+        updated_count = apply_bet_results(db, results_by_uuid)
+        db.commit()
 
         logger.info("Summary:")
-        logger.info(f"  Games processed: {processed_count}")
+        logger.info(f"  Games processed: {len(messages)}")
         logger.info(f"  Games skipped (not finished): {skipped_count}")
+        logger.info(f"  Bet events settled: {updated_count}")
         logger.info(f"  Errors: {error_count}")
 
     except Exception as e:
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set
+
+from ingestion_api.async_request_handler import async_req
+from ingestion_api.config import config
+from ingestion_api.request_handler import req
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MarketMetadata:
+    sport_id: int
+    groups_by_market_id: Dict[Any, dict] = field(default_factory=dict)
+    filtered_market_ids: Set[Any] = field(default_factory=set)
+    fetched_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_response(cls, sport_id: int, market_data: dict) -> "MarketMetadata":
+        metadata = cls(sport_id=sport_id)
+        for market_group in (market_data or {}).get("data", []) or []:
+            group_name = market_group.get("localNames", {}).get("pl-PL", "")
+            is_filtered = group_name in config.MARKET_GROUPS_TO_FILTER_OUT
+            for market_id in market_group.get("markets") or []:
+                if market_id in metadata.groups_by_market_id:
+                    continue
+                metadata.groups_by_market_id[market_id] = market_group
+                if is_filtered:
+                    metadata.filtered_market_ids.add(market_id)
+        return metadata
+
+    def group_of(self, market_id) -> Optional[dict]:
+        return self.groups_by_market_id.get(market_id)
+
+    def is_filtered_out(self, market_id) -> bool:
+        return market_id in self.filtered_market_ids
+
+
+class MarketMetadataCache:
+    def __init__(self, ttl_seconds: float = config.MARKET_METADATA_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, MarketMetadata] = {}
+        self._lock = threading.Lock()
+        self._sport_locks: Dict[int, threading.Lock] = {}
+        self._inflight: Dict[int, asyncio.Future] = {}
+
+    def _fresh(self, sport_id: int) -> Optional[MarketMetadata]:
+        entry = self._entries.get(sport_id)
+        if entry and time.monotonic() - entry.fetched_at < self.ttl_seconds:
+            return entry
+        return None
+
+    def _store(self, sport_id: int, market_data: dict) -> MarketMetadata:
+        metadata = MarketMetadata.from_response(sport_id, market_data)
+        with self._lock:
+            self._entries[sport_id] = metadata
+        logger.debug(
+            f"Cached {len(metadata.groups_by_market_id)} markets for sport {sport_id}"
+        )
+        return metadata
+
+    def get(self, sport_id: int) -> MarketMetadata:
+        entry = self._fresh(sport_id)
+        if entry:
+            return entry
+        with self._lock:
+            sport_lock = self._sport_locks.setdefault(sport_id, threading.Lock())
+        with sport_lock:
+            entry = self._fresh(sport_id)
+            if entry:
+                return entry
+            market_data = req.get_json(config.sport_prematch_markets_url(sport_id))
+            return self._store(sport_id, market_data)
+
+    async def aget(self, sport_id: int) -> MarketMetadata:
+        entry = self._fresh(sport_id)
+        if entry:
+            return entry
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(sport_id)
+        if inflight is None or inflight.get_loop() is not loop or inflight.done():
+            inflight = loop.create_task(self._load(sport_id))
+            self._inflight[sport_id] = inflight
+        return await asyncio.shield(inflight)
+
+    async def _load(self, sport_id: int) -> MarketMetadata:
+        market_data = await async_req.get_json(
+            config.sport_prematch_markets_url(sport_id)
+        )
+        return self._store(sport_id, market_data)
+
+    def invalidate(self, sport_id: Optional[int] = None):
+        with self._lock:
+            if sport_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(sport_id, None)
+
+
+market_cache = MarketMetadataCache()
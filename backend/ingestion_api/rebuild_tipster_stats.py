@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+import logging
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Float, case, cast, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import SessionLocal
+from app.core.response_cache import TIPSTERS, notify_invalidation
+from app.core.tipster_directory import refresh_tipster_directory
+from app.models.bet_event import BetEvent, BetResult
+from app.models.bet_recommendation import BetRecommendation
+from app.models.tipster_main_range_stats import TipsterMainRangeStats
+from app.models.tipster_main_stats import TipsterMainStats
+from app.models.tipster_ranges import TipsterRange
+from app.models.tipster_tier_stats import TipsterTierStats
+from app.models.tipster_tiers_range_stats import TipsterTiersRangeStats
+from ingestion_api.tipster_stats import (
+    MAIN_FIELDS,
+    RANGE_FIELDS,
+    SETTLED_RESULTS,
+    backfill_range_ids,
+    recommendation_odds,
+)
+
+logger = logging.getLogger(__name__)
+
+REBUILD_CHUNK_SIZE = 1000
+INTEGER_FIELDS = ("total_picks", "total_picks_won", "picks_with_description")
+
+
+@dataclass(frozen=True)
+class StatsTable:
+    model: type
+    key_columns: Tuple[str, ...]
+    fields: Tuple[str, ...]
+    # Value of GROUPING(tipster_tier_id, range_id) for this table's grouping set
+    grouping: int
+
+
+STATS_TABLES = (
+    StatsTable(TipsterMainStats, ("tipster_id",), MAIN_FIELDS, 3),
+    StatsTable(TipsterTierStats, ("tipster_tier_id",), MAIN_FIELDS, 1),
+    StatsTable(TipsterMainRangeStats, ("tipster_id", "range_id"), RANGE_FIELDS, 2),
+    StatsTable(
+        TipsterTiersRangeStats, ("tipster_tier_id", "range_id"), RANGE_FIELDS, 0
+    ),
+)
+
+
+@dataclass
+class TableDrift:
+    table: str
+    expected_rows: int = 0
+    missing: List[tuple] = field(default_factory=list)
+    stale: List[tuple] = field(default_factory=list)
+    changed: List[Tuple[tuple, dict, dict]] = field(default_factory=list)
+
+    @property
+    def drifted(self) -> int:
+        return len(self.missing) + len(self.stale) + len(self.changed)
+
+    def log(self, sample_size: int = 5):
+        logger.info(
+            f"{self.table}: expected rows={self.expected_rows}, missing={len(self.missing)}, "
+            f"stale={len(self.stale)}, changed={len(self.changed)}"
+        )
+        for key, current, expected in self.changed[:sample_size]:
+            differences = ", ".join(
+                f"{name} {current[name]} -> {expected[name]}"
+                for name in expected
+                if not _same(current[name], expected[name])
+            )
+            logger.info(f"  {key}: {differences}")
+
+
+def _same(current, expected) -> bool:
+    return math.isclose(current or 0, expected or 0, rel_tol=1e-9, abs_tol=1e-6)
+
+
+def _settled_recommendations():
+    # Rows whose range_id was never set are bucketed the same way the
+    # incremental path and backfill_range_ids do, so --diff without a backfill
+    # compares like with like. Odds on a shared boundary go to the lower range.
+    odds = recommendation_odds()
+    resolved_range_id = (
+        select(TipsterRange.id)
+        .where(TipsterRange.range_start <= odds, TipsterRange.range_end >= odds)
+        .order_by(TipsterRange.range_start, TipsterRange.range_end)
+        .limit(1)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            BetRecommendation.tipster_id,
+            BetRecommendation.tipster_tier_id,
+            func.coalesce(BetRecommendation.range_id, resolved_range_id).label(
+                "range_id"
+            ),
+            cast(
+                func.coalesce(func.nullif(BetRecommendation.stake, 0), 1), Float
+            ).label("stake"),
+            odds,
+            (BetEvent.result == BetResult.WIN).label("won"),
+            (
+                func.coalesce(func.trim(BetRecommendation.tipster_description), "")
+                != ""
+            ).label("has_description"),
+        )
+        .join(BetEvent, BetEvent.id == BetRecommendation.bet_event_id)
+        .where(BetEvent.result.in_(SETTLED_RESULTS))
+        .subquery()
+    )
+
+
+def compute_expected_stats(db) -> Dict[type, Dict[tuple, dict]]:
+    # All four tables are aggregated from a single scan of the settled
+    # recommendations using GROUPING SETS.
+    settled = _settled_recommendations()
+    grouping = func.grouping(settled.c.tipster_tier_id, settled.c.range_id)
+    stmt = select(
+        grouping.label("grouping"),
+        settled.c.tipster_id,
+        settled.c.tipster_tier_id,
+        settled.c.range_id,
+        func.count().label("total_picks"),
+        func.sum(case((settled.c.won, 1), else_=0)).label("total_picks_won"),
+        func.sum(settled.c.stake).label("sum_stake"),
+        func.sum(
+            case((settled.c.won, settled.c.stake * settled.c.odds), else_=0.0)
+        ).label("total_return"),
+        func.sum(settled.c.odds).label("sum_odds"),
+        func.sum(case((settled.c.has_description, 1), else_=0)).label(
+            "picks_with_description"
+        ),
+    ).group_by(
+        func.grouping_sets(
+            settled.c.tipster_id,
+            tuple_(settled.c.tipster_id, settled.c.tipster_tier_id),
+            tuple_(settled.c.tipster_id, settled.c.range_id),
+            tuple_(settled.c.tipster_id, settled.c.tipster_tier_id, settled.c.range_id),
+        )
+    )
+
+    tables_by_grouping = {table.grouping: table for table in STATS_TABLES}
+    expected = {table.model: {} for table in STATS_TABLES}
+    for row in db.execute(stmt).mappings():
+        table = tables_by_grouping[row["grouping"]]
+        key = tuple(row[name] for name in table.key_columns)
+        if any(value is None for value in key):
+            continue
+        values = {"tipster_id": row["tipster_id"]}
+        for name in table.fields:
+            value = row[name] or 0
+            values[name] = int(value) if name in INTEGER_FIELDS else float(value)
+        expected[table.model][key] = values
+    return expected
+
+
+def load_current_stats(db, table: StatsTable) -> Dict[tuple, dict]:
+    names = dict.fromkeys(("tipster_id", *table.key_columns, *table.fields))
+    columns = [getattr(table.model, name) for name in names]
+    current = {}
+    for row in db.query(*columns).all():
+        row = row._asdict()
+        current[tuple(row[name] for name in table.key_columns)] = row
+    return current
+
+
+def diff_table(table: StatsTable, current, expected) -> TableDrift:
+    drift = TableDrift(table=table.model.__tablename__, expected_rows=len(expected))
+    for key, expected_values in expected.items():
+        current_values = current.get(key)
+        if current_values is None:
+            drift.missing.append(key)
+        elif not all(
+            _same(current_values[name], expected_values[name]) for name in table.fields
+        ):
+            drift.changed.append(
+                (
+                    key,
+                    {name: current_values[name] for name in table.fields},
+                    {name: expected_values[name] for name in table.fields},
+                )
+            )
+    for key, current_values in current.items():
+        if key not in expected and any(
+            not _same(current_values[name], 0) for name in table.fields
+        ):
+            drift.stale.append(key)
+    return drift
+
+
+def _write_rows(db, table: StatsTable, rows: List[dict]):
+    for i in range(0, len(rows), REBUILD_CHUNK_SIZE):
+        stmt = insert(table.model).values(rows[i : i + REBUILD_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(table.key_columns),
+            set_={name: getattr(stmt.excluded, name) for name in table.fields},
+        )
+        db.execute(stmt)
+
+
+def rebuild_tipster_stats(write: bool = True) -> List[TableDrift]:
+    db = SessionLocal()
+    started_at = time.perf_counter()
+    try:
+        if write:
+            # Block incremental settlement updates until the rebuilt values are
+            # committed, otherwise increments landing mid-rebuild would be lost.
+            table_names = ", ".join(t.model.__tablename__ for t in STATS_TABLES)
+            db.execute(text(f"LOCK TABLE {table_names} IN SHARE ROW EXCLUSIVE MODE"))
+
+            backfilled = backfill_range_ids(db)
+            if backfilled:
+                logger.info(f"Assigned odds ranges to {backfilled} recommendations")
+
+        expected = compute_expected_stats(db)
+        logger.info(
+            f"Aggregated expected stats in {time.perf_counter() - started_at:.2f}s"
+        )
+
+        drifts = []
+        for table in STATS_TABLES:
+            current = load_current_stats(db, table)
+            drift = diff_table(table, current, expected[table.model])
+            drift.log()
+            drifts.append(drift)
+
+            if write:
+                zero = {
+                    name: 0 if name in INTEGER_FIELDS else 0.0 for name in table.fields
+                }
+                rows = [
+                    {**dict(zip(table.key_columns, key)), **expected[table.model][key]}
+                    for key in drift.missing
+                ]
+                rows += [
+                    {**dict(zip(table.key_columns, key)), **expected_values}
+                    for key, _, expected_values in drift.changed
+                ]
+                rows += [{**current[key], **zero} for key in drift.stale]
+                _write_rows(db, table, rows)
+
+        if write:
+            refreshed = refresh_tipster_directory(db)
+            if refreshed:
+                logger.info(f"Corrected {refreshed} tipster directory rows")
+            notify_invalidation(db, TIPSTERS)
+            db.commit()
+            logger.info(
+                f"Rebuilt tipster stats, {sum(d.drifted for d in drifts)} rows corrected "
+                f"in {time.perf_counter() - started_at:.2f}s"
+            )
+        else:
+            logger.info(
+                f"Diff finished, {sum(d.drifted for d in drifts)} rows drifted "
+                f"in {time.perf_counter() - started_at:.2f}s"
+            )
+        return drifts
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    diff_only = "--diff" in sys.argv[1:]
+    drifts = rebuild_tipster_stats(write=not diff_only)
+    if diff_only and any(drift.drifted for drift in drifts):
+        sys.exit(1)
@@ -14,6 +14,7 @@ class RequestHandler:
         self.max_retries = max_retries
         self.timeout = timeout
         self.backoff_factor = backoff_factor
+        self.session = requests.Session()
 
     def _log_error(
         self, attempt: int, url: str, error: Exception, context: Optional[str] = None
@@ -58,7 +59,7 @@ class RequestHandler:
                     f"Making request (attempt {attempt}/{self.max_retries}): {url}"
                 )
 
-                response = requests.get(
+                response = self.session.get(
                     url,
                     params=params,
                     headers=headers,
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+import asyncio
+import datetime
+import logging
+import os
+import sys
+from typing import Dict, List, Optional, Set
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import or_
+
+from app.core.database import SessionLocal
+from app.models.bet_event import BetEvent, BetResult
+from app.models.bet_event_on_coupon import BetEventOnCoupon
+from app.models.bet_recommendation import BetRecommendation
+from app.models.game import Game
+from ingestion_api.async_request_handler import AsyncRequestHandler
+from ingestion_api.config import config
+from ingestion_api.get_service import (
+    apply_bet_results,
+    parse_results_message,
+    parse_stream_line,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_watched_event_ids(db, watch_ahead_minutes: float) -> Set[int]:
+    horizon = datetime.datetime.now() + datetime.timedelta(minutes=watch_ahead_minutes)
+
+    referenced_event_ids = (
+        db.query(BetEventOnCoupon.bet_event_id)
+        .union(db.query(BetRecommendation.bet_event_id))
+        .subquery()
+    )
+
+    rows = (
+        db.query(Game.odds_api_id)
+        .join(BetEvent)
+        .filter(Game.datetime < horizon)
+        .filter(Game.odds_api_id.isnot(None))
+        .filter(BetEvent.id.in_(referenced_event_ids))
+        .filter(
+            or_(
+                BetEvent.result.in_([BetResult.TO_RESOLVE, BetResult.UNKNOWN]),
+                BetEvent.result.is_(None),
+            )
+        )
+        .distinct()
+        .all()
+    )
+
+    event_ids = set()
+    for (odds_api_id,) in rows:
+        try:
+            event_ids.add(int(odds_api_id))
+        except ValueError:
+            continue
+    return event_ids
+
+
+def settle_message(data) -> int:
+    results_by_uuid = parse_results_message(data)
+    if not results_by_uuid:
+        return 0
+
+    db = SessionLocal()
+    try:
+        updated_count = apply_bet_results(db, results_by_uuid)
+        db.commit()
+        return updated_count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class EventStream:
+    def __init__(self, client: AsyncRequestHandler, event_ids: List[int]):
+        self.client = client
+        self.event_ids = event_ids
+        self.last_event_id: Optional[str] = None
+        self.retry_seconds = 1.0
+
+    @property
+    def label(self) -> str:
+        return (
+            f"{len(self.event_ids)} events ({self.event_ids[0]}..{self.event_ids[-1]})"
+        )
+
+    async def run(self):
+        attempt = 0
+        while True:
+            try:
+                await self._consume()
+                attempt = 0
+                logger.info(f"Stream for {self.label} closed by server, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                attempt += 1
+                logger.warning(
+                    f"Stream for {self.label} failed: {type(e).__name__}: {e}"
+                )
+
+            wait_time = min(
+                self.retry_seconds * (2 ** max(attempt - 1, 0)),
+                config.SETTLEMENT_RECONNECT_MAX_SECONDS,
+            )
+            await asyncio.sleep(wait_time)
+
+    async def _consume(self):
+        params = {
+            "events": ",".join(str(event_id) for event_id in self.event_ids),
+            "includeOnly": config.DEFAULT_INCLUDE_ONLY,
+        }
+        headers = {"Accept": "text/event-stream"}
+        if self.last_event_id:
+            headers["Last-Event-ID"] = self.last_event_id
+
+        async with self.client.stream(
+            config.events_url,
+            params=params,
+            headers=headers,
+            read_timeout=config.SETTLEMENT_STREAM_READ_TIMEOUT_SECONDS,
+        ) as response:
+            logger.info(f"Subscribed to {self.label}")
+            data_lines = []
+            async for line in response.aiter_lines():
+                if line.startswith("id:"):
+                    self.last_event_id = line[3:].strip() or None
+                elif line.startswith("retry:"):
+                    try:
+                        self.retry_seconds = int(line[6:].strip()) / 1000
+                    except ValueError:
+                        pass
+                elif line.startswith("data:"):
+                    data_lines.append(line[5:].strip())
+                elif not line.strip():
+                    if data_lines:
+                        await self._dispatch("data:" + "\n".join(data_lines))
+                        data_lines = []
+                else:
+                    await self._dispatch(line)
+
+    async def _dispatch(self, line: str):
+        data = parse_stream_line(line)
+        if data is None:
+            return
+        try:
+            updated_count = await asyncio.to_thread(settle_message, data)
+        except Exception as e:
+            logger.error(
+                f"Error settling message from {self.label}: {e}", exc_info=True
+            )
+            return
+        if updated_count:
+            logger.info(f"Settled {updated_count} bet events from {self.label}")
+
+
+class SettlementWorker:
+    def __init__(
+        self,
+        events_per_stream: int = config.SETTLEMENT_EVENTS_PER_STREAM,
+        refresh_seconds: float = config.SETTLEMENT_REFRESH_SECONDS,
+        watch_ahead_minutes: float = config.SETTLEMENT_WATCH_AHEAD_MINUTES,
+    ):
+        self.events_per_stream = events_per_stream
+        self.refresh_seconds = refresh_seconds
+        self.watch_ahead_minutes = watch_ahead_minutes
+        self.client = AsyncRequestHandler()
+        self._streams: Dict[tuple, asyncio.Task] = {}
+
+    def _load_event_ids(self) -> Set[int]:
+        db = SessionLocal()
+        try:
+            return get_watched_event_ids(db, self.watch_ahead_minutes)
+        finally:
+            db.close()
+
+    async def _sync_streams(self, event_ids: Set[int]):
+        # Streams keep their subscription until none of their events need
+        # settling; new events get their own streams so existing connections
+        # are not torn down whenever the watch list grows.
+        for group in list(self._streams):
+            if not event_ids.intersection(group):
+                self._streams.pop(group).cancel()
+
+        covered = set().union(*self._streams) if self._streams else set()
+        new_ids = sorted(event_ids - covered)
+        for i in range(0, len(new_ids), self.events_per_stream):
+            group = tuple(new_ids[i : i + self.events_per_stream])
+            stream = EventStream(self.client, list(group))
+            self._streams[group] = asyncio.create_task(stream.run())
+
+    async def run(self):
+        try:
+            while True:
+                event_ids = await asyncio.to_thread(self._load_event_ids)
+                await self._sync_streams(event_ids)
+                logger.info(
+                    f"Watching {len(event_ids)} events over {len(self._streams)} streams"
+                )
+                await asyncio.sleep(self.refresh_seconds)
+        finally:
+            for task in self._streams.values():
+                task.cancel()
+            await asyncio.gather(*self._streams.values(), return_exceptions=True)
+            await self.client.aclose()
+
+
+def run_settlement_worker():
+    asyncio.run(SettlementWorker().run())
+
+
+if __name__ == "__main__":
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    run_settlement_worker()
@@ -0,0 +1,226 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.odds_ranges import OddsRangeIndex, get_range_index
+from app.core.response_cache import TIPSTERS, notify_invalidation
+from app.models.bet_event import BetEvent, BetResult
+from app.models.bet_recommendation import BetRecommendation
+from app.models.tipster_main_range_stats import TipsterMainRangeStats
+from app.models.tipster_main_stats import TipsterMainStats
+from app.models.tipster_tier_stats import TipsterTierStats
+from app.models.tipster_tiers_range_stats import TipsterTiersRangeStats
+
+logger = logging.getLogger(__name__)
+
+SETTLED_RESULTS = (BetResult.WIN, BetResult.LOOSE)
+
+MAIN_FIELDS = (
+    "total_picks",
+    "total_picks_won",
+    "sum_stake",
+    "total_return",
+    "sum_odds",
+    "picks_with_description",
+)
+RANGE_FIELDS = ("total_picks", "total_picks_won", "sum_stake", "total_return")
+
+
+def recommendation_odds():
+    # Picks settle at the price they were made at; rows written without one
+    # fall back to the event's current price.
+    return func.coalesce(BetRecommendation.odds, BetEvent.odds).label("odds")
+
+
+def _new_delta(tipster_id: int, fields) -> dict:
+    delta = {name: 0 for name in fields}
+    delta["tipster_id"] = tipster_id
+    return delta
+
+
+def _set_range_ids(db, range_ids: Dict[int, int]):
+    if not range_ids:
+        return
+    db.execute(
+        update(BetRecommendation),
+        [
+            {"id": recommendation_id, "range_id": range_id}
+            for recommendation_id, range_id in range_ids.items()
+        ],
+    )
+
+
+def backfill_range_ids(db, range_index: Optional[OddsRangeIndex] = None) -> int:
+    range_index = range_index or get_range_index(db)
+    rows = (
+        db.query(BetRecommendation.id, recommendation_odds())
+        .join(BetEvent, BetEvent.id == BetRecommendation.bet_event_id)
+        .filter(BetRecommendation.range_id.is_(None))
+        .all()
+    )
+    range_ids = {}
+    for recommendation_id, odds in rows:
+        range_id = range_index.find(odds)
+        if range_id:
+            range_ids[recommendation_id] = range_id
+    _set_range_ids(db, range_ids)
+    return len(range_ids)
+
+
+def compute_stats_deltas(
+    db, transitions: Dict[int, Tuple[Optional[BetResult], BetResult]]
+):
+    # Each transition contributes -1x its previous settled result and +1x its
+    # new one, so re-settling a corrected bet moves the stats instead of
+    # counting the recommendation twice.
+    signed_results = {}
+    for bet_event_id, (old_result, new_result) in transitions.items():
+        signs = []
+        if old_result in SETTLED_RESULTS:
+            signs.append((-1, old_result))
+        if new_result in SETTLED_RESULTS:
+            signs.append((1, new_result))
+        if signs:
+            signed_results[bet_event_id] = signs
+
+    main = {}
+    tiers = {}
+    main_ranges = {}
+    tier_ranges = {}
+    if not signed_results:
+        return main, tiers, main_ranges, tier_ranges
+
+    recommendations = (
+        db.query(
+            BetRecommendation.id,
+            BetRecommendation.bet_event_id,
+            BetRecommendation.tipster_id,
+            BetRecommendation.tipster_tier_id,
+            BetRecommendation.stake,
+            BetRecommendation.tipster_description,
+            BetRecommendation.range_id,
+            recommendation_odds(),
+        )
+        .join(BetEvent, BetEvent.id == BetRecommendation.bet_event_id)
+        .filter(BetRecommendation.bet_event_id.in_(list(signed_results)))
+        .all()
+    )
+    range_index = get_range_index(db)
+    missing_range_ids = {}
+
+    for (
+        recommendation_id,
+        bet_event_id,
+        tipster_id,
+        tier_id,
+        stake,
+        description,
+        range_id,
+        odds,
+    ) in recommendations:
+        odds = float(odds)
+        stake = float(stake) if stake else 1.0
+        has_description = description is not None and description.strip() != ""
+        if range_id is None:
+            range_id = range_index.find(odds)
+            if range_id:
+                missing_range_ids[recommendation_id] = range_id
+
+        for sign, result in signed_results[bet_event_id]:
+            won = result == BetResult.WIN
+            values = {
+                "total_picks": sign,
+                "total_picks_won": sign if won else 0,
+                "sum_stake": sign * stake,
+                "total_return": sign * stake * odds if won else 0.0,
+                "sum_odds": sign * odds,
+                "picks_with_description": sign if has_description else 0,
+            }
+
+            targets = [(main, tipster_id, MAIN_FIELDS, {})]
+            if tier_id:
+                targets.append(
+                    (tiers, tier_id, MAIN_FIELDS, {"tipster_tier_id": tier_id})
+                )
+            if range_id:
+                targets.append(
+                    (
+                        main_ranges,
+                        (tipster_id, range_id),
+                        RANGE_FIELDS,
+                        {"range_id": range_id},
+                    )
+                )
+                if tier_id:
+                    targets.append(
+                        (
+                            tier_ranges,
+                            (tier_id, range_id),
+                            RANGE_FIELDS,
+                            {"tipster_tier_id": tier_id, "range_id": range_id},
+                        )
+                    )
+
+            for bucket, key, fields, keys in targets:
+                if key not in bucket:
+                    bucket[key] = _new_delta(tipster_id, fields)
+                    bucket[key].update(keys)
+                for name in fields:
+                    bucket[key][name] += values[name]
+
+    _set_range_ids(db, missing_range_ids)
+    return main, tiers, main_ranges, tier_ranges
+
+
+def _upsert_increments(db, model, rows: List[dict], conflict_columns, fields):
+    if not rows:
+        return
+    stmt = insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={
+            name: getattr(model.__table__.c, name) + getattr(stmt.excluded, name)
+            for name in fields
+        },
+    )
+    db.execute(stmt)
+
+
+def apply_stats_deltas(db, main, tiers, main_ranges, tier_ranges):
+    _upsert_increments(
+        db, TipsterMainStats, list(main.values()), ["tipster_id"], MAIN_FIELDS
+    )
+    _upsert_increments(
+        db, TipsterTierStats, list(tiers.values()), ["tipster_tier_id"], MAIN_FIELDS
+    )
+    _upsert_increments(
+        db,
+        TipsterMainRangeStats,
+        list(main_ranges.values()),
+        ["tipster_id", "range_id"],
+        RANGE_FIELDS,
+    )
+    _upsert_increments(
+        db,
+        TipsterTiersRangeStats,
+        list(tier_ranges.values()),
+        ["tipster_tier_id", "range_id"],
+        RANGE_FIELDS,
+    )
+
+
+def update_tipster_stats(
+    db, transitions: Dict[int, Tuple[Optional[BetResult], BetResult]]
+):
+    main, tiers, main_ranges, tier_ranges = compute_stats_deltas(db, transitions)
+    apply_stats_deltas(db, main, tiers, main_ranges, tier_ranges)
+    if transitions:
+        # Settled events feed the leaderboard and top picks
+        notify_invalidation(db, TIPSTERS)
+    if main:
+        logger.info(
+            f"Updated stats for {len(main)} tipsters, {len(tiers)} tiers, "
+            f"{len(main_ranges) + len(tier_ranges)} range buckets"
+        )
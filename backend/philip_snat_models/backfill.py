@@ -0,0 +1,326 @@
+"""
+Regenerates philip_snat game rows for a date range by replaying a league
+getter's feature builder day by day, e.g. to rebuild a season after a feature
+definition changed.
+
+Days are built concurrently under a process-wide request rate limit. Team-day
+snapshots already in the feature store are reused and new ones are saved. Rows
+are bulk-inserted with COPY, and finished days are checkpointed so an
+interrupted run resumes where it stopped:
+
+    python3 philip_snat_models/backfill.py NHL 2024-10-04 2025-04-17 \\
+        [--workers 4] [--rate 8] [--replace] [--restart] [--fresh-snapshots]
+
+--replace deletes the league's existing rows for each replayed day before
+inserting. Without it, games already in the table are left alone.
+--fresh-snapshots recomputes (and overwrites) stored team snapshots, for when
+a team-level feature definition changed.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from threading import Lock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, select
+
+from app.core.database import SessionLocal
+from app.models.philip_snat_nhl_game import PhilipSnatNhlGame
+from philip_snat_models.nhl import get as nhl_get
+from philip_snat_models.team_snapshots import TeamSnapshotStore
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_DIR = os.getenv(
+    "PHILIP_SNAT_BACKFILL_DIR", os.path.join(BASE_DIR, "backfill_checkpoints")
+)
+BACKFILL_WORKERS = int(os.getenv("PHILIP_SNAT_BACKFILL_WORKERS", 4))
+# Requests per second across all workers
+BACKFILL_RATE = float(os.getenv("PHILIP_SNAT_BACKFILL_RATE", 8))
+COPY_BATCH_ROWS = 500
+
+
+class NhlBackfill:
+    """
+    The NHL web API serves schedules, club schedules and standings for any
+    past date, so a day can be rebuilt as it looked going into its games.
+    """
+
+    LEAGUE_NAME = "NHL"
+    MODEL = PhilipSnatNhlGame
+    KEY = "nhl_id"
+
+    def __init__(self):
+        self._getters = {}
+        self._lock = Lock()
+
+    def getter(self, day):
+        # One getter per season, shared by the workers so club schedules and
+        # team stats are fetched once per season
+        season = nhl_get.NhlGetter._compute_season(day)
+        with self._lock:
+            if season not in self._getters:
+                self._getters[season] = nhl_get.NhlGetter(
+                    season=season, point_in_time=True
+                )
+            return self._getters[season]
+
+    def set_rate_limit(self, rate):
+        nhl_get.set_rate_limit(rate)
+
+    def build_day(self, day, stored):
+        """
+        Game rows for one day, plus the team snapshots that had to be computed
+        for it. stored maps (team, date) to snapshots already in the store.
+        """
+        getter = self.getter(day)
+        date_str = day.strftime("%Y-%m-%d")
+        computed = {}
+        rows = []
+        for game in getter.get_schedule(date_str):
+            if game.get("gameType") != 2:
+                continue
+            sides = []
+            for team_id in (game["homeTeam"]["id"], game["awayTeam"]["id"]):
+                try:
+                    team = getter.get_team_name(team_id)
+                except KeyError:
+                    print(f"  Unknown team id in game {game['id']}, skipping")
+                    break
+                snapshot = stored.get((team, day), computed.get(team))
+                if snapshot is None:
+                    snapshot = getter.build_team_snapshot(team_id, date_str)
+                    if snapshot is None:
+                        break
+                    computed[team] = snapshot
+                sides.append(snapshot)
+            if len(sides) == 2:
+                rows.append(getter.assemble_game_features(game, date_str, *sides))
+        return rows, computed
+
+
+BACKFILLS = {
+    "NHL": NhlBackfill,
+}
+
+
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = set(json.load(f)["done"])
+
+    def reset(self):
+        self.done = set()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def mark(self, days):
+        self.done.update(day.isoformat() for day in days)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _copy_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def copy_rows(db, table, rows):
+    """
+    Bulk-insert dict rows with COPY ... FROM STDIN, inside the session's
+    transaction. Missing keys and None become NULL.
+    """
+    if not rows:
+        return
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row.get(col)) for col in columns])
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _days(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def _flush(db, backfill, days, rows, snapshots, store, replace, checkpoint):
+    model = backfill.MODEL
+    key = getattr(model, backfill.KEY)
+    for (team, day), features in snapshots.items():
+        store.save(team, day, features, commit=False)
+    if replace:
+        db.execute(delete(model).where(model.date.in_(days)))
+    elif rows:
+        existing = {
+            value
+            for (value,) in db.execute(
+                select(key).where(key.in_([row[backfill.KEY] for row in rows]))
+            )
+        }
+        rows = [row for row in rows if row[backfill.KEY] not in existing]
+    copy_rows(db, model.__table__, rows)
+    db.commit()
+    checkpoint.mark(days)
+    return len(rows)
+
+
+def run(
+    league,
+    start,
+    end,
+    workers=BACKFILL_WORKERS,
+    rate=BACKFILL_RATE,
+    replace=False,
+    restart=False,
+    fresh_snapshots=False,
+):
+    if league not in BACKFILLS:
+        raise KeyError(
+            f"No backfill for {league}: only {', '.join(BACKFILLS)} can be replayed"
+        )
+    backfill = BACKFILLS[league]()
+    backfill.set_rate_limit(rate)
+
+    checkpoint = Checkpoint(
+        os.path.join(CHECKPOINT_DIR, f"{league.lower()}_{start}_{end}.json")
+    )
+    if restart:
+        checkpoint.reset()
+    days = [day for day in _days(start, end) if day.isoformat() not in checkpoint.done]
+    print(
+        f"[backfill] {league} {start} → {end}: {len(days)} days to replay, "
+        f"{len(checkpoint.done)} already done"
+    )
+    if not days:
+        return 0
+
+    db = SessionLocal()
+    try:
+        store = TeamSnapshotStore(db, league)
+        stored = {} if fresh_snapshots else store.load_range(start, end)
+        db.rollback()
+        print(f"[backfill] Reusing {len(stored)} stored team snapshots")
+
+        started_at = time.perf_counter()
+        inserted = 0
+        failed = []
+        pending_days, pending_rows, pending_snapshots = [], [], {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(backfill.build_day, day, stored): day for day in days
+            }
+            for future in as_completed(futures):
+                day = futures[future]
+                try:
+                    rows, computed = future.result()
+                except Exception as e:
+                    print(f"  {day}: failed — {e}")
+                    failed.append(day)
+                    continue
+                print(
+                    f"  {day}: {len(rows)} games, "
+                    f"{len(computed)} team snapshots computed"
+                )
+                pending_days.append(day)
+                pending_rows.extend(rows)
+                pending_snapshots.update(
+                    {(team, day): features for team, features in computed.items()}
+                )
+                if len(pending_rows) >= COPY_BATCH_ROWS:
+                    inserted += _flush(
+                        db,
+                        backfill,
+                        pending_days,
+                        pending_rows,
+                        pending_snapshots,
+                        store,
+                        replace,
+                        checkpoint,
+                    )
+                    pending_days, pending_rows, pending_snapshots = [], [], {}
+
+        if pending_days:
+            inserted += _flush(
+                db,
+                backfill,
+                pending_days,
+                pending_rows,
+                pending_snapshots,
+                store,
+                replace,
+                checkpoint,
+            )
+
+        print(
+            f"[backfill] Done — inserted {inserted} games in "
+            f"{time.perf_counter() - started_at:.1f}s"
+        )
+        if failed:
+            print(
+                f"[backfill] {len(failed)} days failed and will be retried on the "
+                f"next run: {', '.join(str(day) for day in sorted(failed))}"
+            )
+        return inserted
+    finally:
+        db.close()
+
+
+def _date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("league", choices=sorted(BACKFILLS))
+    parser.add_argument("start", type=_date)
+    parser.add_argument("end", type=_date)
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    parser.add_argument("--rate", type=float, default=BACKFILL_RATE)
+    parser.add_argument("--replace", action="store_true")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint")
+    parser.add_argument(
+        "--fresh-snapshots",
+        action="store_true",
+        help="recompute team snapshots instead of reusing stored ones",
+    )
+    args = parser.parse_args()
+    if args.end < args.start or args.end >= date.today():
+        parser.error("the range must be in the past and end on or after start")
+    run(
+        args.league,
+        args.start,
+        args.end,
+        workers=args.workers,
+        rate=args.rate,
+        replace=args.replace,
+        restart=args.restart,
+        fresh_snapshots=args.fresh_snapshots,
+    )
@@ -0,0 +1,84 @@
+import json
+import os
+
+import numpy as np
+from sqlalchemy import distinct, select
+
+FEATURE_BATCH_SIZE = 500
+
+
+def fit_encoders(df, columns):
+    """
+    Label encoders for categorical feature columns, fitted on training data:
+    column -> {value: index} over the sorted distinct values.
+    """
+    return {
+        col: {str(v): i for i, v in enumerate(sorted(df[col].dropna().unique()))}
+        for col in columns
+        if col in df.columns
+    }
+
+
+def save_encoders(path, encoders):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(encoders, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_encoders(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def encoders_from_db(db, columns):
+    """
+    Fallback for models trained before encoders were persisted: encode against
+    the distinct values stored in the table, as prediction used to.
+    """
+    encoders = {}
+    for name, column in columns.items():
+        values = db.execute(select(distinct(column)).where(column.isnot(None)))
+        encoders[name] = {str(v): i for i, v in enumerate(sorted(v for (v,) in values))}
+    return encoders
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def feature_matrix(rows, attributes, encoders, parsers=None):
+    """
+    Build an (n_rows, n_attributes) float32 array from row mappings keyed by
+    attribute name. Categorical columns go through the encoders (unknown or
+    missing values become -1), other columns through an optional per-column
+    parser, and anything missing or unparsable becomes 0.
+    """
+    parsers = parsers or {}
+    matrix = np.zeros((len(rows), len(attributes)), dtype=np.float32)
+    for j, col in enumerate(attributes):
+        encoder = encoders.get(col)
+        parse = parsers.get(col, _to_float)
+        if encoder is not None:
+            matrix[:, j] = [
+                -1 if row[col] is None else encoder.get(str(row[col]), -1)
+                for row in rows
+            ]
+        else:
+            matrix[:, j] = [
+                0.0 if row[col] is None or row[col] == "" else parse(row[col])
+                for row in rows
+            ]
+    return matrix
+
+
+def stream_rows(db, stmt, batch_size=FEATURE_BATCH_SIZE):
+    """Yield the rows of stmt in batches of at most batch_size, server-side."""
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield partition
@@ -3,17 +3,20 @@ import torch.nn as nn
 import pandas as pd
 import os
 from datetime import date
-from philip_snat_models.khl.ai.models.models_classes import WinnerModel, GoalsModel, Prediction
+from philip_snat_models.khl.ai.models.models_classes import WinnerModel, GoalsModel
+from philip_snat_models.prediction_state import file_digest
 from philip_snat_models.khl.ai.models.model_utils import (
     getAttributes,
-    get_games_to_predict,
-    get_games_to_predict_df,
     WINNER_STRATEGY,
     GOALS_STRATEGY,
 )
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Loaded models kept resident per process, keyed by model name; an entry is
+# reused until the .pth file on disk changes (e.g. after a retrain).
+_loaded_models = {}
+
 
 def _model_path(name):
     return os.path.join(BASE_DIR, f"{name}.pth")
@@ -42,6 +45,10 @@ def load_model(STRATEGY):
                     fit_goals()
 
     if os.path.exists(model_path):
+        mtime = os.path.getmtime(model_path)
+        cached = _loaded_models.get(model_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
         if model_name == WINNER_STRATEGY["name"]:
             model = WinnerModel()
         elif model_name == GOALS_STRATEGY["name"]:
@@ -50,6 +57,7 @@ def load_model(STRATEGY):
             return None
         model.load_state_dict(torch.load(model_path, weights_only=True))
         model.eval()
+        _loaded_models[model_name] = (mtime, model)
         return model
     else:
         print(f"Model file not found: {model_path}")
@@ -140,92 +148,36 @@ def _record_update(model_name):
         )
 
 
-def predict_all_from_df(df):
+def model_version():
+    # Loading first lets a due retrain happen before the files are digested
+    if load_model(WINNER_STRATEGY) is None or load_model(GOALS_STRATEGY) is None:
+        return None
+    return file_digest(
+        _model_path(WINNER_STRATEGY["name"]), _model_path(GOALS_STRATEGY["name"])
+    )
+
+
+def predict_features(winner_X, goals_X):
+    """
+    Score feature matrices built by philip_snat_models.features.feature_matrix
+    in WINNER_STRATEGY / GOALS_STRATEGY attribute order. Returns the away-win
+    probabilities and the total, home and away goal distributions as arrays,
+    or None when the models are missing.
+    """
     winner_model = load_model(WINNER_STRATEGY)
     goals_model = load_model(GOALS_STRATEGY)
 
     if winner_model is None or goals_model is None:
         print("KHL models not found — skipping prediction")
-        return []
-
-    winner_predictions = _predict_from_df(WINNER_STRATEGY, winner_model, df)
-    goals_predictions = _predict_from_df(GOALS_STRATEGY, goals_model, df)
-
-    all_game_ids = set(winner_predictions.keys()) | set(goals_predictions.keys())
-    results = []
-
-    for game_id in all_game_ids:
-        winner_pred = winner_predictions.get(game_id)
-        goals_pred = goals_predictions.get(game_id)
-
-        if goals_pred:
-            home_team = goals_pred["home_team"]
-            away_team = goals_pred["away_team"]
-            pred_date = goals_pred["date"]
-        elif winner_pred:
-            home_team = winner_pred["home_team"]
-            away_team = winner_pred["away_team"]
-            pred_date = winner_pred["date"]
-        else:
-            continue
-
-        new_prediction = Prediction(home_team, away_team, game_id, pred_date)
-
-        if winner_pred:
-            new_prediction.add_winner(winner_pred["winner"])
-
-        if goals_pred:
-            for goal_count, prob in goals_pred["total_goals"].items():
-                new_prediction.add_total_goal(goal_count, prob)
-            for goal_count, prob in goals_pred["home_goals"].items():
-                new_prediction.add_home_goal(goal_count, prob)
-            for goal_count, prob in goals_pred["away_goals"].items():
-                new_prediction.add_away_goal(goal_count, prob)
-
-        results.append(new_prediction)
-
-    return results
-
-
-def _predict_from_df(strategy, model, df):
-    X, df_predict = get_games_to_predict_df(strategy, df)
-
-    if X.empty:
-        return {}
+        return None
 
-    X_tensor = torch.FloatTensor(X.values)
-    model.eval()
     with torch.no_grad():
-        predictions = model(X_tensor)
-
-    results = {}
-    for i, (idx, row) in enumerate(df_predict.iterrows()):
-        game_id = int(row["game_id"])
-
-        if strategy["name"] == GOALS_STRATEGY["name"]:
-            total_probs = predictions["total"][i].numpy()
-            home_probs = predictions["home"][i].numpy()
-            away_probs = predictions["away"][i].numpy()
-
-            results[game_id] = {
-                "home_team": str(row["home_team"]),
-                "away_team": str(row["away_team"]),
-                "date": row["date"],
-                "total_goals": {k: round(float(total_probs[k]), 4) for k in range(11)},
-                "home_goals": {k: round(float(home_probs[k]), 4) for k in range(6)},
-                "away_goals": {k: round(float(away_probs[k]), 4) for k in range(6)},
-            }
-        else:
-            pred_value = (
-                predictions[i].item()
-                if hasattr(predictions[i], "item")
-                else float(predictions[i])
-            )
-            results[game_id] = {
-                "home_team": str(row["home_team"]),
-                "away_team": str(row["away_team"]),
-                "date": row["date"],
-                "winner": round(float(pred_value), 4),
-            }
-
-    return results
+        winner = winner_model(torch.from_numpy(winner_X)).reshape(-1).numpy()
+        goals = goals_model(torch.from_numpy(goals_X))
+
+    return (
+        winner,
+        goals["total"].numpy(),
+        goals["home"].numpy(),
+        goals["away"].numpy(),
+    )
@@ -3,8 +3,20 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 import os
 
+from philip_snat_models.features import fit_encoders, save_encoders
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_FILE = os.path.join(BASE_DIR, "..", "..", "data", "games_khl.csv")
+# Categorical label encoders fitted at training time, reused for prediction
+ENCODERS_FILE = os.path.join(BASE_DIR, "encoders.json")
+
+PERCENTAGE_COLUMNS = [
+    "HPK%", "APK%", "PK%Diff",
+    "HPP%", "APP%", "PP%Diff",
+    "HSV%", "ASV%", "SV%Diff",
+]
+TIME_COLUMNS = ["HPMpG", "APMpG"]
+CATEGORICAL_COLUMNS = ["HLGD", "ALGD", "HLGPA", "ALGPA", "HLGOP", "ALGOP"]
 
 WINNER_STRATEGY = {
     "attributes": [
@@ -63,9 +75,23 @@ def time_to_minutes(time_str):
         return 0.0
 
 
-def normalize_dataframe(df, df_full=None, include_winner=False):
+def percent_to_float(value):
+    try:
+        return float(str(value).replace("%", ""))
+    except ValueError:
+        return 0.0
+
+
+FEATURE_PARSERS = {
+    **{col: percent_to_float for col in PERCENTAGE_COLUMNS},
+    **{col: time_to_minutes for col in TIME_COLUMNS},
+}
+
+
+def normalize_dataframe(df, df_full=None, include_winner=False, encoders=None):
     if df_full is None:
         df_full = df
+    encoders = encoders or {}
 
     df = df.copy()
 
@@ -74,26 +100,24 @@ def normalize_dataframe(df, df_full=None, include_winner=False):
         if col in df.columns:
             df[col] = df[col].astype(bool).astype(int)
 
-    percentage_columns = [
-        "HPK%", "APK%", "PK%Diff",
-        "HPP%", "APP%", "PP%Diff",
-        "HSV%", "ASV%", "SV%Diff",
-    ]
-    for col in percentage_columns:
+    for col in PERCENTAGE_COLUMNS:
         if col in df.columns:
             df[col] = df[col].astype(str).str.replace("%", "").astype(float)
 
-    time_columns = ["HPMpG", "APMpG"]
-    for col in time_columns:
+    for col in TIME_COLUMNS:
         if col in df.columns:
             df[col] = df[col].apply(time_to_minutes)
 
-    categorical_columns = ["HLGD", "ALGD", "HLGPA", "ALGPA", "HLGOP", "ALGOP"]
+    categorical_columns = list(CATEGORICAL_COLUMNS)
     if include_winner:
         categorical_columns.append("winner")
 
     for col in categorical_columns:
-        if col in df.columns:
+        if col not in df.columns:
+            continue
+        if col in encoders:
+            df[col] = df[col].astype(str).map(encoders[col]).fillna(-1)
+        else:
             all_unique_values = sorted(df_full[col].dropna().unique())
             label_encoder = {val: idx for idx, val in enumerate(all_unique_values)}
             df[col] = df[col].map(label_encoder).fillna(-1)
@@ -102,10 +126,15 @@ def normalize_dataframe(df, df_full=None, include_winner=False):
 
 
 def getAttributes(strategy, split=None):
-    df = pd.read_csv(strategy["filePath"])
+    # Categoricals are read as text so the encoders match the DB string columns
+    df = pd.read_csv(
+        strategy["filePath"], dtype={col: str for col in CATEGORICAL_COLUMNS}
+    )
     df = df.dropna(subset=["winner"])
     df = df[df["winner"].str.strip() != ""]
-    df = normalize_dataframe(df, include_winner=True)
+    encoders = fit_encoders(df, CATEGORICAL_COLUMNS)
+    save_encoders(ENCODERS_FILE, encoders)
+    df = normalize_dataframe(df, include_winner=True, encoders=encoders)
 
     attribute_columns = strategy["attributes"]
     available_attrs = [col for col in attribute_columns if col in df.columns]
@@ -11,12 +11,14 @@ from philip_snat_models.khl.const import (
 )
 import philip_snat_models.khl.utils.utils as utils
 from app.models.philip_snat_khl_game import PhilipSnatKhlGame
+from philip_snat_models.team_snapshots import TeamSnapshotStore
 
 
 class Getter:
     def __init__(self, logger, db):
         self.logger = logger
         self.db = db
+        self.snapshots = TeamSnapshotStore(db, "KHL")
         self.team_stats_quant = None
         self.download_stats_quant()
 
@@ -184,30 +186,50 @@ class Getter:
 
         self.logger.log(1, f"{i}. Game {home_name} vs {away_name}", color=clr.CYAN, bold=True)
 
-        home_stats = self.get_team_stats_quant(home_name)
-        away_stats = self.get_team_stats_quant(away_name)
-        home_last_5 = self.get_team_last_5_games(home_name)
-        away_last_5 = self.get_team_last_5_games(away_name)
-
-        self._add_game_to_db(
-            game_id, home_name, away_name, home_stats, away_stats,
-            home_last_5, away_last_5, date_str, hour,
-        )
-
-    def _add_game_to_db(
-        self, game_id, home_name, away_name, home_stats, away_stats,
-        home_last_5, away_last_5, date_str, hour,
-    ):
-        home_last = home_last_5[0]
-        away_last = away_last_5[0]
-        h5lgw = sum(1 for g in home_last_5 if g.get("decision") == "win")
-        a5lgw = sum(1 for g in away_last_5 if g.get("decision") == "win")
-
         try:
             game_date = datetime.datetime.strptime(date_str, "%d-%m-%Y").date()
         except ValueError:
             game_date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
 
+        home = self.snapshots.get(
+            home_name, game_date, lambda: self.build_team_snapshot(home_name)
+        )
+        away = self.snapshots.get(
+            away_name, game_date, lambda: self.build_team_snapshot(away_name)
+        )
+        if home is None or away is None:
+            self.logger.log_error(2, f"Missing team snapshot for game {game_id}, skipping")
+            return
+
+        self._add_game_to_db(game_id, home_name, away_name, home, away, game_date, hour)
+
+    def build_team_snapshot(self, team_name):
+        """
+        One team's stats and last-5-games summary going into a game day, as
+        stored in the team-day feature store.
+        """
+        last_5 = self.get_team_last_5_games(team_name)
+        if not last_5:
+            return None
+        last = last_5[0]
+        return {
+            "stats": self.get_team_stats_quant(team_name),
+            "last_game": {
+                "decision": last.get("decision"),
+                "played_as": last.get("played_as"),
+                "opponent_rank": last.get("opponent_rank"),
+            },
+            "l5gw": sum(1 for g in last_5 if g.get("decision") == "win"),
+        }
+
+    def _add_game_to_db(self, game_id, home_name, away_name, home, away, game_date, hour):
+        home_stats = home["stats"]
+        away_stats = away["stats"]
+        home_last = home["last_game"]
+        away_last = away["last_game"]
+        h5lgw = home["l5gw"]
+        a5lgw = away["l5gw"]
+
         game = PhilipSnatKhlGame(
             khl_id=int(game_id),
             date=game_date,
@@ -1,18 +1,91 @@
 import csv
 import os
-import pandas as pd
 from datetime import date, datetime
 
+from sqlalchemy import select, update
+
 from app.core.database import SessionLocal
 from app.models.philip_snat_khl_game import PhilipSnatKhlGame
+from philip_snat_models.features import (
+    encoders_from_db,
+    feature_matrix,
+    load_encoders,
+    stream_rows,
+)
 from philip_snat_models.model_interface import AiModelInterface
+from philip_snat_models.prediction_state import (
+    feature_hash,
+    needs_prediction,
+    prediction_rows,
+)
 from philip_snat_models.khl.logger import Logger
 from philip_snat_models.khl.get import Getter
-from philip_snat_models.khl.ai.models.model_handler import predict_all_from_df
+from philip_snat_models.khl.ai.models.model_handler import (
+    model_version,
+    predict_features,
+)
+from philip_snat_models.khl.ai.models.model_utils import (
+    CATEGORICAL_COLUMNS,
+    ENCODERS_FILE,
+    FEATURE_PARSERS,
+    WINNER_STRATEGY,
+    GOALS_STRATEGY,
+)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PREDICTIONS_DIR = os.path.normpath(os.path.join(BASE_DIR, "..", "predictions"))
 
+FEATURE_COLUMNS = list(
+    dict.fromkeys(WINNER_STRATEGY["attributes"] + GOALS_STRATEGY["attributes"])
+)
+
+# Model feature name -> games table column
+FEATURE_DB_COLUMNS = {
+    "HRank": PhilipSnatKhlGame.h_rank,
+    "ARank": PhilipSnatKhlGame.a_rank,
+    "RankDiff": PhilipSnatKhlGame.rank_diff,
+    "HGpG": PhilipSnatKhlGame.h_gpg,
+    "AGpG": PhilipSnatKhlGame.a_gpg,
+    "GpGDiff": PhilipSnatKhlGame.gpg_diff,
+    "HPK%": PhilipSnatKhlGame.h_pk_pct,
+    "APK%": PhilipSnatKhlGame.a_pk_pct,
+    "PK%Diff": PhilipSnatKhlGame.pk_pct_diff,
+    "HPMpG": PhilipSnatKhlGame.h_pm_pg,
+    "APMpG": PhilipSnatKhlGame.a_pm_pg,
+    "PMpGDiff": PhilipSnatKhlGame.pm_pg_diff,
+    "HPP%": PhilipSnatKhlGame.h_pp_pct,
+    "APP%": PhilipSnatKhlGame.a_pp_pct,
+    "PP%Diff": PhilipSnatKhlGame.pp_pct_diff,
+    "HPPGApG": PhilipSnatKhlGame.h_ppg_apg,
+    "APPGApG": PhilipSnatKhlGame.a_ppg_apg,
+    "PPGApGDiff": PhilipSnatKhlGame.ppg_apg_diff,
+    "HSV%": PhilipSnatKhlGame.h_sv_pct,
+    "ASV%": PhilipSnatKhlGame.a_sv_pct,
+    "SV%Diff": PhilipSnatKhlGame.sv_pct_diff,
+    "HSVpG": PhilipSnatKhlGame.h_svpg,
+    "ASVpG": PhilipSnatKhlGame.a_svpg,
+    "SVpGDiff": PhilipSnatKhlGame.svpg_diff,
+    "HSpG": PhilipSnatKhlGame.h_spg,
+    "ASpG": PhilipSnatKhlGame.a_spg,
+    "SpGDiff": PhilipSnatKhlGame.spg_diff,
+    "HLGD": PhilipSnatKhlGame.h_lgd,
+    "ALGD": PhilipSnatKhlGame.a_lgd,
+    "HLGPA": PhilipSnatKhlGame.h_lgpa,
+    "ALGPA": PhilipSnatKhlGame.a_lgpa,
+    "HLGOP": PhilipSnatKhlGame.h_lgop,
+    "ALGOP": PhilipSnatKhlGame.a_lgop,
+    "LGOPDiff": PhilipSnatKhlGame.lgop_diff,
+    "HL5GW": PhilipSnatKhlGame.h_l5gw,
+    "AL5GW": PhilipSnatKhlGame.a_l5gw,
+    "L5GWDiff": PhilipSnatKhlGame.l5gw_diff,
+    "hom_score_no_ot": PhilipSnatKhlGame.hom_score_no_ot,
+}
+
+
+def _distribution(probs):
+    return {str(k): round(float(p), 4) for k, p in enumerate(probs)}
+
+
 CSV_HEADERS = [
     "date",
     "home",
@@ -81,6 +154,7 @@ class KhlAiModel(AiModelInterface):
             getter = Getter(logger, db)
             getter.get_new_games(for_tomorrow=False)
             getter.get_new_games(for_tomorrow=True)
+            logger.log(2, getter.snapshots.summary())
         finally:
             db.close()
 
@@ -89,128 +163,127 @@ class KhlAiModel(AiModelInterface):
         try:
             today = date.today()
 
-            today_file = os.path.join(
-                PREDICTIONS_DIR, f"{self.LEAGUE_NAME}-{today}.csv"
-            )
-            if os.path.exists(today_file):
+            version = model_version()
+            if version is None:
+                print("[KHL predict] KHL models not found — skipping prediction")
+                return
+
+            encoders = load_encoders(ENCODERS_FILE)
+            if encoders is None:
                 print(
-                    f"[KHL predict] Prediction file for today already exists: {today_file}, skipping"
+                    f"[KHL predict] {ENCODERS_FILE} not found — "
+                    f"encoding categoricals from the games table"
+                )
+                encoders = encoders_from_db(
+                    db, {col: FEATURE_DB_COLUMNS[col] for col in CATEGORICAL_COLUMNS}
                 )
-                return
 
-            games = (
-                db.query(PhilipSnatKhlGame)
-                .filter(
+            # Only the upcoming games' feature columns are read, in batches,
+            # straight from SQL; the game history is never loaded.
+            stmt = (
+                select(
+                    PhilipSnatKhlGame.id,
+                    PhilipSnatKhlGame.date,
+                    PhilipSnatKhlGame.home_team,
+                    PhilipSnatKhlGame.away_team,
+                    PhilipSnatKhlGame.prediction_winner,
+                    PhilipSnatKhlGame.prediction_home_goals,
+                    PhilipSnatKhlGame.prediction_hash,
+                    PhilipSnatKhlGame.prediction_model_version,
+                    *[
+                        column.label(name)
+                        for name, column in FEATURE_DB_COLUMNS.items()
+                    ],
+                )
+                .where(
                     PhilipSnatKhlGame.winner.is_(None),
                     PhilipSnatKhlGame.date >= today,
                 )
-                .all()
+                .order_by(PhilipSnatKhlGame.date, PhilipSnatKhlGame.id)
             )
-            print(f"[KHL predict] Found {len(games)} upcoming games")
 
-            if not games:
-                print("[KHL predict] No games to predict")
-                return
+            upcoming = 0
+            updates = []
+            for batch in stream_rows(db, stmt):
+                upcoming += len(batch)
+                pending = []
+                for game in batch:
+                    features_hash = feature_hash(
+                        [game._mapping[c] for c in FEATURE_COLUMNS]
+                    )
+                    if needs_prediction(game, features_hash, version):
+                        pending.append((game, features_hash))
+                if not pending:
+                    continue
 
-            all_games = (
-                db.query(PhilipSnatKhlGame).order_by(PhilipSnatKhlGame.date.asc()).all()
-            )
-            df = self._games_to_dataframe(all_games)
+                rows = [game._mapping for game, _ in pending]
+                predictions = predict_features(
+                    feature_matrix(
+                        rows,
+                        WINNER_STRATEGY["attributes"],
+                        encoders,
+                        FEATURE_PARSERS,
+                    ),
+                    feature_matrix(
+                        rows, GOALS_STRATEGY["attributes"], encoders, FEATURE_PARSERS
+                    ),
+                )
+                if predictions is None:
+                    return
 
-            predictions = predict_all_from_df(df)
-            for p in predictions:
-                p.calculate_events()
+                for (game, features_hash), winner, total, home, away in zip(
+                    pending, *predictions
+                ):
+                    winner = round(float(winner), 4)
+                    updates.append(
+                        {
+                            "id": game.id,
+                            "prediction_winner": winner,
+                            "prediction_goals": _distribution(total),
+                            "prediction_home_goals": _distribution(home),
+                            "prediction_away_goals": _distribution(away),
+                            "prediction_hash": features_hash,
+                            "prediction_model_version": version,
+                        }
+                    )
+                    print(
+                        f"  {game.home_team} vs {game.away_team} ({game.date}): "
+                        f"1ML={1 - winner:.2%} 2ML={winner:.2%}"
+                    )
 
-            rows = []
-            for p in predictions:
-                game = (
-                    db.query(PhilipSnatKhlGame)
-                    .filter(PhilipSnatKhlGame.khl_id == p.game_id)
-                    .first()
-                )
-                if game:
-                    try:
-                        from sqlalchemy import Table, MetaData
+            print(
+                f"[KHL predict] Found {upcoming} upcoming games, "
+                f"{len(updates)} new or changed scored, "
+                f"{upcoming - len(updates)} unchanged"
+            )
+            if not upcoming:
+                print("[KHL predict] No games to predict")
+                return
 
-                        metadata = MetaData()
-                        table = Table(
-                            "philip_snat_khl_games", metadata, autoload_with=db.bind
-                        )
-                        prediction_goals = (
-                            {str(k): float(v) for k, v in p.total_goals.items()}
-                            if p.total_goals
-                            else None
-                        )
-                        db.execute(
-                            table.update()
-                            .where(table.c.id == game.id)
-                            .values(
-                                prediction_winner=(
-                                    p.winner if p.winner is not None else None
-                                ),
-                                prediction_goals=prediction_goals,
-                            )
-                        )
-                        db.commit()
-                    except Exception as db_error:
-                        print(
-                            f"  Error saving predictions for game {p.game_id}: {db_error}"
-                        )
-                        db.rollback()
+            if updates:
+                try:
+                    db.execute(update(PhilipSnatKhlGame), updates)
+                    db.commit()
+                except Exception as db_error:
+                    print(f"  Error saving predictions: {db_error}")
+                    db.rollback()
 
-                rows.append(
-                    {
-                        "date": str(p.date),
-                        "home": p.home_team,
-                        "away": p.away_team,
-                        "1ML": round(p.ML1, 4),
-                        "2ML": round(p.ML2, 4),
-                        "X": round(p.X, 4),
-                        "1": round(p.homeReg, 4),
-                        "2": round(p.awayReg, 4),
-                        "1X": round(p.X1, 4),
-                        "2X": round(p.X2, 4),
-                        "over3.5": round(p.o35, 4),
-                        "over4.5": round(p.o45, 4),
-                        "over5.5": round(p.o55, 4),
-                        "over6.5": round(p.o65, 4),
-                        "over7.5": round(p.o75, 4),
-                        "over8.5": round(p.o85, 4),
-                        "under3.5": round(p.u35, 4),
-                        "under4.5": round(p.u45, 4),
-                        "under5.5": round(p.u55, 4),
-                        "under6.5": round(p.u65, 4),
-                        "under7.5": round(p.u75, 4),
-                        "under8.5": round(p.u85, 4),
-                        "home_over1.5": round(p.homeOver15, 4),
-                        "home_over2.5": round(p.homeOver25, 4),
-                        "home_over3.5": round(p.homeOver35, 4),
-                        "home_over4.5": round(p.homeOver45, 4),
-                        "away_over1.5": round(p.awayOver15, 4),
-                        "away_over2.5": round(p.awayOver25, 4),
-                        "away_over3.5": round(p.awayOver35, 4),
-                        "away_over4.5": round(p.awayOver45, 4),
-                        "home_-1.5": round(p.homeHandi15, 4),
-                        "away_-1.5": round(p.awayHandi15, 4),
-                        "home/o4.5": round(p.homeAndOver45, 4),
-                        "home/o5.5": round(p.homeAndOver55, 4),
-                        "home/o6.5": round(p.homeAndOver65, 4),
-                        "home/u4.5": round(p.homeAndUnder45, 4),
-                        "home/u5.5": round(p.homeAndUnder55, 4),
-                        "home/u6.5": round(p.homeAndUnder65, 4),
-                        "away/o4.5": round(p.awayAndOver45, 4),
-                        "away/o5.5": round(p.awayAndOver55, 4),
-                        "away/o6.5": round(p.awayAndOver65, 4),
-                        "away/u4.5": round(p.awayAndUnder45, 4),
-                        "away/u5.5": round(p.awayAndUnder55, 4),
-                        "away/u6.5": round(p.awayAndUnder65, 4),
-                    }
-                )
-                print(
-                    f"  {p.home_team} vs {p.away_team} ({p.date}): "
-                    f"1ML={p.ML1:.2%} 2ML={p.ML2:.2%} over4.5={p.o45:.2%}"
+            # The day's CSV always reflects every stored prediction, not just
+            # the games scored by this run.
+            predicted = (
+                db.query(PhilipSnatKhlGame)
+                .filter(
+                    PhilipSnatKhlGame.winner.is_(None),
+                    PhilipSnatKhlGame.date >= today,
+                    PhilipSnatKhlGame.prediction_winner.isnot(None),
                 )
-
+                .order_by(PhilipSnatKhlGame.date, PhilipSnatKhlGame.id)
+                .all()
+            )
+            rows = [
+                {k: round(v, 4) if isinstance(v, float) else v for k, v in row.items()}
+                for row in prediction_rows(predicted, CSV_HEADERS)
+            ]
             if rows:
                 self._save_predictions_csv(rows, PREDICTIONS_DIR, today)
 
@@ -218,67 +291,6 @@ class KhlAiModel(AiModelInterface):
         finally:
             db.close()
 
-    def _games_to_dataframe(self, games):
-        rows = []
-        for g in games:
-            rows.append(
-                {
-                    "game_id": g.khl_id,
-                    "date": str(g.date),
-                    "hour": g.hour or "",
-                    "home_team": g.home_team,
-                    "away_team": g.away_team,
-                    "winner": g.winner or "",
-                    "home_score": g.home_score,
-                    "away_score": g.away_score,
-                    "home_score_no_ot": g.home_score_no_ot,
-                    "away_score_no_ot": g.away_score_no_ot,
-                    "total_score": g.total_score,
-                    "total_score_no_ot": g.total_score_no_ot,
-                    "OT": g.ot,
-                    "SO": g.so,
-                    "HRank": g.h_rank,
-                    "ARank": g.a_rank,
-                    "RankDiff": g.rank_diff,
-                    "HGpG": g.h_gpg,
-                    "AGpG": g.a_gpg,
-                    "GpGDiff": g.gpg_diff,
-                    "HPK%": g.h_pk_pct,
-                    "APK%": g.a_pk_pct,
-                    "PK%Diff": g.pk_pct_diff,
-                    "HPMpG": g.h_pm_pg,
-                    "APMpG": g.a_pm_pg,
-                    "PMpGDiff": g.pm_pg_diff,
-                    "HPP%": g.h_pp_pct,
-                    "APP%": g.a_pp_pct,
-                    "PP%Diff": g.pp_pct_diff,
-                    "HPPGApG": g.h_ppg_apg,
-                    "APPGApG": g.a_ppg_apg,
-                    "PPGApGDiff": g.ppg_apg_diff,
-                    "HSV%": g.h_sv_pct,
-                    "ASV%": g.a_sv_pct,
-                    "SV%Diff": g.sv_pct_diff,
-                    "HSVpG": g.h_svpg,
-                    "ASVpG": g.a_svpg,
-                    "SVpGDiff": g.svpg_diff,
-                    "HSpG": g.h_spg,
-                    "ASpG": g.a_spg,
-                    "SpGDiff": g.spg_diff,
-                    "HLGD": g.h_lgd,
-                    "ALGD": g.a_lgd,
-                    "HLGPA": g.h_lgpa,
-                    "ALGPA": g.a_lgpa,
-                    "HLGOP": g.h_lgop,
-                    "ALGOP": g.a_lgop,
-                    "LGOPDiff": g.lgop_diff,
-                    "HL5GW": g.h_l5gw,
-                    "AL5GW": g.a_l5gw,
-                    "L5GWDiff": g.l5gw_diff,
-                    "hom_score_no_ot": g.hom_score_no_ot,
-                }
-            )
-        return pd.DataFrame(rows)
-
     def _save_predictions_csv(self, rows, out_dir, today):
         os.makedirs(out_dir, exist_ok=True)
         filename = f"KHL-{today.strftime('%Y-%m-%d')}.csv"
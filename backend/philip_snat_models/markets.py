@@ -0,0 +1,99 @@
+import numpy as np
+
+TOTAL_LINES = (3.5, 4.5, 5.5, 6.5, 7.5, 8.5)
+TEAM_LINES = (1.5, 2.5, 3.5, 4.5)
+COMBO_LINES = (4.5, 5.5, 6.5)
+HANDICAP = 1.5
+
+
+def distribution_matrix(distributions, size=None):
+    """
+    Stack goal-count distributions (dicts keyed by int or str goal counts)
+    into an (n_games, size) probability array.
+    """
+    keyed = [{int(k): float(v) for k, v in d.items()} for d in distributions]
+    if size is None:
+        size = max((max(d) + 1 for d in keyed if d), default=1)
+    matrix = np.zeros((len(keyed), size))
+    for row, d in enumerate(keyed):
+        for goals, p in d.items():
+            if 0 <= goals < size:
+                matrix[row, goals] = p
+    return matrix
+
+
+def _under(cdf, line):
+    # P(goals < line) is the CDF at floor(line); lines past the last goal
+    # count take the whole distribution.
+    return cdf[:, min(int(line), cdf.shape[1] - 1)]
+
+
+def derive_markets(winner, home, away, total):
+    """
+    Derive all markets for a batch of games from the winner probability (away
+    win, shape (n,)) and home/away/total goal distributions (shape (n, k)).
+    Returns a dict of market name -> array of shape (n,).
+    """
+    winner = np.asarray(winner, dtype=float)
+    home = np.atleast_2d(np.asarray(home, dtype=float))
+    away = np.atleast_2d(np.asarray(away, dtype=float))
+    total = np.atleast_2d(np.asarray(total, dtype=float))
+
+    scores = home[:, :, None] * away[:, None, :]
+    margin = np.subtract.outer(np.arange(home.shape[1]), np.arange(away.shape[1]))
+
+    markets = {}
+    markets["1ML"] = 1.0 - winner
+    markets["2ML"] = winner
+    markets["X"] = scores[:, margin == 0].sum(axis=1)
+    markets["1"] = scores[:, margin > 0].sum(axis=1)
+    markets["2"] = scores[:, margin < 0].sum(axis=1)
+    markets["1X"] = markets["1"] + markets["X"]
+    markets["2X"] = markets["2"] + markets["X"]
+
+    total_cdf = np.cumsum(total, axis=1)
+    for line in TOTAL_LINES:
+        markets[f"under{line}"] = _under(total_cdf, line)
+        markets[f"over{line}"] = 1.0 - markets[f"under{line}"]
+
+    home_cdf = np.cumsum(home, axis=1)
+    away_cdf = np.cumsum(away, axis=1)
+    for line in TEAM_LINES:
+        markets[f"home_over{line}"] = 1.0 - _under(home_cdf, line)
+        markets[f"away_over{line}"] = 1.0 - _under(away_cdf, line)
+
+    markets[f"home_-{HANDICAP}"] = scores[:, margin > HANDICAP].sum(axis=1)
+    markets[f"away_-{HANDICAP}"] = scores[:, margin < -HANDICAP].sum(axis=1)
+
+    for line in COMBO_LINES:
+        markets[f"home/o{line}"] = markets[f"over{line}"] * markets["1"]
+        markets[f"home/u{line}"] = markets[f"under{line}"] * markets["1"]
+        markets[f"away/o{line}"] = markets[f"over{line}"] * markets["2"]
+        markets[f"away/u{line}"] = markets[f"under{line}"] * markets["2"]
+
+    return markets
+
+
+def market_rows(markets, headers):
+    """
+    Split batched markets into one dict per game, keeping only the markets
+    listed in headers.
+    """
+    names = [h for h in headers if h in markets]
+    columns = [markets[name].tolist() for name in names]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def predict_markets(winners, home_goals, away_goals, total_goals, headers):
+    """
+    Per-game market rows from per-game winner probabilities (None counts as
+    0.5) and goal distribution dicts.
+    """
+    winner = [0.5 if w is None else float(w) for w in winners]
+    markets = derive_markets(
+        winner,
+        distribution_matrix(home_goals),
+        distribution_matrix(away_goals),
+        distribution_matrix(total_goals),
+    )
+    return market_rows(markets, headers)
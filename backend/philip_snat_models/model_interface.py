@@ -16,3 +16,6 @@ class AiModelInterface(ABC):
     @abstractmethod
     def predict(self):
         pass
+
+    def reset_run_state(self):
+        """Drop data fetched by earlier stages before a resident model runs again."""
@@ -0,0 +1,160 @@
+"""
+Keeps league models resident and runs their stages on request.
+
+League model modules (and with them torch, sklearn, pandas and the trained
+artifacts) are only imported when a league is first used. ModelServer can be
+used in-process, or started as a long-lived process serving a local Unix
+socket so the runner and the API share one warm copy of every model:
+
+    python3 philip_snat_models/model_server.py [--preload NHL,KHL]
+
+Requests are single JSON lines, {"league": "NHL", "stage": "predict"}, answered
+with {"ok": true, "seconds": 1.2} or {"ok": false, "error": "..."}.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# League name -> "module:class", imported on first use
+MODEL_CLASSES = {
+    "NHL": "philip_snat_models.nhl.model:NhlAiModel",
+    "KHL": "philip_snat_models.khl.model:KhlAiModel",
+    "SHL": "philip_snat_models.shl.model:ShlAiModel",
+    "NL": "philip_snat_models.nl.model:NlAiModel",
+}
+STAGES = ("update_games", "download_new_games", "predict")
+
+SOCKET_PATH = os.getenv("PHILIP_SNAT_MODEL_SOCKET", "/tmp/philip_snat_models.sock")
+CLIENT_TIMEOUT = int(os.getenv("PHILIP_SNAT_MODEL_CLIENT_TIMEOUT", 3600))
+
+
+def load_model_class(league):
+    if league not in MODEL_CLASSES:
+        raise KeyError(f"Unknown league: {league}")
+    module_name, class_name = MODEL_CLASSES[league].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class ModelServer:
+    def __init__(self):
+        self._models = {}
+        self._locks = {league: threading.Lock() for league in MODEL_CLASSES}
+
+    def get(self, league):
+        model = self._models.get(league)
+        if model is None:
+            started_at = time.perf_counter()
+            model = load_model_class(league)()
+            self._models[league] = model
+            print(
+                f"[model-server] {league} loaded in "
+                f"{time.perf_counter() - started_at:.1f}s"
+            )
+        return model
+
+    def run(self, league, stage):
+        if league not in MODEL_CLASSES:
+            raise KeyError(f"Unknown league: {league}")
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        # One stage at a time per league; different leagues run concurrently
+        with self._locks[league]:
+            started_at = time.perf_counter()
+            resident = league in self._models
+            model = self.get(league)
+            if resident:
+                model.reset_run_state()
+            getattr(model, stage)()
+            return time.perf_counter() - started_at
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # Connection probe from ModelClient.available()
+            return
+        try:
+            request = json.loads(line)
+            seconds = self.server.models.run(request["league"], request["stage"])
+            response = {"ok": True, "seconds": seconds}
+        except Exception as e:
+            traceback.print_exc()
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, models):
+        self.models = models
+        super().__init__(path, _RequestHandler)
+
+
+def serve(path=SOCKET_PATH, preload=()):
+    models = ModelServer()
+    for league in preload:
+        models.get(league)
+
+    if os.path.exists(path):
+        os.unlink(path)
+    with _UnixServer(path, models) as server:
+        # The API and runner containers connect as different users
+        os.chmod(path, 0o666)
+        print(f"[model-server] Listening on {path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(path)
+
+
+class ModelClient:
+    def __init__(self, path=SOCKET_PATH, timeout=CLIENT_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+
+    def available(self):
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(self.path)
+            return True
+        except OSError:
+            return False
+
+    def run(self, league, stage):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            sock.sendall(
+                json.dumps({"league": league, "stage": stage}).encode() + b"\n"
+            )
+            with sock.makefile("rb") as f:
+                line = f.readline()
+        if not line:
+            raise RuntimeError(f"Model server closed the connection ({league} {stage})")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["seconds"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--preload", default="", help="comma-separated leagues")
+    args = parser.parse_args()
+    serve(args.socket, [l for l in args.preload.split(",") if l])
@@ -78,3 +78,29 @@ def average_distributions(predictions, keys):
         vals = [p.get(key, 0.0) for p in predictions]
         means[key] = sum(vals) / len(vals)
     return means
+
+
+def run_ensemble_batch(attr_matrix, models, keys):
+    """
+    Batched run_ensemble + average_distributions: one predict_proba call per
+    model for the whole matrix. Returns an (n_rows, len(keys)) array of class
+    probabilities averaged over the models that succeeded.
+    """
+    attr_matrix = np.asarray(attr_matrix, dtype=float)
+    key_index = {k: i for i, k in enumerate(keys)}
+    totals = np.zeros((len(attr_matrix), len(keys)))
+    succeeded = 0
+    for name, model in models.items():
+        try:
+            proba = model.predict_proba(attr_matrix)
+        except Exception as e:
+            print(f"[ensemble] {name} failed: {e}")
+            continue
+        for col, c in enumerate(model.classes_):
+            idx = key_index.get(str(int(c)))
+            if idx is not None:
+                totals[:, idx] += proba[:, col]
+        succeeded += 1
+    if succeeded:
+        totals /= succeeded
+    return totals
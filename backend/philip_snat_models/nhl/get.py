@@ -1,20 +1,38 @@
+import hashlib
+import json
+import os
 import time
 import requests
 from datetime import datetime, timedelta
-from threading import Semaphore
+from pathlib import Path
+from threading import Lock, Semaphore
+
+from philip_snat_models.rate_limit import RateLimiter
 
 _api_semaphore = Semaphore(2)
+# Optional process-wide request rate limit, set by bulk jobs such as backfills
+_rate_limiter = None
+
 
+def set_rate_limit(requests_per_second):
+    global _rate_limiter
+    _rate_limiter = RateLimiter(requests_per_second) if requests_per_second else None
 
-def _safe_get(url, max_retries=3, base_delay=0.5):
+
+def _safe_get(url, max_retries=3, base_delay=0.5, headers=None, session=None):
     response = None
     for attempt in range(max_retries):
         try:
             if attempt > 0:
                 time.sleep(base_delay * (attempt + 1))
             with _api_semaphore:
-                response = requests.get(url, timeout=10)
-                time.sleep(base_delay)
+                if _rate_limiter is not None:
+                    _rate_limiter.wait()
+                response = (session or requests).get(url, headers=headers, timeout=10)
+                if _rate_limiter is None:
+                    time.sleep(base_delay)
+            if response.status_code == 304:
+                return response
             if response.status_code == 200 and response.text.strip():
                 return response
             elif response.status_code == 429:
@@ -151,6 +169,89 @@ class LastGameDetails:
         self.SO = SO
 
 
+class ResponseCache:
+    """
+    URL-keyed JSON cache for one getter instance. With a cache_dir, bodies are
+    also kept on disk together with their ETag/Last-Modified validators and
+    revalidated with a conditional request the first time they are used.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.session = requests.Session()
+        self._entries = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def _path(self, url):
+        return self.cache_dir / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+    def _load_disk(self, url):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(url)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_disk(self, url, response, data):
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        if not self.cache_dir or not any(validators.values()):
+            return
+        tmp_path = self._path(url).with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"url": url, **validators, "data": data}, f)
+        os.replace(tmp_path, self._path(url))
+
+    def get_json(self, url):
+        with self._lock:
+            if url in self._entries:
+                self.hits += 1
+                return self._entries[url]
+
+        headers = {}
+        stored = self._load_disk(url)
+        if stored:
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
+
+        response = _safe_get(url, headers=headers or None, session=self.session)
+        if response.status_code == 304 and stored:
+            data = stored["data"]
+            self.revalidated += 1
+        else:
+            data = response.json()
+            self._save_disk(url, response, data)
+            self.misses += 1
+
+        with self._lock:
+            self._entries[url] = data
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.revalidated = 0
+
+    def summary(self):
+        return (
+            f"{self.misses} fetched, {self.revalidated} revalidated, "
+            f"{self.hits} served from memory"
+        )
+
+
 class NhlGetter:
     NHL_API_BASE = "https://api.nhle.com"
     NHL_WEB_API_BASE = "https://api-web.nhle.com"
@@ -163,6 +264,7 @@ class NhlGetter:
         "&cayenneExp=gameTypeId=2%20and%20seasonId%3C={season}%20and%20seasonId%3E={season}"
     )
     STANDINGS_NOW = f"{NHL_WEB_API_BASE}/v1/standings/now"
+    STANDINGS_DATE_TEMPLATE = f"{NHL_WEB_API_BASE}/v1/standings/{{date}}"
     CLUB_SCHEDULE_SEASON_TEMPLATE = (
         f"{NHL_WEB_API_BASE}/v1/club-schedule-season/{{abbr}}/{{season}}"
     )
@@ -176,14 +278,22 @@ class NhlGetter:
     A_H = 0.7
     A_A = 0.8
 
-    def __init__(self):
-        self._season = self._compute_season()
+    def __init__(self, cache_dir=None, season=None, point_in_time=False):
+        self._pinned_season = season
+        self._season = season or self._compute_season()
+        self.cache = ResponseCache(
+            cache_dir or os.environ.get("PHILIP_SNAT_NHL_CACHE_DIR")
+        )
+        # Historical replays rank teams by the standings as of the replayed
+        # day instead of the current ones
+        self.point_in_time = point_in_time
+        self._conference_ranks = {}
 
     @staticmethod
-    def _compute_season():
-        now = datetime.now()
-        y = now.year
-        return f"{y}{y + 1}" if now.month >= 9 else f"{y - 1}{y}"
+    def _compute_season(day=None):
+        day = day or datetime.now()
+        y = day.year
+        return f"{y}{y + 1}" if day.month >= 9 else f"{y - 1}{y}"
 
     def get_team_name(self, team_id):
         return NHL_FROM_ID_MAP[team_id]
@@ -194,33 +304,47 @@ class NhlGetter:
     def get_team_abbr(self, team_id):
         return NHL_TEAM_MAP[NHL_FROM_ID_MAP[team_id]]
 
-    def get_conference_rank(self, team_id):
-        response = _safe_get(self.STANDINGS_NOW)
-        target = self.get_team_name(team_id)
-        for place in response.json()["standings"]:
-            if place["teamName"]["default"] == target:
-                return int(place["conferenceSequence"])
-        return 0
+    def reset_cache(self):
+        self.cache.clear()
+        self._conference_ranks = {}
+        self._season = self._pinned_season or self._compute_season()
+
+    def get_conference_rank(self, team_id, date_str=None):
+        if self.point_in_time and date_str:
+            url = self.STANDINGS_DATE_TEMPLATE.format(date=date_str)
+        else:
+            url = self.STANDINGS_NOW
+        ranks = self._conference_ranks.get(url)
+        if ranks is None:
+            ranks = {
+                place["teamName"]["default"]: int(place["conferenceSequence"])
+                for place in self.cache.get_json(url)["standings"]
+            }
+            self._conference_ranks[url] = ranks
+        return ranks.get(self.get_team_name(team_id), 0)
 
     def get_team_stats(self, team_id):
         url = self.TEAM_SUMMARY_FULL_TEMPLATE.format(
             team_id=team_id, season=self._season
         )
-        return _safe_get(url).json()["data"][0]
+        return self.cache.get_json(url)["data"][0]
 
     def get_schedule(self, date_str):
         url = self.SCHEDULE_TEMPLATE.format(date=date_str)
-        data = _safe_get(url).json()
+        data = self.cache.get_json(url)
         return data["gameWeek"][0]["games"]
 
     def get_game_boxscore(self, game_id):
         url = self.GAMECENTER_BOXSCORE_TEMPLATE.format(game_id=game_id)
-        return _safe_get(url).json()
+        return self.cache.get_json(url)
 
-    def get_last_games(self, team_id, n, skip_first=False, custom_date=None):
+    def get_club_schedule(self, team_id):
         abbr = self.get_team_abbr(team_id).lower()
         url = self.CLUB_SCHEDULE_SEASON_TEMPLATE.format(abbr=abbr, season=self._season)
-        schedule_data = _safe_get(url).json()
+        return self.cache.get_json(url)
+
+    def get_last_games(self, team_id, n, skip_first=False, custom_date=None):
+        schedule_data = self.get_club_schedule(team_id)
 
         if "games" not in schedule_data:
             return []
@@ -289,9 +413,7 @@ class NhlGetter:
         return result
 
     def get_last_game_details(self, team_id, skip_first=False, custom_date=None):
-        abbr = self.get_team_abbr(team_id).lower()
-        url = self.CLUB_SCHEDULE_SEASON_TEMPLATE.format(abbr=abbr, season=self._season)
-        schedule_data = _safe_get(url).json()
+        schedule_data = self.get_club_schedule(team_id)
 
         if "games" not in schedule_data:
             return None
@@ -353,7 +475,7 @@ class NhlGetter:
             return LastGameDetails(
                 LGD=1 if h_score > a_score else 0,
                 LGPA=0,
-                LGOP=self.get_conference_rank(a_id),
+                LGOP=self.get_conference_rank(a_id, cutoff_str),
                 DaysBetween=days,
                 OT=OT,
                 SO=SO,
@@ -362,7 +484,7 @@ class NhlGetter:
             return LastGameDetails(
                 LGD=0 if h_score > a_score else 1,
                 LGPA=1,
-                LGOP=self.get_conference_rank(h_id),
+                LGOP=self.get_conference_rank(h_id, cutoff_str),
                 DaysBetween=days,
                 OT=OT,
                 SO=SO,
@@ -373,22 +495,17 @@ class NhlGetter:
         goals = games[game_number].get_goals_for_team(team_id)
         return round(gpg - goals, 2)
 
-    def get_hunger_for_goals(
-        self, home_id, away_id, home_games, away_games, home_gpg, away_gpg
-    ):
-        hunger_home = 0
-        hunger_away = 0
-        for i in range(min(4, len(home_games))):
-            game = home_games[i]
-            goals = game.get_goals_for_team(home_id)
-            mult = self.H_H if game.home_id == home_id else self.H_A
-            hunger_home += ((home_gpg - goals) / (i + 1)) * mult
-        for i in range(min(4, len(away_games))):
-            game = away_games[i]
-            goals = game.get_goals_for_team(away_id)
-            mult = self.A_A if game.away_id == away_id else self.A_H
-            hunger_away += ((away_gpg - goals) / (i + 1)) * mult
-        return round(hunger_home + hunger_away, 3)
+    def get_team_hunger(self, team_id, games, gpg, is_home):
+        hunger = 0
+        for i in range(min(4, len(games))):
+            game = games[i]
+            goals = game.get_goals_for_team(team_id)
+            if is_home:
+                mult = self.H_H if game.home_id == team_id else self.H_A
+            else:
+                mult = self.A_A if game.away_id == team_id else self.A_H
+            hunger += ((gpg - goals) / (i + 1)) * mult
+        return hunger
 
     def get_shame_factor(self, last_game, standing, is_home=True):
         lgd, lgpa, lgop = last_game.LGD, last_game.LGPA, last_game.LGOP
@@ -452,79 +569,89 @@ class NhlGetter:
                 wins += 1
         return wins
 
-    def build_game_features(self, game, date_str):
+    def build_team_snapshot(self, team_id, date_str):
         """
-        Compute all feature columns for a single NHL schedule game dict.
-        Returns a dict mapping directly to PhilipSnatNhlGame fields.
-        Returns None if data cannot be collected.
+        Compute one team's features going into the games of date_str, as a
+        JSON-serializable dict for the team-day feature store. Returns None if
+        data cannot be collected.
         """
-        home_id = game["homeTeam"]["id"]
-        away_id = game["awayTeam"]["id"]
-
         try:
-            home_data = self.get_team_stats(home_id)
-            away_data = self.get_team_stats(away_id)
+            data = self.get_team_stats(team_id)
         except Exception as e:
-            print(f"  [get] Failed team stats for game {game['id']}: {e}")
+            print(f"  [get] Failed team stats for team {team_id}: {e}")
             return None
 
-        home_games = self.get_last_games(
-            home_id, 5, skip_first=True, custom_date=date_str
-        )
-        away_games = self.get_last_games(
-            away_id, 5, skip_first=True, custom_date=date_str
-        )
-
-        if len(home_games) < 2 or len(away_games) < 2:
-            print(f"  [get] Not enough history for game {game['id']}, skipping")
+        games = self.get_last_games(team_id, 5, skip_first=True, custom_date=date_str)
+        if len(games) < 2:
+            print(f"  [get] Not enough history for team {team_id}, skipping")
             return None
 
-        home_gpg = round(home_data["goalsForPerGame"], 3)
-        away_gpg = round(away_data["goalsForPerGame"], 3)
-        home_lgpg = round(home_data["goalsAgainstPerGame"], 3)
-        away_lgpg = round(away_data["goalsAgainstPerGame"], 3)
-
-        home_lmd1 = self.get_last_match_difference(home_games, home_id, 0, home_data)
-        away_lmd1 = self.get_last_match_difference(away_games, away_id, 0, away_data)
-        home_lmd2 = self.get_last_match_difference(home_games, home_id, 1, home_data)
-        away_lmd2 = self.get_last_match_difference(away_games, away_id, 1, away_data)
-
-        home_spg = round(home_data["shotsForPerGame"], 3)
-        away_spg = round(away_data["shotsForPerGame"], 3)
-        home_spga = round(home_data["shotsAgainstPerGame"], 3)
-        away_spga = round(away_data["shotsAgainstPerGame"], 3)
-
-        home_standing = self.get_conference_rank(home_id)
-        away_standing = self.get_conference_rank(away_id)
-
-        home_sv = round(
-            1 - (home_data["goalsAgainstPerGame"] / home_data["shotsAgainstPerGame"]), 3
-        )
-        away_sv = round(
-            1 - (away_data["goalsAgainstPerGame"] / away_data["shotsAgainstPerGame"]), 3
+        last_game = self.get_last_game_details(
+            team_id, skip_first=True, custom_date=date_str
         )
+        if last_game is None:
+            print(f"  [get] Missing last game details for team {team_id}, skipping")
+            return None
 
-        lg_home = self.get_last_game_details(
-            home_id, skip_first=True, custom_date=date_str
-        )
-        lg_away = self.get_last_game_details(
-            away_id, skip_first=True, custom_date=date_str
-        )
+        gpg = round(data["goalsForPerGame"], 3)
+        standing = self.get_conference_rank(team_id, date_str)
 
-        if lg_home is None or lg_away is None:
-            print(f"  [get] Missing last game details for game {game['id']}, skipping")
-            return None
+        return {
+            "team_full_name": data["teamFullName"],
+            "standing": standing,
+            "gpg": gpg,
+            "gpga": round(data["goalsAgainstPerGame"], 3),
+            "spg": round(data["shotsForPerGame"], 3),
+            "spga": round(data["shotsAgainstPerGame"], 3),
+            "sv": round(
+                1 - (data["goalsAgainstPerGame"] / data["shotsAgainstPerGame"]), 3
+            ),
+            "lgd": last_game.LGD,
+            "lgpa": last_game.LGPA,
+            "lgop": last_game.LGOP,
+            "dflg": last_game.DaysBetween,
+            "lgot": bool(last_game.OT),
+            "lgso": bool(last_game.SO),
+            "lmd1": self.get_last_match_difference(games, team_id, 0, data),
+            "lmd2": self.get_last_match_difference(games, team_id, 1, data),
+            "l5gw": self.get_l5gw(team_id, games),
+            "shame_home": self.get_shame_factor(last_game, standing, is_home=True),
+            "shame_away": self.get_shame_factor(last_game, standing, is_home=False),
+            "fatigue_home": self.get_fatigue_factor(last_game, is_home=True),
+            "fatigue_away": self.get_fatigue_factor(last_game, is_home=False),
+            "hunger_home": self.get_team_hunger(team_id, games, gpg, is_home=True),
+            "hunger_away": self.get_team_hunger(team_id, games, gpg, is_home=False),
+        }
 
-        sf_home = self.get_shame_factor(lg_home, home_standing, is_home=True)
-        sf_away = self.get_shame_factor(lg_away, away_standing, is_home=False)
+    def build_game_features(self, game, date_str, snapshots=None):
+        """
+        Compute all feature columns for a single NHL schedule game dict.
+        Returns a dict mapping directly to PhilipSnatNhlGame fields.
+        Returns None if data cannot be collected.
 
-        l5gw_home = self.get_l5gw(home_id, home_games)
-        l5gw_away = self.get_l5gw(away_id, away_games)
+        With a TeamSnapshotStore, team snapshots already stored for date_str
+        are reused and new ones are saved.
+        """
+        sides = []
+        for team_id in (game["homeTeam"]["id"], game["awayTeam"]["id"]):
+            if snapshots is None:
+                snapshot = self.build_team_snapshot(team_id, date_str)
+            else:
+                snapshot = snapshots.get(
+                    self.get_team_name(team_id),
+                    date_str,
+                    lambda: self.build_team_snapshot(team_id, date_str),
+                )
+            if snapshot is None:
+                print(f"  [get] Missing team snapshot for game {game['id']}, skipping")
+                return None
+            sides.append(snapshot)
 
-        hunger_fg = self.get_hunger_for_goals(
-            home_id, away_id, home_games, away_games, home_gpg, away_gpg
-        )
+        return self.assemble_game_features(game, date_str, *sides)
 
+    @staticmethod
+    def assemble_game_features(game, date_str, home, away):
+        """Join the home and away team snapshots into one game row."""
         winner = None
         home_goals_no_ot = None
         away_goals_no_ot = None
@@ -551,55 +678,57 @@ class NhlGetter:
         return {
             "nhl_id": game["id"],
             "date": datetime.strptime(date_str, "%Y-%m-%d").date(),
-            "home_team": home_data["teamFullName"],
-            "away_team": away_data["teamFullName"],
+            "home_team": home["team_full_name"],
+            "away_team": away["team_full_name"],
             "winner": winner,
             "home_goals_no_ot": home_goals_no_ot,
             "away_goals_no_ot": away_goals_no_ot,
             "total_goals_no_ot": total_goals_no_ot,
-            "home_standing": home_standing,
-            "away_standing": away_standing,
-            "diff_standing": home_standing - away_standing,
-            "home_gpg": home_gpg,
-            "away_gpg": away_gpg,
-            "home_gpga": home_lgpg,
-            "away_gpga": away_lgpg,
-            "home_sv": home_sv,
-            "away_sv": away_sv,
-            "home_lgd": lg_home.LGD,
-            "away_lgd": lg_away.LGD,
-            "home_lgpa": lg_home.LGPA,
-            "away_lgpa": lg_away.LGPA,
-            "home_lgop": lg_home.LGOP,
-            "away_lgop": lg_away.LGOP,
-            "home_shame_factor": sf_home,
-            "away_shame_factor": sf_away,
-            "outcome_shame_factor": sf_home - sf_away,
-            "home_l5gw": l5gw_home,
-            "away_l5gw": l5gw_away,
-            "diff_l5gw": l5gw_home - l5gw_away,
-            "diff_gpg": round(home_gpg - away_gpg, 3),
-            "diff_gpga": round(home_lgpg - away_lgpg, 3),
-            "diff_sv": round(home_sv - away_sv, 3),
-            "home_dflg": lg_home.DaysBetween,
-            "away_dflg": lg_away.DaysBetween,
-            "home_lgot": bool(lg_home.OT),
-            "away_lgot": bool(lg_away.OT),
-            "home_lgso": bool(lg_home.SO),
-            "away_lgso": bool(lg_away.SO),
-            "home_lmd1": home_lmd1,
-            "away_lmd1": away_lmd1,
-            "home_lmd2": home_lmd2,
-            "away_lmd2": away_lmd2,
-            "home_spg": int(round(home_spg)),
-            "away_spg": int(round(away_spg)),
-            "home_spga": int(round(home_spga)),
-            "away_spga": int(round(away_spga)),
-            "hunger_fg": int(round(hunger_fg)),
-            "lmd1_mutual": int(round(home_lmd1 + away_lmd1)),
-            "mutual_gpg": int(round(home_gpg + away_gpg)),
-            "home_fatigue": int(self.get_fatigue_factor(lg_home, is_home=True)),
-            "away_fatigue": int(self.get_fatigue_factor(lg_away, is_home=False)),
+            "home_standing": home["standing"],
+            "away_standing": away["standing"],
+            "diff_standing": home["standing"] - away["standing"],
+            "home_gpg": home["gpg"],
+            "away_gpg": away["gpg"],
+            "home_gpga": home["gpga"],
+            "away_gpga": away["gpga"],
+            "home_sv": home["sv"],
+            "away_sv": away["sv"],
+            "home_lgd": home["lgd"],
+            "away_lgd": away["lgd"],
+            "home_lgpa": home["lgpa"],
+            "away_lgpa": away["lgpa"],
+            "home_lgop": home["lgop"],
+            "away_lgop": away["lgop"],
+            "home_shame_factor": home["shame_home"],
+            "away_shame_factor": away["shame_away"],
+            "outcome_shame_factor": home["shame_home"] - away["shame_away"],
+            "home_l5gw": home["l5gw"],
+            "away_l5gw": away["l5gw"],
+            "diff_l5gw": home["l5gw"] - away["l5gw"],
+            "diff_gpg": round(home["gpg"] - away["gpg"], 3),
+            "diff_gpga": round(home["gpga"] - away["gpga"], 3),
+            "diff_sv": round(home["sv"] - away["sv"], 3),
+            "home_dflg": home["dflg"],
+            "away_dflg": away["dflg"],
+            "home_lgot": home["lgot"],
+            "away_lgot": away["lgot"],
+            "home_lgso": home["lgso"],
+            "away_lgso": away["lgso"],
+            "home_lmd1": home["lmd1"],
+            "away_lmd1": away["lmd1"],
+            "home_lmd2": home["lmd2"],
+            "away_lmd2": away["lmd2"],
+            "home_spg": int(round(home["spg"])),
+            "away_spg": int(round(away["spg"])),
+            "home_spga": int(round(home["spga"])),
+            "away_spga": int(round(away["spga"])),
+            "hunger_fg": int(
+                round(round(home["hunger_home"] + away["hunger_away"], 3))
+            ),
+            "lmd1_mutual": int(round(home["lmd1"] + away["lmd1"])),
+            "mutual_gpg": int(round(home["gpg"] + away["gpg"])),
+            "home_fatigue": int(home["fatigue_home"]),
+            "away_fatigue": int(away["fatigue_away"]),
         }
 
     @staticmethod
@@ -4,25 +4,24 @@ import joblib
 import torch
 import torch.nn as nn
 import numpy as np
-import pandas as pd
-from sklearn import svm, tree
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.ensemble import (
-    AdaBoostClassifier,
-    RandomForestClassifier,
-    ExtraTreesClassifier,
-    GradientBoostingClassifier,
-)
-from sklearn.linear_model import LogisticRegression
 from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import update
 
 from app.core.database import SessionLocal
 from app.models.philip_snat_nhl_game import PhilipSnatNhlGame
 from app.models.philip_snat_league import PhilipSnatLeague
 from app.models.philip_snat_ai_model import PhilipSnatAiModel
+from philip_snat_models.markets import derive_markets, market_rows
 from philip_snat_models.model_interface import AiModelInterface
+from philip_snat_models.prediction_state import (
+    feature_hash,
+    file_digest,
+    needs_prediction,
+    prediction_rows,
+)
 from philip_snat_models.nhl.get import NhlGetter
-from philip_snat_models.nhl.algorithms import run_ensemble, average_distributions
+from philip_snat_models.team_snapshots import TeamSnapshotStore
+from philip_snat_models.nhl.algorithms import run_ensemble_batch
 
 MODEL_NAMES = ["WINNER_MODEL"]
 
@@ -32,9 +31,13 @@ SCALERS_DIR = os.path.join(BASE_DIR, "scalers")
 TRAINING_CSV = os.path.join(BASE_DIR, "..", "assets", "merge_no_missing.csv")
 PREDICTIONS_DIR = os.path.normpath(os.path.join(BASE_DIR, "..", "predictions"))
 
-ENSEMBLE_GOALS_FILE = os.path.join(SCALERS_DIR, "ensemble_goals.joblib")
-ENSEMBLE_HOME_GOALS_FILE = os.path.join(SCALERS_DIR, "ensemble_home_goals.joblib")
-ENSEMBLE_AWAY_GOALS_FILE = os.path.join(SCALERS_DIR, "ensemble_away_goals.joblib")
+ENSEMBLES_DIR = os.path.join(SCALERS_DIR, "ensembles")
+# Registry name -> artifact file inside a versioned ensembles/<version>/ directory
+ENSEMBLE_FILES = {
+    "GOALS_ENSEMBLE": "goals.joblib",
+    "HOME_GOALS_ENSEMBLE": "home_goals.joblib",
+    "AWAY_GOALS_ENSEMBLE": "away_goals.joblib",
+}
 ENSEMBLE_RETRAIN_DAYS = 30
 
 WINNER_FEATURES = [
@@ -212,46 +215,6 @@ class _WinnerModel(nn.Module):
         return x
 
 
-def _fit_ensemble(attr, labels):
-    print(f"[ensemble] Training on {len(attr)} samples, {len(set(labels))} classes...")
-    models = {}
-
-    _svm = svm.SVC(kernel="rbf", C=300, gamma=0.01, probability=True)
-    _svm.fit(attr, labels)
-    models["svm"] = _svm
-
-    _knn = KNeighborsClassifier(n_neighbors=17)
-    _knn.fit(attr, labels)
-    models["knn"] = _knn
-
-    _dt = tree.DecisionTreeClassifier(max_depth=5, min_samples_split=40)
-    _dt.fit(attr, labels)
-    models["dt"] = _dt
-
-    _gbdt = GradientBoostingClassifier(n_estimators=100, learning_rate=0.01)
-    _gbdt.fit(attr, labels)
-    models["gbdt"] = _gbdt
-
-    _rf = RandomForestClassifier(n_estimators=100, min_samples_split=2)
-    _rf.fit(attr, labels)
-    models["rf"] = _rf
-
-    _et = ExtraTreesClassifier(n_estimators=100, max_depth=14)
-    _et.fit(attr, labels)
-    models["et"] = _et
-
-    _absvm = AdaBoostClassifier(n_estimators=300, learning_rate=0.05)
-    _absvm.fit(attr, labels)
-    models["absvm"] = _absvm
-
-    _lr = LogisticRegression(solver="lbfgs", max_iter=10000)
-    _lr.fit(attr, labels)
-    models["lr"] = _lr
-
-    print(f"[ensemble] Done training {len(models)} classifiers")
-    return models
-
-
 class NhlAiModel(AiModelInterface):
 
     LEAGUE_NAME = "NHL"
@@ -263,6 +226,8 @@ class NhlAiModel(AiModelInterface):
         self._goals_models = None
         self._home_goals_models = None
         self._away_goals_models = None
+        self._ensembles_version = None
+        self._model_version = None
 
     def _get_or_create_league(self, db):
         league = (
@@ -300,8 +265,20 @@ class NhlAiModel(AiModelInterface):
             record.last_update = now
         db.commit()
 
+    def _promotion_changed(self):
+        db = SessionLocal()
+        try:
+            league = self._get_or_create_league(db)
+            records = self._promoted_ensembles(db, league.id)
+        finally:
+            db.close()
+        return {record.version for record in records.values()} != {
+            self._ensembles_version
+        }
+
     def _load_models(self):
-        if self._winner_model is not None:
+        # Resident models pick up a newly promoted version on their next run
+        if self._goals_models is not None and not self._promotion_changed():
             return
 
         winner = _WinnerModel()
@@ -309,76 +286,72 @@ class NhlAiModel(AiModelInterface):
             torch.load(os.path.join(MODELS_DIR, "WINNER_MODEL"), map_location="cpu")
         )
         winner.eval()
-        self._winner_model = winner
-        self._winner_scaler = joblib.load(
-            os.path.join(SCALERS_DIR, "scaler_winner.save")
-        )
-
-        self._train_goal_ensembles()
+        winner_scaler = joblib.load(os.path.join(SCALERS_DIR, "scaler_winner.save"))
 
         db = SessionLocal()
         try:
             league = self._get_or_create_league(db)
+            version, ensembles = self._load_goal_ensembles(db, league.id)
             for name in MODEL_NAMES:
                 self._record_model_load(db, league.id, name)
             print(f"[models] Loaded under league '{self.LEAGUE_NAME}'")
         finally:
             db.close()
 
-    def _train_goal_ensembles(self):
-        ensemble_files = [
-            ENSEMBLE_GOALS_FILE,
-            ENSEMBLE_HOME_GOALS_FILE,
-            ENSEMBLE_AWAY_GOALS_FILE,
-        ]
-
-        if all(os.path.exists(f) for f in ensemble_files):
-            oldest_mtime = min(os.path.getmtime(f) for f in ensemble_files)
-            age_days = (datetime.now().timestamp() - oldest_mtime) / 86400
-            if age_days < ENSEMBLE_RETRAIN_DAYS:
-                print(
-                    f"[train] Ensembles are {age_days:.1f}d old (< {ENSEMBLE_RETRAIN_DAYS}d), loading from cache"
-                )
-                self._goals_models = joblib.load(ENSEMBLE_GOALS_FILE)
-                self._home_goals_models = joblib.load(ENSEMBLE_HOME_GOALS_FILE)
-                self._away_goals_models = joblib.load(ENSEMBLE_AWAY_GOALS_FILE)
-                return
-            print(f"[train] Ensembles are {age_days:.1f}d old — retraining")
-        else:
-            print("[train] No cached ensembles found — training from scratch")
+        # Only set once everything loaded, so a failed load is retried in full
+        self._winner_model = winner
+        self._winner_scaler = winner_scaler
+        self._goals_models = ensembles["GOALS_ENSEMBLE"]
+        self._home_goals_models = ensembles["HOME_GOALS_ENSEMBLE"]
+        self._away_goals_models = ensembles["AWAY_GOALS_ENSEMBLE"]
+        self._ensembles_version = version
+        # Any change to the ensembles or the winner model invalidates stored predictions
+        self._model_version = f"{version}-" + file_digest(
+            os.path.join(MODELS_DIR, "WINNER_MODEL"),
+            os.path.join(SCALERS_DIR, "scaler_winner.save"),
+        )
 
-        if not os.path.exists(TRAINING_CSV):
-            raise FileNotFoundError(f"Training CSV not found: {TRAINING_CSV}")
+    @staticmethod
+    def _promoted_ensembles(db, league_id):
+        return {
+            record.name: record
+            for record in db.query(PhilipSnatAiModel)
+            .filter(
+                PhilipSnatAiModel.philip_snat_league_id == league_id,
+                PhilipSnatAiModel.name.in_(list(ENSEMBLE_FILES)),
+                PhilipSnatAiModel.version.isnot(None),
+            )
+            .all()
+        }
+
+    def _load_goal_ensembles(self, db, league_id):
+        records = self._promoted_ensembles(db, league_id)
+        versions = {record.version for record in records.values()}
+        if len(records) != len(ENSEMBLE_FILES) or len(versions) != 1:
+            raise RuntimeError(
+                "[models] No promoted goal ensembles found. "
+                "Run: make train (philip_snat_models/nhl/train_goals_models.py)"
+            )
 
-        df = pd.read_csv(TRAINING_CSV)
-        df = df.dropna(
-            subset=[GOALS_LABEL_COL, HOME_GOALS_LABEL_COL, AWAY_GOALS_LABEL_COL]
+        version = versions.pop()
+        models = {
+            name: joblib.load(os.path.join(SCALERS_DIR, record.artifact_path))
+            for name, record in records.items()
+        }
+
+        promoted_at = records["GOALS_ENSEMBLE"].last_update
+        age_days = (
+            (datetime.now(timezone.utc) - promoted_at).total_seconds() / 86400
+            if promoted_at
+            else None
         )
-        print(f"[train] {len(df)} rows from {TRAINING_CSV}")
-
-        goals_df = df.dropna(subset=GOALS_CSV_COLS)
-        goals_attr = goals_df[GOALS_CSV_COLS].values.astype(float)
-        goals_labels = goals_df[GOALS_LABEL_COL].astype(int).values.clip(0, 12)
-        print(f"[train] GOALS: {len(goals_df)} samples")
-        self._goals_models = _fit_ensemble(goals_attr, goals_labels)
-
-        home_df = df.dropna(subset=HOME_GOALS_CSV_COLS)
-        home_attr = home_df[HOME_GOALS_CSV_COLS].values.astype(float)
-        home_labels = home_df[HOME_GOALS_LABEL_COL].astype(int).values.clip(0, 6)
-        print(f"[train] HOME_GOALS: {len(home_df)} samples")
-        self._home_goals_models = _fit_ensemble(home_attr, home_labels)
-
-        away_df = df.dropna(subset=AWAY_GOALS_CSV_COLS)
-        away_attr = away_df[AWAY_GOALS_CSV_COLS].values.astype(float)
-        away_labels = away_df[AWAY_GOALS_LABEL_COL].astype(int).values.clip(0, 6)
-        print(f"[train] AWAY_GOALS: {len(away_df)} samples")
-        self._away_goals_models = _fit_ensemble(away_attr, away_labels)
-
-        os.makedirs(SCALERS_DIR, exist_ok=True)
-        joblib.dump(self._goals_models, ENSEMBLE_GOALS_FILE)
-        joblib.dump(self._home_goals_models, ENSEMBLE_HOME_GOALS_FILE)
-        joblib.dump(self._away_goals_models, ENSEMBLE_AWAY_GOALS_FILE)
-        print("[train] Ensemble models saved to cache")
+        print(f"[models] Goal ensembles version {version} loaded")
+        if age_days is not None and age_days >= ENSEMBLE_RETRAIN_DAYS:
+            print(
+                f"[models] Warning: ensembles are {age_days:.1f}d old "
+                f"(>= {ENSEMBLE_RETRAIN_DAYS}d), schedule a retrain"
+            )
+        return version, models
 
     @staticmethod
     def _extract(game, fields):
@@ -390,81 +363,6 @@ class NhlAiModel(AiModelInterface):
             values.append(float(v))
         return values
 
-    @staticmethod
-    def _compute_odds(winner_prob, home_means, away_means, total_means):
-        home_pct = 1.0 - winner_prob
-        away_pct = winner_prob
-
-        prob_home_win = 0.0
-        prob_away_win = 0.0
-        prob_draw = 0.0
-        prob_home_win_by_1_5_plus = 0.0
-        prob_away_win_by_1_5_plus = 0.0
-
-        for hg in TEAM_GOALS_KEYS:
-            for ag in TEAM_GOALS_KEYS:
-                ph = home_means.get(hg, 0.0)
-                pa = away_means.get(ag, 0.0)
-                match_prob = ph * pa
-                hi = int(hg)
-                ai = int(ag)
-
-                if hi > ai:
-                    prob_home_win += match_prob
-                    if hi - ai > 1.5:
-                        prob_home_win_by_1_5_plus += match_prob
-                elif ai > hi:
-                    prob_away_win += match_prob
-                    if ai - hi > 1.5:
-                        prob_away_win_by_1_5_plus += match_prob
-                else:
-                    prob_draw += match_prob
-
-        o = {}
-        o["1ML"] = home_pct
-        o["2ML"] = away_pct
-        o["X"] = prob_draw
-        o["1"] = prob_home_win
-        o["2"] = prob_away_win
-        o["1X"] = prob_home_win + prob_draw
-        o["2X"] = prob_away_win + prob_draw
-
-        o["over4.5"] = 1.0 - sum(total_means.get(str(i), 0.0) for i in range(5))
-        o["over5.5"] = 1.0 - sum(total_means.get(str(i), 0.0) for i in range(6))
-        o["over6.5"] = 1.0 - sum(total_means.get(str(i), 0.0) for i in range(7))
-        o["over7.5"] = 1.0 - sum(total_means.get(str(i), 0.0) for i in range(8))
-        o["over8.5"] = 1.0 - sum(total_means.get(str(i), 0.0) for i in range(9))
-
-        o["under4.5"] = sum(total_means.get(str(i), 0.0) for i in range(5))
-        o["under5.5"] = sum(total_means.get(str(i), 0.0) for i in range(6))
-        o["under6.5"] = sum(total_means.get(str(i), 0.0) for i in range(7))
-        o["under7.5"] = sum(total_means.get(str(i), 0.0) for i in range(8))
-        o["under8.5"] = sum(total_means.get(str(i), 0.0) for i in range(9))
-
-        o["home_over1.5"] = 1.0 - sum(home_means.get(str(i), 0.0) for i in range(2))
-        o["home_over2.5"] = 1.0 - sum(home_means.get(str(i), 0.0) for i in range(3))
-        o["home_over3.5"] = 1.0 - sum(home_means.get(str(i), 0.0) for i in range(4))
-        o["home_over4.5"] = 1.0 - sum(home_means.get(str(i), 0.0) for i in range(5))
-
-        o["away_over1.5"] = 1.0 - sum(away_means.get(str(i), 0.0) for i in range(2))
-        o["away_over2.5"] = 1.0 - sum(away_means.get(str(i), 0.0) for i in range(3))
-        o["away_over3.5"] = 1.0 - sum(away_means.get(str(i), 0.0) for i in range(4))
-        o["away_over4.5"] = 1.0 - sum(away_means.get(str(i), 0.0) for i in range(5))
-
-        o["home_-1.5"] = prob_home_win_by_1_5_plus
-        o["away_-1.5"] = prob_away_win_by_1_5_plus
-
-        o["home/o5.5"] = o["over5.5"] * o["1"]
-        o["home/o6.5"] = o["over6.5"] * o["1"]
-        o["home/u5.5"] = o["under5.5"] * o["1"]
-        o["home/u6.5"] = o["under6.5"] * o["1"]
-        o["away/o5.5"] = o["over5.5"] * o["2"]
-        o["away/o6.5"] = o["over6.5"] * o["2"]
-        o["away/u5.5"] = o["under5.5"] * o["2"]
-        o["away/u6.5"] = o["under6.5"] * o["2"]
-
-        return o
-
     @staticmethod
     def _save_predictions_csv(rows, out_dir, league_name, today):
         os.makedirs(out_dir, exist_ok=True)
@@ -498,6 +396,8 @@ class NhlAiModel(AiModelInterface):
             print(f"[predict] Removed {removed} old prediction file(s)")
 
     def update_games(self):
+        # Responses are only reused within a run; boxscores and schedules change
+        self.getter.reset_cache()
         db = SessionLocal()
         try:
             today = date.today()
@@ -557,6 +457,7 @@ class NhlAiModel(AiModelInterface):
             db.close()
 
     def download_new_games(self):
+        self.getter.reset_cache()
         db = SessionLocal()
         try:
             today = datetime.strptime(self.getter.today(), "%Y-%m-%d")
@@ -567,6 +468,7 @@ class NhlAiModel(AiModelInterface):
                 f"[download_new_games] Scanning {dates[0].date()} and {dates[1].date()}"
             )
             inserted = 0
+            snapshots = TeamSnapshotStore(db, self.LEAGUE_NAME)
 
             for current in dates:
                 date_str = current.strftime("%Y-%m-%d")
@@ -601,7 +503,9 @@ class NhlAiModel(AiModelInterface):
                         continue
 
                     print(f"  Processing {home_name} vs {away_name} ({date_str})")
-                    features = self.getter.build_game_features(game, date_str)
+                    features = self.getter.build_game_features(
+                        game, date_str, snapshots=snapshots
+                    )
                     if features is None:
                         continue
 
@@ -614,6 +518,10 @@ class NhlAiModel(AiModelInterface):
                         print(f"  Error inserting game {game_id}: {e}")
 
             print(f"[download_new_games] Done — inserted {inserted} new games")
+            print(f"[download_new_games] {snapshots.summary()}")
+            print(
+                f"[download_new_games] NHL API requests: {self.getter.cache.summary()}"
+            )
         finally:
             db.close()
 
@@ -636,25 +544,16 @@ class NhlAiModel(AiModelInterface):
                     ]
                     if (
                         "prediction_winner" not in columns
-                        or "prediction_goals" not in columns
+                        or "prediction_hash" not in columns
                     ):
                         print(
-                            "[predict] ERROR: prediction_winner/prediction_goals columns not found in database. "
+                            "[predict] ERROR: prediction columns not found in database. "
                             "Please run: docker-compose exec backend alembic upgrade head"
                         )
                         return
             except Exception as e:
                 print(f"[predict] Warning: Could not verify columns exist: {e}")
 
-            today_file = os.path.join(
-                PREDICTIONS_DIR, f"{self.LEAGUE_NAME}-{today}.csv"
-            )
-            if os.path.exists(today_file):
-                print(
-                    f"[predict] Prediction file for today already exists: {today_file}, skipping"
-                )
-                return
-
             games = (
                 db.query(PhilipSnatNhlGame)
                 .filter(
@@ -665,74 +564,84 @@ class NhlAiModel(AiModelInterface):
             )
             print(f"[predict] Found {len(games)} upcoming games")
 
-            rows = []
+            ready = []
+            hashes = []
+            unchanged = 0
+            winner_matrix = []
+            goals_matrix = []
+            home_goals_matrix = []
+            away_goals_matrix = []
             for game in games:
-                winner_feats = self._extract(game, WINNER_FEATURES)
-                goals_feats = self._extract(game, GOALS_DB_FEATURES)
-                home_goals_feats = self._extract(game, HOME_GOALS_DB_FEATURES)
-                away_goals_feats = self._extract(game, AWAY_GOALS_DB_FEATURES)
-
-                if any(
-                    f is None
-                    for f in [
-                        winner_feats,
-                        goals_feats,
-                        home_goals_feats,
-                        away_goals_feats,
-                    ]
-                ):
+                features = [
+                    self._extract(game, fields)
+                    for fields in (
+                        WINNER_FEATURES,
+                        GOALS_DB_FEATURES,
+                        HOME_GOALS_DB_FEATURES,
+                        AWAY_GOALS_DB_FEATURES,
+                    )
+                ]
+                if any(f is None for f in features):
                     print(f"  Game {game.nhl_id}: missing features, skipping")
                     continue
+                features_hash = feature_hash(*features)
+                if not needs_prediction(game, features_hash, self._model_version):
+                    unchanged += 1
+                    continue
+                ready.append(game)
+                hashes.append(features_hash)
+                winner_matrix.append(features[0])
+                goals_matrix.append(features[1])
+                home_goals_matrix.append(features[2])
+                away_goals_matrix.append(features[3])
 
-                try:
-                    winner_scaled = self._winner_scaler.transform([winner_feats])
-                    with torch.inference_mode():
-                        winner_prob = float(
-                            self._winner_model(torch.FloatTensor(winner_scaled))[0][0]
-                        )
-
-                    goals_preds = run_ensemble(goals_feats, self._goals_models)
-                    home_preds = run_ensemble(home_goals_feats, self._home_goals_models)
-                    away_preds = run_ensemble(away_goals_feats, self._away_goals_models)
-
-                    total_means = average_distributions(goals_preds, TOTAL_GOALS_KEYS)
-                    home_means = average_distributions(home_preds, TEAM_GOALS_KEYS)
-                    away_means = average_distributions(away_preds, TEAM_GOALS_KEYS)
-
-                    odds = self._compute_odds(
-                        winner_prob, home_means, away_means, total_means
+            print(
+                f"[predict] {len(ready)} new or changed games to score, "
+                f"{unchanged} unchanged"
+            )
+            if ready:
+                winner_scaled = self._winner_scaler.transform(np.array(winner_matrix))
+                with torch.inference_mode():
+                    winner_probs = (
+                        self._winner_model(torch.FloatTensor(winner_scaled))[:, 0]
+                        .numpy()
+                        .astype(float)
                     )
 
-                    try:
-                        from sqlalchemy import Table, MetaData
+                total_matrix = run_ensemble_batch(
+                    goals_matrix, self._goals_models, TOTAL_GOALS_KEYS
+                )
+                home_matrix = run_ensemble_batch(
+                    home_goals_matrix, self._home_goals_models, TEAM_GOALS_KEYS
+                )
+                away_matrix = run_ensemble_batch(
+                    away_goals_matrix, self._away_goals_models, TEAM_GOALS_KEYS
+                )
 
-                        metadata = MetaData()
-                        table = Table(
-                            "philip_snat_nhl_games", metadata, autoload_with=db.bind
-                        )
-                        db.execute(
-                            table.update()
-                            .where(table.c.id == game.id)
-                            .values(
-                                prediction_winner=float(winner_prob),
-                                prediction_goals={
-                                    k: float(v) for k, v in total_means.items()
-                                },
-                            )
-                        )
-                        db.commit()
-                    except Exception as db_error:
-                        print(
-                            f"  Error saving predictions for game {game.nhl_id}: {db_error}"
-                        )
-                        db.rollback()
+                game_odds = market_rows(
+                    derive_markets(
+                        winner_probs, home_matrix, away_matrix, total_matrix
+                    ),
+                    CSV_HEADERS,
+                )
 
-                    rows.append(
+                updates = []
+                for i, (game, odds) in enumerate(zip(ready, game_odds)):
+                    updates.append(
                         {
-                            "date": str(game.date),
-                            "home": game.home_team,
-                            "away": game.away_team,
-                            **odds,
+                            "id": game.id,
+                            "prediction_winner": float(winner_probs[i]),
+                            "prediction_goals": dict(
+                                zip(TOTAL_GOALS_KEYS, total_matrix[i].tolist())
+                            ),
+                            "prediction_home_goals": dict(
+                                zip(TEAM_GOALS_KEYS, home_matrix[i].tolist())
+                            ),
+                            "prediction_away_goals": dict(
+                                zip(TEAM_GOALS_KEYS, away_matrix[i].tolist())
+                            ),
+                            "prediction_hash": hashes[i],
+                            "prediction_model_version": self._model_version,
                         }
                     )
                     print(
@@ -741,12 +650,26 @@ class NhlAiModel(AiModelInterface):
                         f"over5.5={odds['over5.5']:.2%}"
                     )
 
-                except Exception as e:
-                    print(f"  Error predicting game {game.nhl_id}: {e}")
-                    import traceback
-
-                    traceback.print_exc()
+                try:
+                    db.execute(update(PhilipSnatNhlGame), updates)
+                    db.commit()
+                except Exception as db_error:
+                    print(f"  Error saving predictions: {db_error}")
+                    db.rollback()
 
+            # The day's CSV always reflects every stored prediction, not just
+            # the games scored by this run.
+            predicted = (
+                db.query(PhilipSnatNhlGame)
+                .filter(
+                    PhilipSnatNhlGame.winner.is_(None),
+                    PhilipSnatNhlGame.date >= today,
+                    PhilipSnatNhlGame.prediction_winner.isnot(None),
+                )
+                .order_by(PhilipSnatNhlGame.date, PhilipSnatNhlGame.id)
+                .all()
+            )
+            rows = prediction_rows(predicted, CSV_HEADERS)
             if rows:
                 self._save_predictions_csv(
                     rows, PREDICTIONS_DIR, self.LEAGUE_NAME, today
@@ -1,11 +1,239 @@
 """
-Goals are now predicted via ensemble ML classifiers (SVM, KNN, DT, RF, ET, AdaBoost, LR)
-trained at runtime from assets/merge_no_missing.csv — exactly the same procedure as NHL-AI-App.
+Trains the NHL goals ensembles (SVM, KNN, DT, GBDT, RF, ET, AdaBoost, LR) from
+assets/merge_no_missing.csv outside of the prediction run.
 
-This file is no longer needed. Training happens automatically inside NhlAiModel._train_goal_ensembles()
-each time runner.py is executed.
+The three ensembles (total, home and away goals) are fitted in parallel worker
+processes and written to scalers/ensembles/<version>/. The new version is then
+promoted for all three in one transaction on philip_snat_ai_models, and
+NhlAiModel only ever loads the promoted version.
+
+Usage:
+    python3 philip_snat_models/nhl/train_goals_models.py [--if-stale]
 """
 
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+import joblib
+import pandas as pd
+from sklearn import svm, tree
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.ensemble import (
+    AdaBoostClassifier,
+    RandomForestClassifier,
+    ExtraTreesClassifier,
+    GradientBoostingClassifier,
+)
+from sklearn.linear_model import LogisticRegression
+
+from app.core.database import SessionLocal
+from app.models.philip_snat_ai_model import PhilipSnatAiModel
+from app.models.philip_snat_league import PhilipSnatLeague
+from philip_snat_models.nhl.model import (
+    AWAY_GOALS_CSV_COLS,
+    AWAY_GOALS_LABEL_COL,
+    ENSEMBLE_FILES,
+    ENSEMBLE_RETRAIN_DAYS,
+    ENSEMBLES_DIR,
+    GOALS_CSV_COLS,
+    GOALS_LABEL_COL,
+    HOME_GOALS_CSV_COLS,
+    HOME_GOALS_LABEL_COL,
+    SCALERS_DIR,
+    TRAINING_CSV,
+    NhlAiModel,
+)
+
+# Registry name -> (feature columns, label column, max label)
+ENSEMBLE_SPECS = {
+    "GOALS_ENSEMBLE": (GOALS_CSV_COLS, GOALS_LABEL_COL, 12),
+    "HOME_GOALS_ENSEMBLE": (HOME_GOALS_CSV_COLS, HOME_GOALS_LABEL_COL, 6),
+    "AWAY_GOALS_ENSEMBLE": (AWAY_GOALS_CSV_COLS, AWAY_GOALS_LABEL_COL, 6),
+}
+ENSEMBLE_KEEP_VERSIONS = 3
+TRAIN_WORKERS = int(os.getenv("PHILIP_SNAT_TRAIN_WORKERS", len(ENSEMBLE_SPECS)))
+
+
+def _fit_ensemble(name, attr, labels):
+    print(
+        f"[ensemble] {name}: training on {len(attr)} samples, "
+        f"{len(set(labels))} classes..."
+    )
+    started_at = time.perf_counter()
+    models = {}
+
+    _svm = svm.SVC(kernel="rbf", C=300, gamma=0.01, probability=True)
+    _svm.fit(attr, labels)
+    models["svm"] = _svm
+
+    _knn = KNeighborsClassifier(n_neighbors=17)
+    _knn.fit(attr, labels)
+    models["knn"] = _knn
+
+    _dt = tree.DecisionTreeClassifier(max_depth=5, min_samples_split=40)
+    _dt.fit(attr, labels)
+    models["dt"] = _dt
+
+    _gbdt = GradientBoostingClassifier(n_estimators=100, learning_rate=0.01)
+    _gbdt.fit(attr, labels)
+    models["gbdt"] = _gbdt
+
+    _rf = RandomForestClassifier(n_estimators=100, min_samples_split=2)
+    _rf.fit(attr, labels)
+    models["rf"] = _rf
+
+    _et = ExtraTreesClassifier(n_estimators=100, max_depth=14)
+    _et.fit(attr, labels)
+    models["et"] = _et
+
+    _absvm = AdaBoostClassifier(n_estimators=300, learning_rate=0.05)
+    _absvm.fit(attr, labels)
+    models["absvm"] = _absvm
+
+    _lr = LogisticRegression(solver="lbfgs", max_iter=10000)
+    _lr.fit(attr, labels)
+    models["lr"] = _lr
+
+    print(
+        f"[ensemble] {name}: done training {len(models)} classifiers "
+        f"in {time.perf_counter() - started_at:.1f}s"
+    )
+    return models
+
+
+def load_training_data():
+    if not os.path.exists(TRAINING_CSV):
+        raise FileNotFoundError(f"Training CSV not found: {TRAINING_CSV}")
+
+    df = pd.read_csv(TRAINING_CSV)
+    df = df.dropna(subset=[GOALS_LABEL_COL, HOME_GOALS_LABEL_COL, AWAY_GOALS_LABEL_COL])
+    print(f"[train] {len(df)} rows from {TRAINING_CSV}")
+
+    data = {}
+    for name, (columns, label_col, max_label) in ENSEMBLE_SPECS.items():
+        subset = df.dropna(subset=columns)
+        attr = subset[columns].values.astype(float)
+        labels = subset[label_col].astype(int).values.clip(0, max_label)
+        print(f"[train] {name}: {len(subset)} samples")
+        data[name] = (attr, labels)
+    return data
+
+
+def train_ensembles(data):
+    with ProcessPoolExecutor(max_workers=TRAIN_WORKERS) as pool:
+        futures = {
+            name: pool.submit(_fit_ensemble, name, attr, labels)
+            for name, (attr, labels) in data.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def write_artifacts(ensembles, version):
+    # Dump into a hidden staging directory and rename it into place, so a
+    # version directory only ever exists once all of its files are complete.
+    final_dir = os.path.join(ENSEMBLES_DIR, version)
+    staging_dir = os.path.join(ENSEMBLES_DIR, f".{version}.tmp")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    for name, models in ensembles.items():
+        joblib.dump(models, os.path.join(staging_dir, ENSEMBLE_FILES[name]))
+    os.replace(staging_dir, final_dir)
+    return final_dir
+
+
+def promote_version(db, league_id, version, artifact_dir):
+    # Lock the league row so concurrent promotions serialize, then switch all
+    # three ensembles in a single commit.
+    db.query(PhilipSnatLeague).filter(
+        PhilipSnatLeague.id == league_id
+    ).with_for_update().one()
+    records = {
+        record.name: record
+        for record in db.query(PhilipSnatAiModel)
+        .filter(
+            PhilipSnatAiModel.philip_snat_league_id == league_id,
+            PhilipSnatAiModel.name.in_(list(ENSEMBLE_FILES)),
+        )
+        .all()
+    }
+    now = datetime.now(timezone.utc)
+    for name, filename in ENSEMBLE_FILES.items():
+        record = records.get(name)
+        if record is None:
+            record = PhilipSnatAiModel(philip_snat_league_id=league_id, name=name)
+            db.add(record)
+        record.version = version
+        record.artifact_path = os.path.relpath(
+            os.path.join(artifact_dir, filename), SCALERS_DIR
+        )
+        record.last_update = now
+    db.commit()
+
+
+def promoted_age_days(db, league_id):
+    record = (
+        db.query(PhilipSnatAiModel)
+        .filter(
+            PhilipSnatAiModel.philip_snat_league_id == league_id,
+            PhilipSnatAiModel.name == "GOALS_ENSEMBLE",
+            PhilipSnatAiModel.version.isnot(None),
+        )
+        .first()
+    )
+    if record is None or record.last_update is None:
+        return None
+    return (datetime.now(timezone.utc) - record.last_update).total_seconds() / 86400
+
+
+def prune_versions(current_version):
+    versions = sorted(
+        entry
+        for entry in os.listdir(ENSEMBLES_DIR)
+        if not entry.startswith(".")
+        and os.path.isdir(os.path.join(ENSEMBLES_DIR, entry))
+    )
+    for version in versions[:-ENSEMBLE_KEEP_VERSIONS]:
+        if version != current_version:
+            shutil.rmtree(os.path.join(ENSEMBLES_DIR, version), ignore_errors=True)
+            print(f"[train] Removed old ensembles version {version}")
+
+
+def run(if_stale=False):
+    db = SessionLocal()
+    try:
+        league = NhlAiModel()._get_or_create_league(db)
+        if if_stale:
+            age_days = promoted_age_days(db, league.id)
+            if age_days is not None and age_days < ENSEMBLE_RETRAIN_DAYS:
+                print(
+                    f"[train] Promoted ensembles are {age_days:.1f}d old "
+                    f"(< {ENSEMBLE_RETRAIN_DAYS}d), nothing to do"
+                )
+                return None
+        # Don't sit in an open transaction while the ensembles train
+        db.rollback()
+
+        started_at = time.perf_counter()
+        ensembles = train_ensembles(load_training_data())
+        version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        artifact_dir = write_artifacts(ensembles, version)
+        promote_version(db, league.id, version, artifact_dir)
+        print(
+            f"[train] Promoted ensembles version {version} "
+            f"in {time.perf_counter() - started_at:.1f}s"
+        )
+        prune_versions(version)
+        return version
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
-    print("Goals ensemble training now happens automatically in runner.py.")
-    print("No separate training step is required.")
+    run(if_stale="--if-stale" in sys.argv[1:])
@@ -5,12 +5,11 @@ import os
 from datetime import date
 from app.core.database import SessionLocal
 from app.models.philip_snat_nl_game import PhilipSnatNlGame
-from philip_snat_models.nl.ai.models.models_classes import WinnerModel, GoalsModel, Prediction
+from philip_snat_models.nl.ai.models.models_classes import WinnerModel, GoalsModel
 from philip_snat_models.nl.ai.models.model_utils import (
     WINNER_STRATEGY,
     GOALS_STRATEGY,
     get_attributes_from_df,
-    get_games_to_predict_from_df,
 )
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -19,6 +18,9 @@ WINNER_MODEL_PATH = os.path.join(MODELS_DIR, "winner_model.pth")
 GOALS_MODEL_PATH = os.path.join(MODELS_DIR, "goals_model.pth")
 MODEL_UPDATES_FILE = os.path.join(MODELS_DIR, "model_updates.csv")
 
+# model name -> (.pth mtime, loaded model)
+_loaded_models = {}
+
 
 def _games_to_dataframe(games):
     rows = []
@@ -116,6 +118,10 @@ def load_model(strategy):
                     fit_goals()
 
     if os.path.exists(model_path):
+        mtime = os.path.getmtime(model_path)
+        cached = _loaded_models.get(model_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
         if model_name == WINNER_STRATEGY["name"]:
             model = WinnerModel(len(WINNER_STRATEGY["attributes"]))
         elif model_name == GOALS_STRATEGY["name"]:
@@ -124,6 +130,7 @@ def load_model(strategy):
             return None
         model.load_state_dict(torch.load(model_path, map_location="cpu"))
         model.eval()
+        _loaded_models[model_name] = (mtime, model)
         return model
     else:
         return None
@@ -344,7 +351,12 @@ def fit_goals(split=0.2, show_plot=False):
     return model
 
 
-def predict_all_from_df(df):
+def predict_features(winner_X, goals_X):
+    """
+    Score feature matrices built by philip_snat_models.features.feature_matrix
+    in WINNER_STRATEGY / GOALS_STRATEGY attribute order. Returns the winner
+    probabilities and the total, home and away goal distributions as arrays.
+    """
     winner_model = load_model(WINNER_STRATEGY)
     goals_model = load_model(GOALS_STRATEGY)
 
@@ -357,96 +369,13 @@ def predict_all_from_df(df):
         winner_model = load_model(WINNER_STRATEGY)
         goals_model = load_model(GOALS_STRATEGY)
 
-    winner_predictions = predict(WINNER_STRATEGY, df, winner_model)
-    goals_predictions = predict(GOALS_STRATEGY, df, goals_model)
-
-    all_game_ids = set(winner_predictions.keys()) | set(goals_predictions.keys())
-    results = []
-
-    for game_id in all_game_ids:
-        winner_pred = winner_predictions.get(game_id)
-        goals_pred = goals_predictions.get(game_id)
-
-        if goals_pred:
-            home_team = goals_pred["home_team"]
-            away_team = goals_pred["away_team"]
-            date = goals_pred["date"]
-        elif winner_pred:
-            home_team = winner_pred["home_team"]
-            away_team = winner_pred["away_team"]
-            date = winner_pred["date"]
-        else:
-            continue
-
-        new_prediction = Prediction(home_team, away_team, game_id, date)
-
-        if winner_pred:
-            new_prediction.add_winner(winner_pred["winner"])
-
-        if goals_pred:
-            for goal_count, prob in goals_pred["total_goals"].items():
-                new_prediction.add_total_goal(goal_count, prob)
-            for goal_count, prob in goals_pred["home_goals"].items():
-                new_prediction.add_home_goal(goal_count, prob)
-            for goal_count, prob in goals_pred["away_goals"].items():
-                new_prediction.add_away_goal(goal_count, prob)
-
-        results.append(new_prediction)
-
-    return results
-
-
-def predict(strategy, df, model):
-    X, df_predict = get_games_to_predict_from_df(df, strategy)
-
-    if X.empty:
-        return {}
-
-    X_tensor = torch.FloatTensor(X.values)
-    model.eval()
     with torch.no_grad():
-        predictions = model(X_tensor)
-
-    results = {}
-    for i, (idx, row) in enumerate(df_predict.iterrows()):
-        game_id = str(row["game_id"])
-
-        if strategy["name"] == GOALS_STRATEGY["name"]:
-            total_probs = predictions["total"][i].numpy()
-            home_probs = predictions["home"][i].numpy()
-            away_probs = predictions["away"][i].numpy()
-
-            total_dict = {}
-            for goal_count in range(11):
-                total_dict[goal_count] = round(float(total_probs[goal_count]), 4)
-
-            home_dict = {}
-            for goal_count in range(6):
-                home_dict[goal_count] = round(float(home_probs[goal_count]), 4)
-
-            away_dict = {}
-            for goal_count in range(6):
-                away_dict[goal_count] = round(float(away_probs[goal_count]), 4)
-
-            results[game_id] = {
-                "home_team": str(row["home_team"]),
-                "away_team": str(row["away_team"]),
-                "date": row["date"],
-                "total_goals": total_dict,
-                "home_goals": home_dict,
-                "away_goals": away_dict,
-            }
-        else:
-            pred_value = (
-                predictions[i].item()
-                if hasattr(predictions[i], "item")
-                else float(predictions[i])
-            )
-            results[game_id] = {
-                "home_team": str(row["home_team"]),
-                "away_team": str(row["away_team"]),
-                "date": row["date"],
-                "winner": round(float(pred_value), 4),
-            }
-
-    return results
+        winner = winner_model(torch.from_numpy(winner_X)).reshape(-1).numpy()
+        goals = goals_model(torch.from_numpy(goals_X))
+
+    return (
+        winner,
+        goals["total"].numpy(),
+        goals["home"].numpy(),
+        goals["away"].numpy(),
+    )
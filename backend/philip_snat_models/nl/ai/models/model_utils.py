@@ -1,7 +1,17 @@
+import os
+
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 
+from philip_snat_models.features import fit_encoders, save_encoders
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Categorical label encoders fitted at training time, reused for prediction
+ENCODERS_FILE = os.path.join(BASE_DIR, "encoders.json")
+
+CATEGORICAL_COLUMNS = ["HLGD", "ALGD", "HLGPA", "ALGPA"]
+
 WINNER_STRATEGY = {
     "attributes": [
         "HRank",
@@ -115,20 +125,25 @@ GOALS_STRATEGY = {
 }
 
 
-def normalize_dataframe(df, df_full=None, include_winner=False):
+def normalize_dataframe(df, df_full=None, include_winner=False, encoders=None):
     df = df.copy()
+    encoders = encoders or {}
 
     boolean_columns = ["OT", "SO"]
     for col in boolean_columns:
         if col in df.columns:
             df[col] = df[col].astype(bool).astype(int)
 
-    categorical_columns = ["HLGD", "ALGD", "HLGPA", "ALGPA"]
+    categorical_columns = list(CATEGORICAL_COLUMNS)
     if include_winner:
         categorical_columns.append("winner")
 
     for col in categorical_columns:
-        if col in df.columns:
+        if col not in df.columns:
+            continue
+        if col in encoders:
+            df[col] = df[col].astype(str).map(encoders[col]).fillna(-1)
+        else:
             all_unique_values = (
                 sorted(df_full[col].dropna().unique())
                 if df_full is not None
@@ -145,7 +160,11 @@ def get_attributes_from_df(df, strategy, split=None):
     df = df[df["winner"].astype(str).str.strip() != ""]
 
     include_winner = "winner" in strategy.get("labels", [])
-    df = normalize_dataframe(df, df_full=df, include_winner=include_winner)
+    encoders = fit_encoders(df, CATEGORICAL_COLUMNS)
+    save_encoders(ENCODERS_FILE, encoders)
+    df = normalize_dataframe(
+        df, df_full=df, include_winner=include_winner, encoders=encoders
+    )
 
     attribute_columns = strategy["attributes"]
 
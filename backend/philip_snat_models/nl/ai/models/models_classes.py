@@ -69,6 +69,3 @@ class Prediction:
 
     def add_winner(self, winner):
         self.winner = winner
-
-    def calculate_events(self):
-        pass
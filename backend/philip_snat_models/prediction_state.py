@@ -0,0 +1,64 @@
+import hashlib
+import json
+
+from philip_snat_models.markets import predict_markets
+
+
+def feature_hash(*feature_groups):
+    """
+    Stable hash of a game's model inputs, stored next to its prediction so a
+    rerun can tell whether the game needs to be scored again.
+    """
+    payload = json.dumps(
+        [
+            [round(v, 6) if isinstance(v, float) else v for v in group]
+            for group in feature_groups
+        ],
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def file_digest(*paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def needs_prediction(game, features_hash, model_version):
+    return (
+        game.prediction_winner is None
+        or game.prediction_home_goals is None
+        or game.prediction_hash != features_hash
+        or game.prediction_model_version != model_version
+    )
+
+
+def prediction_rows(games, headers):
+    """
+    CSV rows for games with a stored prediction, with markets derived from the
+    stored winner probability and goal distributions.
+    """
+    games = [
+        g
+        for g in games
+        if g.prediction_winner is not None
+        and g.prediction_goals
+        and g.prediction_home_goals
+        and g.prediction_away_goals
+    ]
+    odds = predict_markets(
+        [g.prediction_winner for g in games],
+        [g.prediction_home_goals for g in games],
+        [g.prediction_away_goals for g in games],
+        [g.prediction_goals for g in games],
+        headers,
+    )
+    return [
+        {"date": str(g.date), "home": g.home_team, "away": g.away_team, **game_odds}
+        for g, game_odds in zip(games, odds)
+    ]
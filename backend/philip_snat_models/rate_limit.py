@@ -0,0 +1,22 @@
+import time
+from threading import Lock
+
+
+class RateLimiter:
+    """
+    Spaces calls to wait() at least 1 / rate seconds apart across all threads
+    of the process.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._lock = Lock()
+        self._next_at = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next_at)
+            self._next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
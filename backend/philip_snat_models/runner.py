@@ -1,59 +1,153 @@
 import fcntl
+import multiprocessing
+import os
+import queue
 import sys
+import time
+import traceback
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, engine
 from app.models.philip_snat_league import PhilipSnatLeague
-from philip_snat_models.nhl.model import NhlAiModel
-from philip_snat_models.khl.model import KhlAiModel
-from philip_snat_models.shl.model import ShlAiModel
-from philip_snat_models.nl.model import NlAiModel
-
-ALL_MODELS = [
-    NhlAiModel,
-    KhlAiModel,
-    ShlAiModel,
-    NlAiModel,
+from philip_snat_models.model_server import MODEL_CLASSES, ModelClient, ModelServer
+
+# Stage method -> PhilipSnatLeague flag enabling it, in per-league run order
+STAGES = [
+    ("update_games", "update"),
+    ("download_new_games", "download"),
+    ("predict", "predict"),
 ]
 
-LOCK_FILE = "/tmp/philip_snat_runner.lock"
+# Stages that may run on a model server's resident models
+SERVER_STAGES = ("predict",)
 
-if __name__ == "__main__":
-    _lock_fh = open(LOCK_FILE, "w")
+LOCK_FILE = "/tmp/philip_snat_runner.{league}.lock"
+LEAGUE_TIMEOUT = int(os.getenv("PHILIP_SNAT_LEAGUE_TIMEOUT", 3600))
+
+
+def run_league(name, stages, results):
+    # Connections inherited from the parent must not be shared with it
+    engine.dispose(close=False)
+
+    lock_fh = open(LOCK_FILE.format(league=name.lower()), "w")
     try:
-        fcntl.flock(_lock_fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        fcntl.flock(lock_fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
     except BlockingIOError:
-        print("[runner] Another instance is already running — exiting.")
-        sys.exit(0)
+        print(f"[{name}] Another runner is already processing this league — skipping")
+        results.put((name, "(lock)", "locked", 0.0))
+        lock_fh.close()
+        return
+
+    try:
+        # Predict uses the resident models of a running model server when there
+        # is one. Every other stage, and predict without a server, runs in this
+        # process so the league timeout can actually stop it: terminating a
+        # client would leave its stage running in the server.
+        client = ModelClient()
+        server = client if client.available() else None
+        local = ModelServer()
+        for stage in stages:
+            print(f"=== [{name}] {stage} ===")
+            started_at = time.perf_counter()
+            models = server if server and stage in SERVER_STAGES else local
+            try:
+                models.run(name, stage)
+            except Exception:
+                traceback.print_exc()
+                results.put((name, stage, "failed", time.perf_counter() - started_at))
+                return
+            results.put((name, stage, "ok", time.perf_counter() - started_at))
+    finally:
+        fcntl.flock(lock_fh, fcntl.LOCK_UN)
+        lock_fh.close()
+
 
+def print_summary(timings, plans, wall_seconds):
+    print("[runner] Timing summary")
+    for name, stages in plans.items():
+        for stage, status, seconds in timings[name]:
+            print(f"  {name:<4} {stage:<20} {status:<8} {seconds:8.1f}s")
+        done = {stage for stage, _, _ in timings[name]}
+        for stage in stages:
+            if stage not in done:
+                print(f"  {name:<4} {stage:<20} skipped")
+    print(f"[runner] Finished in {wall_seconds:.1f}s")
+
+
+def run(league_timeout=LEAGUE_TIMEOUT):
+    db = SessionLocal()
     try:
-        db = SessionLocal()
+        leagues = {row.name: row for row in db.query(PhilipSnatLeague).all()}
+    finally:
+        db.close()
+
+    plans = {}
+    for name in MODEL_CLASSES:
+        league = leagues.get(name)
+        if league is None:
+            print(f"[{name}] No league row found in DB, skipping")
+            continue
+        stages = [stage for stage, flag in STAGES if getattr(league, flag)]
+        if stages:
+            plans[name] = stages
+
+    results = multiprocessing.Queue()
+    running = {}
+    started_at = time.monotonic()
+    for name, stages in plans.items():
+        process = multiprocessing.Process(
+            target=run_league,
+            args=(name, stages, results),
+            name=f"runner-{name}",
+        )
+        process.start()
+        running[name] = process
+
+    timings = {name: [] for name in plans}
+    failed = False
+    while running:
         try:
-            leagues = {row.name: row for row in db.query(PhilipSnatLeague).all()}
-        finally:
-            db.close()
+            name, stage, status, seconds = results.get(timeout=1)
+            timings[name].append((stage, status, seconds))
+            failed = failed or status == "failed"
+        except queue.Empty:
+            pass
 
-        for ModelClass in ALL_MODELS:
-            league = leagues.get(ModelClass.LEAGUE_NAME)
-            if league is None:
-                print(f"[{ModelClass.LEAGUE_NAME}] No league row found in DB, skipping")
-                continue
+        for name, process in list(running.items()):
+            if not process.is_alive():
+                process.join()
+                del running[name]
+                if process.exitcode != 0:
+                    # Crashed without reporting; its unreported stages show as skipped
+                    failed = True
+                    print(f"[{name}] Exited with code {process.exitcode}")
+            elif time.monotonic() - started_at > league_timeout:
+                process.terminate()
+                process.join()
+                del running[name]
+                failed = True
+                # Stages run in order, so the first unreported one is the stuck
+                # one; with none left the process hung while shutting down
+                done = {stage for stage, _, _ in timings[name]}
+                stage = next((s for s in plans[name] if s not in done), "(shutdown)")
+                elapsed = time.monotonic() - started_at
+                seconds = elapsed - sum(s for _, _, s in timings[name])
+                timings[name].append((stage, "timeout", seconds))
+                print(f"[{name}] Timed out after {league_timeout}s during {stage}")
 
-            model = ModelClass()
+    while True:
+        try:
+            name, stage, status, seconds = results.get_nowait()
+        except queue.Empty:
+            break
+        timings[name].append((stage, status, seconds))
+        failed = failed or status == "failed"
 
-            if league.update:
-                print(f"=== [{league.name}] update_games ===")
-                model.update_games()
+    print_summary(timings, plans, time.monotonic() - started_at)
+    return not failed
 
-            if league.download:
-                print(f"=== [{league.name}] download_new_games ===")
-                model.download_new_games()
 
-            if league.predict:
-                print(f"=== [{league.name}] predict ===")
-                model.predict()
-    finally:
-        fcntl.flock(_lock_fh, fcntl.LOCK_UN)
-        _lock_fh.close()
+if __name__ == "__main__":
+    sys.exit(0 if run() else 1)
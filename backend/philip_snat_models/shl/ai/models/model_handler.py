@@ -13,6 +13,9 @@ from philip_snat_models.shl.ai.models.model_utils import (
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# model name -> (.pth mtime, loaded model)
+_loaded_models = {}
+
 
 def _model_path(name):
     return os.path.join(BASE_DIR, f"{name}.pth")
@@ -41,6 +44,10 @@ def load_model(strategy, training_df=None):
                     fit_winner(show_learning_curve=False, training_df=training_df)
 
     if os.path.exists(model_path):
+        mtime = os.path.getmtime(model_path)
+        cached = _loaded_models.get(model_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
         if model_name == WINNER_STRATEGY["name"]:
             model = WinnerModel()
         elif model_name == GOALS_STRATEGY["name"]:
@@ -49,6 +56,7 @@ def load_model(strategy, training_df=None):
             return None
         model.load_state_dict(torch.load(model_path, weights_only=True))
         model.eval()
+        _loaded_models[model_name] = (mtime, model)
         return model
     else:
         print(f"Model file not found: {model_path}")
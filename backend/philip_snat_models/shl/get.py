@@ -70,7 +70,7 @@ class ShlGetter:
                 games.append(game)
         return games
 
-    def get_team_stats(self, tag, is_home=True):
+    def get_team_stats(self, tag):
         code = detag(tag)
         uuid = uuid_by_code(code)
         if not uuid:
@@ -100,8 +100,6 @@ class ShlGetter:
         if gpg is None or gapg is None:
             return None
 
-        sf = self.get_shame_factor(tag, last_games, is_home)
-        hfg = self.get_hunger_for_goals(tag, last_games, float(gpg), is_home)
 
         lmd1 = self.get_lmd(tag, last_games, 0, float(gpg), float(gapg))
         lmd2 = self.get_lmd(tag, last_games, 1, float(gpg), float(gapg)) if len(last_games) > 1 else {"LMDGPG": 0, "LMDGAPG": 0}
@@ -128,8 +126,10 @@ class ShlGetter:
             "LmdGPG2": lmd2.get("LMDGPG", 0),
             "LmdGAPG1": lmd1.get("LMDGAPG", 0),
             "LmdGAPG2": lmd2.get("LMDGAPG", 0),
-            "ShameFactor": sf,
-            "HungerFG": hfg,
+            "ShameFactorHome": self.get_shame_factor(tag, last_games, True),
+            "ShameFactorAway": self.get_shame_factor(tag, last_games, False),
+            "HungerFGHome": self.get_hunger_for_goals(tag, last_games, float(gpg), True),
+            "HungerFGAway": self.get_hunger_for_goals(tag, last_games, float(gpg), False),
         }
 
     def _calculate_sogpg(self, code):
@@ -248,7 +248,12 @@ class ShlGetter:
 
         return hunger
 
-    def build_game_features(self, game, date_str):
+    def build_game_features(self, game, date_str, snapshots=None):
+        """
+        Feature row for one schedule game, joined from the home and away team
+        snapshots. With a TeamSnapshotStore, snapshots already stored for
+        date_str are reused and new ones are saved.
+        """
         game_uuid = game.get("uuid")
         if not game_uuid:
             return None
@@ -268,12 +273,28 @@ class ShlGetter:
         home_uuid = home_info.get("uuid")
         away_uuid = away_info.get("uuid")
 
-        home_stats = self.get_team_stats(home_uuid, is_home=True)
-        away_stats = self.get_team_stats(away_uuid, is_home=False)
+        if snapshots is None:
+            home_stats = self.get_team_stats(home_uuid)
+            away_stats = self.get_team_stats(away_uuid)
+        else:
+            home_stats = snapshots.get(
+                home_team, date_str, lambda: self.get_team_stats(home_uuid)
+            )
+            away_stats = snapshots.get(
+                away_team, date_str, lambda: self.get_team_stats(away_uuid)
+            )
 
         if not home_stats or not away_stats:
             return None
 
+        return self.assemble_game_features(
+            game_uuid, date_str, home_team, away_team, home_stats, away_stats
+        )
+
+    @staticmethod
+    def assemble_game_features(
+        game_uuid, date_str, home_team, away_team, home_stats, away_stats
+    ):
         return {
             "shl_uuid": game_uuid,
             "date": datetime.strptime(date_str, "%Y-%m-%d").date(),
@@ -329,10 +350,10 @@ class ShlGetter:
             "a_lmd_gapg1": away_stats.get("LmdGAPG1", 0),
             "h_lmd_gapg2": home_stats.get("LmdGAPG2", 0),
             "a_lmd_gapg2": away_stats.get("LmdGAPG2", 0),
-            "h_shame_factor": home_stats.get("ShameFactor", 0),
-            "a_shame_factor": away_stats.get("ShameFactor", 0),
-            "h_hunger_fg": home_stats.get("HungerFG", 0),
-            "a_hunger_fg": away_stats.get("HungerFG", 0),
-            "hunger_fg_diff": home_stats.get("HungerFG", 0) - away_stats.get("HungerFG", 0),
-            "hunger_fg_mutual": home_stats.get("HungerFG", 0) + away_stats.get("HungerFG", 0),
+            "h_shame_factor": home_stats.get("ShameFactorHome", 0),
+            "a_shame_factor": away_stats.get("ShameFactorAway", 0),
+            "h_hunger_fg": home_stats.get("HungerFGHome", 0),
+            "a_hunger_fg": away_stats.get("HungerFGAway", 0),
+            "hunger_fg_diff": home_stats.get("HungerFGHome", 0) - away_stats.get("HungerFGAway", 0),
+            "hunger_fg_mutual": home_stats.get("HungerFGHome", 0) + away_stats.get("HungerFGAway", 0),
         }
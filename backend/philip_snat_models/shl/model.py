@@ -7,7 +7,9 @@ from datetime import date, datetime, timedelta
 from app.core.database import SessionLocal
 from app.models.philip_snat_shl_game import PhilipSnatShlGame
 from philip_snat_models.base_model import BaseAiModel
+from philip_snat_models.markets import predict_markets
 from philip_snat_models.shl.get import ShlGetter
+from philip_snat_models.team_snapshots import TeamSnapshotStore
 from philip_snat_models.shl.ai.models.model_handler import load_model, predict_goals
 from philip_snat_models.shl.ai.models.model_utils import WINNER_STRATEGY, GOALS_STRATEGY
 
@@ -34,6 +36,10 @@ class ShlAiModel(BaseAiModel):
     def __init__(self):
         self.getter = ShlGetter()
 
+    def reset_run_state(self):
+        # The getter fetches standings and team stats when it is built
+        self.getter = ShlGetter()
+
     def update_games(self):
         db = SessionLocal()
         try:
@@ -114,6 +120,7 @@ class ShlAiModel(BaseAiModel):
                 f"[download_new_games] Scanning {dates[0]} and {dates[1]}"
             )
             inserted = 0
+            snapshots = TeamSnapshotStore(db, self.LEAGUE_NAME)
 
             for current_date in dates:
                 date_str = current_date.strftime("%Y-%m-%d")
@@ -139,7 +146,9 @@ class ShlAiModel(BaseAiModel):
                         continue
 
                     try:
-                        features = self.getter.build_game_features(game, date_str)
+                        features = self.getter.build_game_features(
+                            game, date_str, snapshots=snapshots
+                        )
                         if features is None:
                             continue
 
@@ -151,6 +160,7 @@ class ShlAiModel(BaseAiModel):
                         print(f"  Error inserting game {game_uuid}: {e}")
 
             print(f"[download_new_games] Done — inserted {inserted} new games")
+            print(f"[download_new_games] {snapshots.summary()}")
         finally:
             db.close()
 
@@ -195,8 +205,16 @@ class ShlAiModel(BaseAiModel):
 
             predictions = self._predict_from_dataframe(df, training_df=training_df)
 
+            game_odds = predict_markets(
+                [pred.get("prediction_winner") for pred in predictions],
+                [pred.get("home_goals", {}) for pred in predictions],
+                [pred.get("away_goals", {}) for pred in predictions],
+                [pred.get("total_goals", {}) for pred in predictions],
+                CSV_HEADERS,
+            )
+
             rows = []
-            for pred in predictions:
+            for pred, odds in zip(predictions, game_odds):
                 game = (
                     db.query(PhilipSnatShlGame)
                     .filter(PhilipSnatShlGame.shl_uuid == pred["uuid"])
@@ -216,7 +234,6 @@ class ShlAiModel(BaseAiModel):
                             f"  Error saving predictions for game {pred['uuid']}: {db_error}"
                         )
 
-                odds = self._calculate_odds(pred)
                 rows.append({
                     "date": str(pred["date"]),
                     "home": pred["home_team"],
@@ -372,66 +389,3 @@ class ShlAiModel(BaseAiModel):
             })
 
         return results
-
-    def _calculate_odds(self, pred):
-        total_goals = pred.get("total_goals", {})
-        home_goals = pred.get("home_goals", {})
-        away_goals = pred.get("away_goals", {})
-        winner_prob = pred.get("prediction_winner", 0.5)
-
-        home_pct = 1.0 - winner_prob
-        away_pct = winner_prob
-
-        prob_home_win = 0.0
-        prob_away_win = 0.0
-        prob_draw = 0.0
-        prob_home_win_by_1_5_plus = 0.0
-        prob_away_win_by_1_5_plus = 0.0
-
-        for hg in range(6):
-            for ag in range(6):
-                ph = home_goals.get(hg, 0.0)
-                pa = away_goals.get(ag, 0.0)
-                match_prob = ph * pa
-
-                if hg > ag:
-                    prob_home_win += match_prob
-                    if hg - ag > 1.5:
-                        prob_home_win_by_1_5_plus += match_prob
-                elif ag > hg:
-                    prob_away_win += match_prob
-                    if ag - hg > 1.5:
-                        prob_away_win_by_1_5_plus += match_prob
-                else:
-                    prob_draw += match_prob
-
-        odds = {}
-        odds["1ML"] = home_pct
-        odds["2ML"] = away_pct
-        odds["X"] = prob_draw
-        odds["1"] = prob_home_win
-        odds["2"] = prob_away_win
-        odds["1X"] = prob_home_win + prob_draw
-        odds["2X"] = prob_away_win + prob_draw
-
-        for threshold in [3.5, 4.5, 5.5, 6.5, 7.5, 8.5]:
-            over_key = f"over{threshold}"
-            under_key = f"under{threshold}"
-            threshold_int = int(threshold)
-            odds[over_key] = 1.0 - sum(total_goals.get(str(i), 0.0) for i in range(threshold_int + 1))
-            odds[under_key] = sum(total_goals.get(str(i), 0.0) for i in range(threshold_int + 1))
-
-        for threshold in [1.5, 2.5, 3.5, 4.5]:
-            odds[f"home_over{threshold}"] = 1.0 - sum(home_goals.get(i, 0.0) for i in range(int(threshold) + 1))
-            odds[f"away_over{threshold}"] = 1.0 - sum(away_goals.get(i, 0.0) for i in range(int(threshold) + 1))
-
-        odds["home_-1.5"] = prob_home_win_by_1_5_plus
-        odds["away_-1.5"] = prob_away_win_by_1_5_plus
-
-        for threshold in [4.5, 5.5, 6.5]:
-            odds[f"home/o{threshold}"] = odds[f"over{threshold}"] * odds["1"]
-            odds[f"home/u{threshold}"] = odds[f"under{threshold}"] * odds["1"]
-            odds[f"away/o{threshold}"] = odds[f"over{threshold}"] * odds["2"]
-            odds[f"away/u{threshold}"] = odds[f"under{threshold}"] * odds["2"]
-
-        return odds
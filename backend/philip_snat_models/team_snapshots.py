@@ -0,0 +1,114 @@
+"""
+Team-day feature store.
+
+A snapshot holds one team's features going into one day's games (season
+aggregates, last-game details, L5GW, ...). It is computed from the league's
+HTTP sources at most once per team per day and kept in
+philip_snat_team_snapshots. Game rows are then assembled from the home and
+away snapshots, so the daily download and backfills reuse stored snapshots
+instead of scraping again.
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.philip_snat_team_snapshot import PhilipSnatTeamSnapshot
+
+
+def _as_date(value):
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+class TeamSnapshotStore:
+    def __init__(self, db, league):
+        self.db = db
+        self.league = league
+        # (team, date) -> features, including None for teams that could not be
+        # computed this run, so they are not retried for every game
+        self._cache = {}
+        self.computed = 0
+        self.reused = 0
+
+    def load(self, keys):
+        """Fetch stored snapshots for (team, date) pairs in a single query."""
+        keys = {(team, _as_date(day)) for team, day in keys}
+        missing = [key for key in keys if key not in self._cache]
+        if missing:
+            rows = self.db.execute(
+                select(
+                    PhilipSnatTeamSnapshot.team,
+                    PhilipSnatTeamSnapshot.snapshot_date,
+                    PhilipSnatTeamSnapshot.features,
+                ).where(
+                    PhilipSnatTeamSnapshot.league == self.league,
+                    tuple_(
+                        PhilipSnatTeamSnapshot.team,
+                        PhilipSnatTeamSnapshot.snapshot_date,
+                    ).in_(missing),
+                )
+            )
+            for team, day, features in rows:
+                self._cache[(team, day)] = features
+        return {key: self._cache[key] for key in keys if key in self._cache}
+
+    def load_range(self, start, end):
+        """Fetch every stored snapshot of the league from start to end."""
+        rows = self.db.execute(
+            select(
+                PhilipSnatTeamSnapshot.team,
+                PhilipSnatTeamSnapshot.snapshot_date,
+                PhilipSnatTeamSnapshot.features,
+            ).where(
+                PhilipSnatTeamSnapshot.league == self.league,
+                PhilipSnatTeamSnapshot.snapshot_date.between(
+                    _as_date(start), _as_date(end)
+                ),
+            )
+        )
+        snapshots = {(team, day): features for team, day, features in rows}
+        self._cache.update(snapshots)
+        return snapshots
+
+    def get(self, team, day, compute):
+        """
+        The team's snapshot for the day, computed with compute() and stored if
+        there is none yet. compute() returns a JSON-serializable dict, or None
+        when the team's data is not available.
+        """
+        key = (team, _as_date(day))
+        if key not in self._cache:
+            self.load([key])
+        if key in self._cache:
+            self.reused += 1
+            return self._cache[key]
+
+        features = compute()
+        self._cache[key] = features
+        if features is not None:
+            self.save(team, key[1], features)
+            self.computed += 1
+        return features
+
+    def save(self, team, day, features, commit=True):
+        stmt = insert(PhilipSnatTeamSnapshot).values(
+            league=self.league,
+            team=team,
+            snapshot_date=_as_date(day),
+            features=features,
+        )
+        self.db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_philip_snat_team_snapshot",
+                set_={"features": stmt.excluded.features, "updated_at": func.now()},
+            )
+        )
+        if commit:
+            self.db.commit()
+        self._cache[(team, _as_date(day))] = features
+
+    def summary(self):
+        return f"{self.computed} team snapshots computed, {self.reused} reused"